@@ -8,13 +8,14 @@ from sklearn.metrics import accuracy_score, roc_auc_score
 cluster = LocalCluster(n_workers=4, threads_per_worker=2, memory_limit="4GB")
 client = Client(cluster)
 
-# Load large CSV as Dask DataFrame
-ddf = dd.read_csv("large_dataset.csv")  # Replace with your large CSV file
+# Load features exported with `mlc.anal.export.export_features` as a Dask DataFrame (one
+# partition per file; pass `columns=` and `filters=` to read only some columns and labels)
+ddf = dd.read_parquet("features_dataset")  # Replace with your dataset directory
 ddf = ddf.persist()
 
 # Split features and label
-X = ddf.drop(columns=["target"])
-y = ddf["target"]
+X = ddf.drop(columns=["label", "sample_id"])
+y = ddf["label"]
 
 # Create DaskDMatrix
 dtrain = DaskDMatrix(client, X, y)
@@ -12,11 +12,12 @@ from lightgbm import LGBMClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 
 # --- Load Data ---
-data = pd.read_csv("your_dataset.csv")
+# Features exported with `mlc.anal.export.export_features` (pass `columns=` to read only some)
+data = pd.read_parquet("your_features_dataset")
 
 # --- Basic Setup ---
-TARGET_COLUMN = "target"  # Replace with your target column name
-X = data.drop(columns=[TARGET_COLUMN])
+TARGET_COLUMN = "label"  # Replace with your target column name
+X = data.drop(columns=[TARGET_COLUMN, "sample_id"])
 y = data[TARGET_COLUMN]
 
 # --- Train-Test Split ---
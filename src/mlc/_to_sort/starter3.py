@@ -22,9 +22,10 @@ from lime.lime_tabular import LimeTabularExplainer
 import joblib
 
 # 1. Load Data
-df = pd.read_csv("your_data.csv")
-X = df.drop(columns=["target"])
-y = df["target"]
+# Features exported with `mlc.anal.export.export_features` (pass `columns=` to read only some)
+df = pd.read_parquet("your_features_dataset")
+X = df.drop(columns=["label", "sample_id"])
+y = df["label"]
 
 # 2. Preprocessing
 X.fillna(X.median(), inplace=True)
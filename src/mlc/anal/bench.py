@@ -0,0 +1,310 @@
+"""Benchmarks for the analysis modules.
+Cold import time is measured in a fresh interpreter each time with `python -X importtime`, which
+excludes interpreter start up.
+Features are timed one at a time on generated samples of each size and data type, through the
+calculation path feature matrices use (`calculate_all_binary_features`, which uses the vectorized
+implementations), or the pure Python reference functions of the registry with `--reference`. The
+best of `repeat` timings (each long enough to be above timer noise) gives the cost in ns/byte, a
+separate `tracemalloc` run gives the peak memory allocated by the call, and the slope of log(time)
+against log(size) gives how the cost scales (1 is linear).
+
+Run with `python -m mlc.anal.bench`. Results are JSON, so runs from different commits can be
+compared.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional, Sequence
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS, BYTE_ARRAYS_ANAL_FUNCS
+from mlc.anal.features import calculate_all_binary_features, calculate_pair_features_batch
+from mlc.data_gen.data_type_base import DataTypeSettingKey
+from mlc.data_gen.random_data import RandomDataType
+from mlc.utils.version import CURRENT_VERSION
+
+
+BENCHMARKS: tuple[str, ...] = ("import_time", "features", "pair_features")
+# Sizes (in bytes) are configurable from 64 B up to 16 MiB
+MIN_SIZE: int = 64
+MAX_SIZE: int = 16 * 1024 * 1024
+DEFAULT_SIZES: tuple[int, ...] = (64, 1024, 16 * 1024)
+# Each timing calls the feature enough times to take at least this long
+MIN_TIMING_NS: int = 1_000_000
+
+DEFAULT_IMPORT_MODULES: tuple[str, ...] = ("mlc.anal.binary", "mlc.anal.features")
+# Modules that importing the feature modules shouldn't pull in (`mlc.anal.features` needs numpy)
+HEAVY_MODULES: tuple[str, ...] = ("numpy", "zstd", "lzma", "bz2", "gzip", "tarfile", "tempfile")
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    # Same module search path as this interpreter
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True, env=env
+    )
+
+
+def cold_import_time_us(module: str) -> int:
+    """Cumulative time (in microseconds) to import `module` in a new interpreter"""
+    proc = _run_python("-X", "importtime", "-c", f"import {module}")
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No import time reported for '{module}'")
+
+
+def imported_heavy_modules(module: str) -> list[str]:
+    """Which of `HEAVY_MODULES` importing `module` in a new interpreter imports"""
+    code = (
+        f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = _run_python("-c", code)
+    return proc.stdout.split()
+
+
+def bench_import_time(modules: Sequence[str] = DEFAULT_IMPORT_MODULES, repeat: int = 5) -> dict:
+    """Median and min cold import time of each module over `repeat` runs"""
+    results = {}
+    for module in modules:
+        times = [cold_import_time_us(module) for _ in range(repeat)]
+        results[module] = {
+            "median_us": statistics.median(times),
+            "min_us": min(times),
+            "heavy_modules": imported_heavy_modules(module),
+        }
+    return results
+
+
+def generate_sample(data_type: RandomDataType, size: int) -> bytes:
+    return data_type.generate({DataTypeSettingKey.LENGTH.name: size})
+
+
+def time_call_ns(func: Callable, args: tuple, repeat: int = 3) -> float:
+    """Best time (in ns) of a `func(*args)` call out of `repeat` timings"""
+    # Number of calls per timing so a timing takes at least `MIN_TIMING_NS`
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= MIN_TIMING_NS:
+            break
+        number *= max(2, min(10, math.ceil(MIN_TIMING_NS / max(elapsed, 1))))
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / number
+
+
+def peak_alloc_bytes(func: Callable, args: tuple) -> int:
+    """Peak memory (in bytes) allocated while calling `func(*args)`"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def scaling_exponent(sizes: Sequence[int], times: Sequence[float]) -> Optional[float]:
+    """Slope of the least squares fit of log(time) against log(size): time ~ size ** exponent.
+    None if there aren't 2 different sizes.
+    """
+    if len(set(sizes)) < 2:
+        return None
+    slope, _ = statistics.linear_regression(
+        [math.log(size) for size in sizes], [math.log(max(elapsed, 1e-3)) for elapsed in times]
+    )
+    return slope
+
+
+def feature_call(name: str, pair: bool = False, reference: bool = False) -> Callable:
+    """What's timed for feature `name`: its calculation through the feature calculation path, or its
+    pure Python function if `reference`
+    """
+    if reference:
+        return (BYTE_ARRAYS_ANAL_FUNCS if pair else BYTE_ARRAY_ANAL_FUNCS)[name]
+    if pair:
+        return lambda data1, data2: calculate_pair_features_batch([(data1, data2)], [name])
+    return lambda data: calculate_all_binary_features(data, names=[name])
+
+
+def bench_features(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    data_types: Sequence[RandomDataType] = tuple(RandomDataType),
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    pair: bool = False,
+    allocations: bool = True,
+    reference: bool = False,
+) -> dict:
+    """Cost profile of every registered feature (pair features if `pair`) selected by the
+    `include` and `exclude` patterns (see `feature_call` for `reference`), as
+    {feature: {data type: {"sizes": {size: measurements}, "scaling_exponent": ...}}}.
+    Features that raise on a sample have the exception's name as their measurements.
+    """
+    for size in sizes:
+        if not MIN_SIZE <= size <= MAX_SIZE:
+            raise ValueError(f"Sample sizes must be in [{MIN_SIZE}, {MAX_SIZE}], got {size}")
+    registry = BYTE_ARRAYS_ANAL_FUNCS if pair else BYTE_ARRAY_ANAL_FUNCS
+    names = registry.select(include=include, exclude=exclude)
+    samples = {
+        (data_type, size): tuple(generate_sample(data_type, size) for _ in range(2 if pair else 1))
+        for data_type in data_types
+        for size in sizes
+    }
+
+    results = {}
+    for name in names:
+        func = feature_call(name, pair, reference)
+        results[name] = {}
+        for data_type in data_types:
+            measurements = {}
+            timed_sizes, times = [], []
+            for size in sizes:
+                args = samples[data_type, size]
+                try:
+                    elapsed = time_call_ns(func, args, repeat)
+                except Exception as exc:
+                    measurements[size] = {"error": type(exc).__name__}
+                    continue
+                measurements[size] = {"ns": elapsed, "ns_per_byte": elapsed / size}
+                if allocations:
+                    measurements[size]["peak_alloc_bytes"] = peak_alloc_bytes(func, args)
+                timed_sizes.append(size)
+                times.append(elapsed)
+            results[name][data_type.name] = {
+                "sizes": measurements,
+                "scaling_exponent": scaling_exponent(timed_sizes, times),
+            }
+    return results
+
+
+def slowest_features(results: dict, count: int = 20) -> list[dict]:
+    """The `count` features of a `bench_features` result that take the longest at the largest
+    size, averaged over data types
+    """
+    costs = []
+    for name, per_type in results.items():
+        times = []
+        for per_size in per_type.values():
+            largest = max(per_size["sizes"], key=int)
+            times.append(per_size["sizes"][largest].get("ns"))
+        if times and None not in times:
+            costs.append({"feature": name, "size": int(largest), "ns": statistics.mean(times)})
+    return sorted(costs, key=lambda cost: cost["ns"], reverse=True)[:count]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def environment() -> dict:
+    """What the results were measured with"""
+    return {
+        "mlc_version": CURRENT_VERSION,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analysis benchmarks")
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=list(BENCHMARKS),
+        help="Benchmarks to run",
+    )
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        default=list(DEFAULT_IMPORT_MODULES),
+        help="Modules to measure the cold import time of",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_SIZES),
+        help=f"Sample sizes in bytes (from {MIN_SIZE} to {MAX_SIZE})",
+    )
+    parser.add_argument(
+        "--data-types",
+        nargs="+",
+        choices=RandomDataType.names(),
+        default=RandomDataType.names(),
+        help="Types of random data to generate samples of",
+    )
+    parser.add_argument("--include", nargs="+", help="Only time features matching these patterns")
+    parser.add_argument("--exclude", nargs="+", help="Don't time features matching these patterns")
+    parser.add_argument(
+        "--no-allocations",
+        action="store_true",
+        help="Don't measure allocations (which runs every feature once more under tracemalloc)",
+    )
+    parser.add_argument(
+        "--reference",
+        action="store_true",
+        help="Time the pure Python feature functions instead of the feature calculation path",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per module or feature")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment()}
+    if "import_time" in args.benchmarks:
+        results["import_time"] = bench_import_time(args.modules, args.repeat)
+    data_types = [RandomDataType[name] for name in args.data_types]
+    for benchmark, pair in (("features", False), ("pair_features", True)):
+        if benchmark in args.benchmarks:
+            results[benchmark] = bench_features(
+                args.sizes,
+                data_types,
+                include=args.include,
+                exclude=args.exclude,
+                repeat=args.repeat,
+                pair=pair,
+                allocations=not args.no_allocations,
+                reference=args.reference,
+            )
+            results[f"slowest_{benchmark}"] = slowest_features(results[benchmark])
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as handle:
+            json.dump(results, handle, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
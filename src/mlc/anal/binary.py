@@ -5,17 +5,23 @@ bytes-type inputs. If you feel like catching the appropriate exceptions yourself
 feature values to None or something, that's fine. Most exceptions are probably `ZeroDivisionError`.
 """
 
-from collections import Counter
-from dataclasses import dataclass
 from functools import lru_cache
 import math
-import subprocess
-import tempfile
-from typing import Callable, Iterable, Tuple, Union
+from typing import Callable, Iterable, Tuple, TYPE_CHECKING, Union
 import zlib
 
-from mlc.compression import compress, CompressionType
+from mlc.anal.registry import FeatureFamily, FeatureRegistry
+from mlc.anal import tables
+from mlc.anal.tables import count_matching
+from mlc.compression import compressed_size, CompressionType
 
+if TYPE_CHECKING:
+    # numpy and the numpy implementations of features are imported on first use, so importing this
+    # module stays cheap
+    import numpy as np
+
+    from mlc.anal.bits import BitSample
+    from mlc.anal.ent import EntResults
 
 # Indicates that the function accepts 1 bytes object and returns a float or int
 _MARK_BYTE_ARRAY_ATTR = "is_anal"
@@ -28,13 +34,21 @@ ByteArrayCallableT = Callable[[bytes], FeatureType]
 ByteArraysCallableT = Callable[[bytes, bytes], FeatureType]
 
 
+# Every feature, in definition order. Generated feature families are registered as data and their
+# functions are only created when looked up.
+BYTE_ARRAY_REGISTRY = FeatureRegistry(mark_attr=_MARK_BYTE_ARRAY_ATTR)
+BYTE_ARRAYS_REGISTRY = FeatureRegistry(mark_attr=_MARK_BYTE_ARRAYS_ATTR)
+
+
 def mark_byte_array_func(func: ByteArrayCallableT) -> ByteArrayCallableT:
     setattr(func, _MARK_BYTE_ARRAY_ATTR, True)
+    BYTE_ARRAY_REGISTRY.add_func(func.__name__, func)
     return func
 
 
 def mark_byte_arrays_func(func: ByteArraysCallableT) -> ByteArraysCallableT:
     setattr(func, _MARK_BYTE_ARRAYS_ATTR, True)
+    BYTE_ARRAYS_REGISTRY.add_func(func.__name__, func)
     return func
 
 
@@ -48,6 +62,16 @@ def blocks(data: bytes, block_size_bytes: int) -> list[bytes]:
         yield data[idx : idx + block_size_bytes]
 
 
+def block_view(data: bytes, block_size_bytes: int) -> "np.ndarray":
+    """Zero-copy [n_blocks, block_size_bytes] uint8 view of the same blocks `blocks` yields"""
+    import numpy as np
+
+    num_blocks = max(0, (len(data) - 1) // block_size_bytes)
+    return np.frombuffer(data, dtype=np.uint8, count=num_blocks * block_size_bytes).reshape(
+        num_blocks, block_size_bytes
+    )
+
+
 def _bin(byte: int) -> str:
     return "{:08b}".format(byte)
 
@@ -65,11 +89,93 @@ def upper_nibble(byte: int) -> int:
 
 
 def num_bits_on(byte: int) -> int:
-    return _bin(byte).count("1")
+    return int(tables.POPCOUNT[byte])
 
 
 def num_bits_off(byte: int) -> int:
-    return _bin(byte).count("0")
+    return int(tables.ZERO_BIT_COUNT[byte])
+
+
+def byte_histogram(data: bytes) -> "np.ndarray":
+    """Number of occurrences of each byte value (256 bins) in `data`"""
+    import numpy as np
+
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+
+
+def _table_sum(data: bytes, table: "np.ndarray") -> int:
+    """Sum of the per byte value `table` over the bytes of `data`"""
+    return count_matching(byte_histogram(data), table)
+
+
+def _percent_matching(data: bytes, table: "np.ndarray") -> float:
+    """Percent of the bytes of `data` matching the per byte predicate `table`"""
+    return 100.0 * _table_sum(data, table) / len(data)
+
+
+def entropy_from_histogram(hist: "np.ndarray", length: int) -> float:
+    return -sum((c / length) * math.log2(c / length) for c in hist.tolist() if c)
+
+
+def chi_square_from_histogram(hist: "np.ndarray", length: int) -> float:
+    expected = length / 256  # Expected frequency for uniform distribution
+    chi2 = 0.0
+    for observed in hist.tolist():
+        chi2 += ((observed - expected) ** 2) / expected
+    return chi2
+
+
+def most_common_byte_from_histogram(hist: "np.ndarray") -> int:
+    """In case of collisions, highest byte is returned"""
+    import numpy as np
+
+    return 255 - int(np.argmax(hist[::-1]))
+
+
+def counts_gt_from_histogram(hist: "np.ndarray") -> "np.ndarray":
+    """Element `num` is the number of bytes > `num`"""
+    import numpy as np
+
+    return int(hist.sum()) - np.cumsum(hist)
+
+
+def counts_matching_masks_from_histogram(hist: "np.ndarray") -> "np.ndarray":
+    """Element `mask - 1` is the number of bytes matching `mask` (for masks 1 to 255)"""
+    return tables.MASK_MATCH @ hist
+
+
+# Order of the values returned by `histogram_feature_values`
+HISTOGRAM_FEATURE_NAMES: tuple[str, ...] = (
+    ("calc_entropy", "calc_chi_square", "calc_chi_square_normalized", "most_common_byte")
+    + tuple(f"percent_of_bytes_eq_{num}" for num in range(0, 256))
+    + tuple(f"percent_of_bytes_gt_{num}" for num in range(1, 255))
+    + tuple(f"percent_of_bytes_matching_mask_{mask}" for mask in range(1, 256))
+)
+
+
+def histogram_feature_values(hist: "np.ndarray", length: int) -> list[FeatureType]:
+    """Every histogram-derived feature, in `HISTOGRAM_FEATURE_NAMES` order, from 1 histogram.
+    Percentages keep the (100.0 * count) / length operation order of the per-feature functions.
+    """
+    chi2 = chi_square_from_histogram(hist, length)
+    return (
+        [
+            entropy_from_histogram(hist, length),
+            chi2,
+            chi2 / length,
+            most_common_byte_from_histogram(hist),
+        ]
+        + (100.0 * hist / length).tolist()
+        + (100.0 * counts_gt_from_histogram(hist)[1:255] / length).tolist()
+        + (100.0 * counts_matching_masks_from_histogram(hist) / length).tolist()
+    )
+
+
+def calculate_histogram_features(data: bytes) -> dict[str, FeatureType]:
+    """Calculates all histogram-derived features with a single pass over `data`"""
+    return dict(
+        zip(HISTOGRAM_FEATURE_NAMES, histogram_feature_values(byte_histogram(data), len(data)))
+    )
 
 
 @mark_byte_array_func
@@ -235,148 +341,105 @@ def average_int64_be(data: bytes) -> float:
 
 @mark_byte_array_func
 def average_bit(data: bytes) -> float:
-    return sum(num_bits_on(byte) for byte in data) / (len(data) * 8)
+    return _table_sum(data, tables.POPCOUNT) / (len(data) * 8)
 
 
 @mark_byte_array_func
 def average_nibble(data: bytes) -> float:
-    return sum(lower_nibble(byte) + upper_nibble(byte) for byte in data) / (len(data) * 2)
+    return _table_sum(data, tables.LOWER_NIBBLE + tables.UPPER_NIBBLE) / (len(data) * 2)
 
 
 @mark_byte_array_func
 def average_upper_nibble(data: bytes) -> float:
-    return sum(upper_nibble(byte) for byte in data) / len(data)
+    return _table_sum(data, tables.UPPER_NIBBLE) / len(data)
 
 
 @mark_byte_array_func
 def average_lower_nibble(data: bytes) -> float:
-    return sum(lower_nibble(byte) for byte in data) / len(data)
+    return _table_sum(data, tables.LOWER_NIBBLE) / len(data)
 
 
 @mark_byte_array_func
 def most_common_byte(data: bytes) -> int:
     """In case of collisions, highest byte is returned"""
-    counts = {(data.count(b), b) for b in range(256)}
-    # Sort by count (and then byte value in case of collisions)
-    # Grab last element (highest count)
-    # Return byte value
-    return sorted(counts)[-1][1]
+    return most_common_byte_from_histogram(byte_histogram(data))
 
 
 @mark_byte_array_func
 def average_num_bits_on(data: bytes) -> float:
-    return sum(num_bits_on(byte) for byte in data) / len(data)
+    return _table_sum(data, tables.POPCOUNT) / len(data)
 
 
 @mark_byte_array_func
 def average_num_bits_off(data: bytes) -> float:
-    return sum(num_bits_off(byte) for byte in data) / len(data)
+    return _table_sum(data, tables.ZERO_BIT_COUNT) / len(data)
 
 
 def percent_bytes_with_bit_x_on(data: bytes, bit: int) -> float:
     assert 0 <= bit <= 7
-    bit = 1 << bit
-    return 100.0 * len([byte for byte in data if byte & bit]) / len(data)
+    return _percent_matching(data, tables.BIT_ON[bit])
 
 
 def percent_bytes_with_bit_x_off(data: bytes, bit: int) -> float:
     assert 0 <= bit <= 7
-    bit = 1 << bit
-    return 100.0 * len([byte for byte in data if byte & bit == 0]) / len(data)
+    return _percent_matching(data, ~tables.BIT_ON[bit])
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_gt_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) > upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_GT)
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_ge_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) >= upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_GE)
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_lt_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) < upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_LT)
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_le_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) <= upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_LE)
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_eq_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) == upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_EQ)
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_eq_complement_of_second_nibble(data: bytes) -> float:
-    return 100.0 * sum(1 for byte in data if lower_nibble(byte) == ~upper_nibble(byte)) / len(data)
+    return _percent_matching(data, tables.NIBBLE_EQ_COMPLEMENT)
 
 
 def _mirror(byte: int) -> int:
     # bit-reverse input int (range [0, 255])
-    return int("{:08b}".format(byte)[::-1], 2)
+    return int(tables.MIRRORED[byte])
 
 
 @mark_byte_array_func
 def percent_bytes_first_nibble_eq_mirror_of_second_nibble(data: bytes) -> float:
-    # TODO: is sum(1 for byte ...]) or len([byte for byte ...) faster? Memory efficiency?
-    return (
-        100.0
-        * sum(1 for byte in data if lower_nibble(byte) == _mirror(upper_nibble(byte)))
-        / len(data)
-    )
+    return _percent_matching(data, tables.NIBBLE_EQ_MIRROR)
 
 
-percent_bytes_with_bit_0_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 0)
-)
-percent_bytes_with_bit_1_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 1)
-)
-percent_bytes_with_bit_2_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 2)
-)
-percent_bytes_with_bit_3_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 3)
-)
-percent_bytes_with_bit_4_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 4)
-)
-percent_bytes_with_bit_5_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 5)
-)
-percent_bytes_with_bit_6_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 6)
-)
-percent_bytes_with_bit_7_on = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_on(data, 7)
-)
-percent_bytes_with_bit_0_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 0)
-)
-percent_bytes_with_bit_1_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 1)
-)
-percent_bytes_with_bit_2_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 2)
-)
-percent_bytes_with_bit_3_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 3)
-)
-percent_bytes_with_bit_4_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 4)
-)
-percent_bytes_with_bit_5_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 5)
-)
-percent_bytes_with_bit_6_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 6)
-)
-percent_bytes_with_bit_7_off = mark_byte_array_func(
-    lambda data: percent_bytes_with_bit_x_off(data, 7)
+def _percent_bytes_with_bit_func(bit: int, state: str) -> ByteArrayCallableT:
+    if state == "on":
+        return lambda data: percent_bytes_with_bit_x_on(data, bit)
+    return lambda data: percent_bytes_with_bit_x_off(data, bit)
+
+
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_bytes_with_bit",
+        name_fmt="percent_bytes_with_bit_{bit}_{state}",
+        factory=_percent_bytes_with_bit_func,
+        params=lambda: (
+            {"bit": bit, "state": state} for state in ("on", "off") for bit in range(8)
+        ),
+    )
 )
 
 
@@ -435,63 +498,169 @@ def percent_bytes_eq_next_byte(data: bytes) -> float:
     return _percent_op_next_byte(data, _eq_op)
 
 
-def _set_up_percent_bytes_containing_bits_funcs() -> None:
-    def _get_func(patt):
-        return lambda data: 100.0 * sum(1 for byte in data if patt in _bin(byte)) / len(data)
+def _percent_bytes_containing_bits_func(patt: str) -> ByteArrayCallableT:
+    from mlc.anal.bits import bytes_containing_bits_count
 
-    for bit_len in range(1, 9):
-        for patt in range(0, 2**bit_len):
-            patt = ("{:0" + str(bit_len) + "b}").format(patt)
-            func_name = f"percent_of_bytes_containing_bits_{patt}"
-            globals()[func_name] = mark_byte_array_func(_get_func(patt))
+    return lambda data: 100.0 * bytes_containing_bits_count(byte_histogram(data), patt) / len(data)
 
 
-_set_up_percent_bytes_containing_bits_funcs()
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_bytes_containing_bits",
+        name_fmt="percent_of_bytes_containing_bits_{patt}",
+        factory=_percent_bytes_containing_bits_func,
+        params=lambda: (
+            {"patt": ("{:0" + str(bit_len) + "b}").format(patt)}
+            for bit_len in range(1, 9)
+            for patt in range(0, 2**bit_len)
+        ),
+    )
+)
+
+
+def _percent_bit_ngram_func(patt: str) -> ByteArrayCallableT:
+    import numpy as np
+
+    from mlc.anal.bits import bit_ngram_counts
 
+    def percent_bit_ngram(data: bytes) -> float:
+        count = int(bit_ngram_counts(np.frombuffer(data, dtype=np.uint8), len(patt))[int(patt, 2)])
+        return 100.0 * count / max(0, len(data) * 8 - len(patt) + 1)
 
-def _set_up_percent_bytes_gt_funcs() -> None:
-    def _get_func(num):
-        return lambda data: 100.0 * sum(1 for byte in data if byte > num) / len(data)
+    return percent_bit_ngram
 
-    for num in range(1, 255):
-        func_name = f"percent_of_bytes_gt_{num}"
-        globals()[func_name] = mark_byte_array_func(_get_func(num))
 
+def _bit_ngram_params() -> Iterable[dict]:
+    from mlc.anal.bits import BIT_NGRAM_MAX_LEN, ngram_patterns
 
-_set_up_percent_bytes_gt_funcs()
+    for bit_len in range(1, BIT_NGRAM_MAX_LEN + 1):
+        for patt in ngram_patterns(bit_len):
+            yield {"patt": patt}
 
 
-def _set_up_percent_freq_each_byte_funcs() -> None:
-    def _get_func(num):
-        return lambda data: 100.0 * data.count(num) / len(data)
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_bit_ngrams",
+        name_fmt="percent_bit_ngrams_{patt}",
+        factory=_percent_bit_ngram_func,
+        params=_bit_ngram_params,
+    )
+)
 
-    for num in range(0, 256):
-        func_name = f"percent_of_bytes_eq_{num}"
-        globals()[func_name] = mark_byte_array_func(_get_func(num))
 
+def _bit_sample(data: bytes) -> "BitSample":
+    import numpy as np
 
-_set_up_percent_freq_each_byte_funcs()
+    from mlc.anal.bits import BitSample
+
+    return BitSample(np.frombuffer(data, dtype=np.uint8))
+
+
+@mark_byte_array_func
+def longest_run_of_0_bits(data: bytes) -> int:
+    return _bit_sample(data).longest_run(0)
+
+
+@mark_byte_array_func
+def longest_run_of_1_bits(data: bytes) -> int:
+    return _bit_sample(data).longest_run(1)
+
+
+@mark_byte_array_func
+def average_bit_run_length(data: bytes) -> float:
+    return len(data) * 8 / len(_bit_sample(data).run_lengths)
+
+
+@mark_byte_array_func
+def bit_runs_per_bit(data: bytes) -> float:
+    return len(_bit_sample(data).run_lengths) / (len(data) * 8)
+
+
+def _percent_bit_runs_of_length_func(length: int) -> ByteArrayCallableT:
+    def percent_bit_runs_of_length(data: bytes) -> float:
+        bits = _bit_sample(data)
+        return 100.0 * int(bits.run_length_counts[length - 1]) / len(bits.run_lengths)
+
+    return percent_bit_runs_of_length
+
+
+def _bit_run_length_params() -> Iterable[dict]:
+    from mlc.anal.bits import BIT_RUN_LENGTH_BINS
+
+    return ({"length": length} for length in range(1, BIT_RUN_LENGTH_BINS))
+
+
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_bit_runs_of_length",
+        name_fmt="percent_bit_runs_of_length_{length}",
+        factory=_percent_bit_runs_of_length_func,
+        params=_bit_run_length_params,
+    )
+)
+
+
+@mark_byte_array_func
+def percent_bit_runs_of_length_16_or_more(data: bytes) -> float:
+    from mlc.anal.bits import BIT_RUN_LENGTH_BINS
+
+    # Last bin of the run length distribution
+    return _percent_bit_runs_of_length_func(BIT_RUN_LENGTH_BINS)(data)
+
+
+def _percent_bytes_gt_func(num: int) -> ByteArrayCallableT:
+    return lambda data: 100.0 * int(byte_histogram(data)[num + 1 :].sum()) / len(data)
+
+
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_bytes_gt",
+        name_fmt="percent_of_bytes_gt_{num}",
+        factory=_percent_bytes_gt_func,
+        params=lambda: ({"num": num} for num in range(1, 255)),
+    )
+)
+
+
+def _percent_freq_byte_func(num: int) -> ByteArrayCallableT:
+    return lambda data: 100.0 * data.count(num) / len(data)
+
+
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_bytes_eq",
+        name_fmt="percent_of_bytes_eq_{num}",
+        factory=_percent_freq_byte_func,
+        params=lambda: ({"num": num} for num in range(0, 256)),
+    )
+)
 
 
 # TODO: not sure these are correct. Values look off. Write tests to verify.
 #       Update: I think it might actually be fine. Test anyways.
-def _set_up_percent_of_blocks_with_byte_in_pos_funcs(
-    pos: int, block_size_bytes: int = DEFAULT_BLOCK_SIZE_BYTES
-) -> None:
-    def _get_func(pos_, num):
-        return lambda data: (
-            100.0
-            * len([block for block in blocks(data, block_size_bytes) if block[pos_] == num])
-            / (len(data) / block_size_bytes)
-        )
-
-    for num in range(0, 256):
-        func_name = f"percent_of_blocks_idx_{pos}_eq_{num}"
-        globals()[func_name] = mark_byte_array_func(_get_func(pos, num))
+def _percent_of_blocks_with_byte_in_pos_func(
+    pos: int, num: int, block_size_bytes: int
+) -> ByteArrayCallableT:
+    return lambda data: (
+        100.0
+        * len([block for block in blocks(data, block_size_bytes) if block[pos] == num])
+        / (len(data) / block_size_bytes)
+    )
 
 
-for POS in range(DEFAULT_BLOCK_SIZE_BYTES):
-    _set_up_percent_of_blocks_with_byte_in_pos_funcs(POS, block_size_bytes=DEFAULT_BLOCK_SIZE_BYTES)
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_blocks_idx_eq",
+        name_fmt="percent_of_blocks_idx_{pos}_eq_{num}",
+        factory=_percent_of_blocks_with_byte_in_pos_func,
+        # Block size is bound now, like the default arguments of the other block functions
+        params=lambda block_size_bytes=DEFAULT_BLOCK_SIZE_BYTES: (
+            {"pos": pos, "num": num, "block_size_bytes": block_size_bytes}
+            for pos in range(block_size_bytes)
+            for num in range(0, 256)
+        ),
+    )
+)
 
 
 def _average_block_op(
@@ -522,21 +691,12 @@ def average_block_max_minus_min(
 
 @mark_byte_array_func
 def calc_entropy(data: bytes) -> float:
-    freq = Counter(data)
-    return -sum((c / len(data)) * math.log2(c / len(data)) for c in freq.values())
+    return entropy_from_histogram(byte_histogram(data), len(data))
 
 
 @mark_byte_array_func
 def calc_chi_square(data: bytes) -> float:
-    expected = len(data) / 256  # Expected frequency for uniform distribution
-    freq = Counter(data)
-
-    chi2 = 0.0
-    for byte_val in range(256):
-        observed = freq.get(byte_val, 0)
-        chi2 += ((observed - expected) ** 2) / expected
-
-    return chi2
+    return chi_square_from_histogram(byte_histogram(data), len(data))
 
 
 @mark_byte_array_func
@@ -544,35 +704,21 @@ def calc_chi_square_normalized(data: bytes) -> float:
     return calc_chi_square(data) / len(data)
 
 
-@dataclass
-class EntResults:
-    """Useful outputs of `ent -t <filename>`"""
-
-    entropy: float
-    chi_square: float
-    mean: float
-    monte_carlo_pi: float
-    serial_correlation: float
-
-
 # If data is only run serially through functions in this file, then 1 would be sufficient, but in
 # cases of multi-threading or multi-processing, more cache entries would be needed to be useful
 @lru_cache(maxsize=64)
-def run_ent(data: bytes) -> EntResults:
-    with tempfile.NamedTemporaryFile() as temp_file:
-        filename = temp_file.name
-        with open(filename, "wb") as handle:
-            handle.write(data)
-        result = subprocess.run(["ent", "-t", filename], stdout=subprocess.PIPE, check=True)
-        lines = [line.strip() for line in result.stdout.decode().split("\n")]
-        values = [value.strip() for value in lines[1].split(",")]
-        return EntResults(
-            entropy=float(values[2]),
-            chi_square=float(values[3]),
-            mean=float(values[4]),
-            monte_carlo_pi=float(values[5]),
-            serial_correlation=float(values[6]),
-        )
+def run_ent(data: bytes) -> "EntResults":
+    """Statistics of `ent -t`, computed in-process (see `mlc.anal.ent`)"""
+    from mlc.anal.ent import ent_stats
+
+    return ent_stats(data)
+
+
+def _ent_block_average(data: bytes, field: str, block_size_bytes: int) -> float:
+    from mlc.anal.ent import ent_block_stats
+
+    block_vals = getattr(ent_block_stats(block_view(data, block_size_bytes)), field)
+    return sum(block_vals.tolist()) / len(block_vals)
 
 
 @mark_byte_array_func
@@ -604,156 +750,158 @@ def ent_serial_correlation(data: bytes) -> float:
 def ent_entropy_block_average(
     data: bytes, block_size_bytes: int = DEFAULT_BLOCK_SIZE_BYTES
 ) -> float:
-    block_vals = [run_ent(block).entropy for block in blocks(data, block_size_bytes)]
-    return sum(block_vals) / len(block_vals)
+    return _ent_block_average(data, "entropy", block_size_bytes)
 
 
 @mark_byte_array_func
 def ent_chi_square_block_average(
     data: bytes, block_size_bytes: int = DEFAULT_BLOCK_SIZE_BYTES
 ) -> float:
-    block_vals = [run_ent(block).chi_square for block in blocks(data, block_size_bytes)]
-    return sum(block_vals) / len(block_vals)
+    return _ent_block_average(data, "chi_square", block_size_bytes)
 
 
 @mark_byte_array_func
 def ent_monte_carlo_pi_block_average(
     data: bytes, block_size_bytes: int = DEFAULT_BLOCK_SIZE_BYTES
 ) -> float:
-    block_vals = [run_ent(block).monte_carlo_pi for block in blocks(data, block_size_bytes)]
-    return sum(block_vals) / len(block_vals)
+    return _ent_block_average(data, "monte_carlo_pi", block_size_bytes)
 
 
 @mark_byte_array_func
 def ent_serial_correlation_bkock_average(
     data: bytes, block_size_bytes: int = DEFAULT_BLOCK_SIZE_BYTES
 ) -> float:
-    block_vals = [run_ent(block).serial_correlation for block in blocks(data, block_size_bytes)]
-    return sum(block_vals) / len(block_vals)
+    return _ent_block_average(data, "serial_correlation", block_size_bytes)
 
 
 def bits_on_indices(byte: int) -> list[int]:
     """Returns list of indices of which bits were on in given `byte` (range [0, 255])"""
-    byte = _bin(byte)[::-1]
-    return [i for i in range(len(byte)) if byte[i] == "1"]
+    return list(tables.BITS_ON_INDICES[byte])
 
 
 @mark_byte_array_func
 def average_on_bit_position_8bits(data: bytes) -> float:
-    # TODO: unit test
     # TODO: 4 bits, 16 bits
-    total_sum = 0
-    for byte in data:
-        on = bits_on_indices(byte)
-        total_sum += sum(on)
-    return total_sum / (len(data) * 8)
+    return _table_sum(data, tables.ON_BIT_POSITION_SUM) / (len(data) * 8)
 
 
 @mark_byte_array_func
 def kolmogorov_complexity_estimate(data: bytes) -> float:
-    return len(zlib.compress(data)) / len(data)
+    size = compressed_size(data, CompressionType.ZLIB, {"level": zlib.Z_DEFAULT_COMPRESSION})
+    return size / len(data)
 
 
 @mark_byte_array_func
 def kolmogorov_complexity_estimate_binary(data: bytes) -> float:
-    return kolmogorov_complexity_estimate(bytes_to_bin_str(data).encode())
+    import numpy as np
+
+    from mlc.anal.bits import bit_string
+
+    # Same as `bytes_to_bin_str(data).encode()`, without building a string per byte
+    return kolmogorov_complexity_estimate(bit_string(np.frombuffer(data, dtype=np.uint8)))
 
 
 @mark_byte_array_func
 def compression_ratio_zlib(data: bytes) -> float:
-    return len(compress(data, CompressionType.ZLIB)) / len(data)
+    return compressed_size(data, CompressionType.ZLIB) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_gzip(data: bytes) -> float:
-    return len(compress(data, CompressionType.GZIP)) / len(data)
+    return compressed_size(data, CompressionType.GZIP) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_lzma(data: bytes) -> float:
-    return len(compress(data, CompressionType.LZMA)) / len(data)
+    return compressed_size(data, CompressionType.LZMA) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_bz2(data: bytes) -> float:
-    return len(compress(data, CompressionType.BZ2)) / len(data)
+    return compressed_size(data, CompressionType.BZ2) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_tar(data: bytes) -> float:
-    return len(compress(data, CompressionType.TAR)) / len(data)
+    return compressed_size(data, CompressionType.TAR) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_tar_gz(data: bytes) -> float:
-    return len(compress(data, CompressionType.TAR_GZ)) / len(data)
+    return compressed_size(data, CompressionType.TAR_GZ) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_tar_bz2(data: bytes) -> float:
-    return len(compress(data, CompressionType.TAR_BZ2)) / len(data)
+    return compressed_size(data, CompressionType.TAR_BZ2) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_tar_xz(data: bytes) -> float:
-    return len(compress(data, CompressionType.TAR_XZ)) / len(data)
+    return compressed_size(data, CompressionType.TAR_XZ) / len(data)
 
 
 @mark_byte_array_func
 def compression_ratio_zstd(data: bytes) -> float:
-    return len(compress(data, CompressionType.ZSTD)) / len(data)
+    return compressed_size(data, CompressionType.ZSTD) / len(data)
 
 
 @mark_byte_array_func
 def percent_bytes_bit0_bit7_symmetry(data: bytes) -> float:
-    return sum(1 for byte in data if (byte & 1) and (byte & 0b10000000)) / len(data)
+    return _table_sum(data, tables.BIT0_AND_BIT7_ON) / len(data)
 
 
-def _set_up_percent_bit_symmetries_funcs() -> None:
-    # TODO: unit test these
-    def _get_func(start_1, end_1, start_2, end_2):
-        return lambda data: 100.0 * _num_match(data, start_1, end_1, start_2, end_2) / len(data)
-
+def bit_symmetry_ranges() -> Iterable[Tuple[int, int, int, int]]:
+    """Yields (start_1, end_1, start_2, end_2) for each of the bit symmetry features. Indices are
+    inclusive and index into `_bin(byte)`, so index 0 is the most significant bit.
+    """
     for start_bit_idx_1 in range(0, 7):
         for start_bit_idx_2 in range(start_bit_idx_1 + 1, 8):
             for bit_len in range(1, 8 - start_bit_idx_2):
-                end_bit_idx_1 = start_bit_idx_1 + bit_len
-                end_bit_idx_2 = start_bit_idx_2 + bit_len
-
-                func_name = f"percent_of_bytes_bits_{start_bit_idx_1}_to_{end_bit_idx_1}_eq_{start_bit_idx_2}_to_{end_bit_idx_2}"
-
-                def _num_match(data, start_1, end_1, start_2, end_2):
-                    s = 0
-                    for byte in data:
-                        bin_byte = _bin(byte)
-                        if bin_byte[start_1 : end_1 + 1] == bin_byte[start_2 : end_2 + 1]:
-                            s += 1
-                    return s
-
-                globals()[func_name] = mark_byte_array_func(
-                    # This binds the proper idx values to the function returned
-                    # TODO: make sure other functions that do this globals()[...] thing properly
-                    # bind values too (should be verifiable with unit tests)
-                    _get_func(start_bit_idx_1, end_bit_idx_1, start_bit_idx_2, end_bit_idx_2)
+                yield (
+                    start_bit_idx_1,
+                    start_bit_idx_1 + bit_len,
+                    start_bit_idx_2,
+                    start_bit_idx_2 + bit_len,
                 )
 
 
-_set_up_percent_bit_symmetries_funcs()
+def bit_symmetry_func_name(start_1: int, end_1: int, start_2: int, end_2: int) -> str:
+    return f"percent_of_bytes_bits_{start_1}_to_{end_1}_eq_{start_2}_to_{end_2}"
+
 
+def _percent_bit_symmetry_func(
+    start_1: int, end_1: int, start_2: int, end_2: int
+) -> ByteArrayCallableT:
+    table = tables.bit_range_equal(start_1, end_1, start_2, end_2)
+    return lambda data: _percent_matching(data, table)
 
-def _set_up_percent_bit_mask_match_funcs() -> None:
-    def _get_func(mask):
-        return lambda data: 100.0 * sum(1 for byte in data if byte & mask == mask) / len(data)
 
-    for mask in range(1, 256):
-        func_name = f"percent_of_bytes_matching_mask_{mask}"
-        globals()[func_name] = mark_byte_array_func(
-            # This binds the proper mask value to the function returned
-            _get_func(mask)
-        )
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_bytes_bits_eq",
+        name_fmt="percent_of_bytes_bits_{start_1}_to_{end_1}_eq_{start_2}_to_{end_2}",
+        factory=_percent_bit_symmetry_func,
+        params=lambda: (
+            dict(zip(("start_1", "end_1", "start_2", "end_2"), bit_range))
+            for bit_range in bit_symmetry_ranges()
+        ),
+    )
+)
 
 
-_set_up_percent_bit_mask_match_funcs()
+def _percent_bit_mask_match_func(mask: int) -> ByteArrayCallableT:
+    return lambda data: _percent_matching(data, tables.MASK_MATCH[mask - 1])
+
+
+BYTE_ARRAY_REGISTRY.add_family(
+    FeatureFamily(
+        name="percent_of_bytes_matching_mask",
+        name_fmt="percent_of_bytes_matching_mask_{mask}",
+        factory=_percent_bit_mask_match_func,
+        params=lambda: ({"mask": mask} for mask in range(1, 256)),
+    )
+)
 
 
 @mark_byte_array_func
@@ -888,31 +1036,26 @@ def average_abs_difference_between_byte_arrays(data1: bytes, data2: bytes) -> fl
 
 
 def get_byte_array_analysis_funcs() -> dict[str, ByteArrayCallableT]:
-    funcs = {}
-    for name, obj in globals().items():
-        if (
-            callable(obj)
-            and hasattr(obj, _MARK_BYTE_ARRAY_ATTR)
-            and getattr(obj, _MARK_BYTE_ARRAY_ATTR)
-        ):
-            funcs[name] = obj
-    return funcs
+    """Creates every feature function. Prefer looking up only the ones needed in
+    `BYTE_ARRAY_REGISTRY`.
+    """
+    return dict(BYTE_ARRAY_REGISTRY)
 
 
 def get_byte_arrays_analysis_funcs() -> dict[str, ByteArraysCallableT]:
-    funcs = {}
-    for name, obj in globals().items():
-        if (
-            callable(obj)
-            and hasattr(obj, _MARK_BYTE_ARRAYS_ATTR)
-            and getattr(obj, _MARK_BYTE_ARRAYS_ATTR)
-        ):
-            funcs[name] = obj
-    return funcs
-
-
-BYTE_ARRAY_ANAL_FUNCS = get_byte_array_analysis_funcs()
-BYTE_ARRAYS_ANAL_FUNCS = get_byte_arrays_analysis_funcs()
+    return dict(BYTE_ARRAYS_REGISTRY)
+
+
+# Name to function mappings. Functions of generated families are created when first looked up.
+BYTE_ARRAY_ANAL_FUNCS = BYTE_ARRAY_REGISTRY
+BYTE_ARRAYS_ANAL_FUNCS = BYTE_ARRAYS_REGISTRY
+
+
+def __getattr__(name: str):
+    # Generated features are still accessible as module attributes, e.g. `percent_of_bytes_gt_5`
+    if name in BYTE_ARRAY_REGISTRY:
+        return BYTE_ARRAY_REGISTRY[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""Bit-level features of a sample: bit n-gram frequencies and runs of equal bits.
+Bits are in the order of `binary.bytes_to_bin_str` (most significant bit of each byte first). Bit
+n-grams are counted with shifts over 16-bit words of adjacent bytes (one pass per bit offset)
+instead of building bit strings, and runs come from the positions where the unpacked bits change.
+Patterns inside single bytes (`percent_of_bytes_containing_bits_*`) only depend on the byte value,
+so they're a 256-entry table per n-gram length applied to the byte histogram.
+"""
+
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+
+# Longest n-grams counted over the bit stream
+BIT_NGRAM_MAX_LEN: int = 4
+# Longest n-grams looked for inside single bytes
+BYTE_NGRAM_MAX_LEN: int = 8
+# Runs at least this long share the last bin of the run length distribution
+BIT_RUN_LENGTH_BINS: int = 16
+
+BIT_RUN_NAMES: tuple[str, ...] = (
+    "longest_run_of_0_bits",
+    "longest_run_of_1_bits",
+    "average_bit_run_length",
+    "bit_runs_per_bit",
+)
+BIT_RUN_LENGTH_NAMES: tuple[str, ...] = tuple(
+    f"percent_bit_runs_of_length_{length}" for length in range(1, BIT_RUN_LENGTH_BINS)
+) + (f"percent_bit_runs_of_length_{BIT_RUN_LENGTH_BINS}_or_more",)
+
+
+def ngram_patterns(num_bits: int) -> tuple[str, ...]:
+    """Every `num_bits` bit pattern, in order of its value"""
+    return tuple(f"{patt:0{num_bits}b}" for patt in range(2**num_bits))
+
+
+def bit_ngram_names() -> tuple[str, ...]:
+    return tuple(
+        f"percent_bit_ngrams_{patt}"
+        for num_bits in range(1, BIT_NGRAM_MAX_LEN + 1)
+        for patt in ngram_patterns(num_bits)
+    )
+
+
+def bytes_containing_bits_names() -> tuple[str, ...]:
+    return tuple(
+        f"percent_of_bytes_containing_bits_{patt}"
+        for num_bits in range(1, BYTE_NGRAM_MAX_LEN + 1)
+        for patt in ngram_patterns(num_bits)
+    )
+
+
+@lru_cache(maxsize=None)
+def byte_ngram_table(num_bits: int) -> np.ndarray:
+    """[256, 2 ** num_bits] number of times each `num_bits` bit pattern occurs inside each byte
+    value
+    """
+    values = np.arange(256)
+    table = np.zeros((256, 2**num_bits), dtype=np.int64)
+    mask = (1 << num_bits) - 1
+    for offset in range(9 - num_bits):
+        np.add.at(table, (values, (values >> (8 - num_bits - offset)) & mask), 1)
+    return table
+
+
+@lru_cache(maxsize=None)
+def bytes_containing_bits_table() -> np.ndarray:
+    """[256, n_patterns] whether each byte value contains each pattern, in
+    `bytes_containing_bits_names` order
+    """
+    return np.concatenate(
+        [byte_ngram_table(num_bits) > 0 for num_bits in range(1, BYTE_NGRAM_MAX_LEN + 1)], axis=1
+    ).astype(np.int64)
+
+
+def bytes_containing_bits_counts(hist: np.ndarray) -> np.ndarray:
+    """Number of bytes containing each pattern, in `bytes_containing_bits_names` order, from a byte
+    histogram
+    """
+    return hist @ bytes_containing_bits_table()
+
+
+def bytes_containing_bits_count(hist: np.ndarray, patt: str) -> int:
+    """Number of bytes whose bits contain `patt` (a string of "0"s and "1"s)"""
+    return int(hist @ (byte_ngram_table(len(patt))[:, int(patt, 2)] > 0))
+
+
+def bit_ngram_counts(arr: np.ndarray, num_bits: int) -> np.ndarray:
+    """Number of times each `num_bits` (at most 8) bit pattern occurs in the bit stream of `arr`,
+    including across byte boundaries
+    """
+    counts = np.zeros(2**num_bits, dtype=np.int64)
+    # Each byte and the next one as a 16-bit word. Windows starting in the last byte that run past
+    # the end are dropped below, so the padding never counts.
+    words = (arr.astype(np.uint16) << 8) | np.append(arr[1:], np.uint8(0))
+    mask = (1 << num_bits) - 1
+    num_stream_bits = len(arr) * 8
+    for offset in range(8):
+        # Windows starting at bit `offset` of a byte that end inside the data
+        num_windows = min(len(arr), max(0, (num_stream_bits - offset - num_bits) // 8 + 1))
+        windows = (words[:num_windows] >> (16 - num_bits - offset)) & mask
+        counts += np.bincount(windows, minlength=2**num_bits)
+    return counts
+
+
+def all_bit_ngram_counts(arr: np.ndarray) -> np.ndarray:
+    """Counts of every bit n-gram in the bit stream of `arr`, in `bit_ngram_names` order"""
+    return np.concatenate(
+        [bit_ngram_counts(arr, num_bits) for num_bits in range(1, BIT_NGRAM_MAX_LEN + 1)]
+    )
+
+
+def bit_string(arr: np.ndarray) -> bytes:
+    """The bits of `arr` as ASCII "0"s and "1"s (`binary.bytes_to_bin_str(data).encode()`)"""
+    return (np.unpackbits(arr) + ord("0")).tobytes()
+
+
+class BitSample:
+    """Bit-level intermediates of one sample, each computed the first time it's needed"""
+
+    def __init__(self, arr: np.ndarray):
+        self.arr = arr
+        self.num_bits = len(arr) * 8
+
+    @cached_property
+    def bits(self) -> np.ndarray:
+        return np.unpackbits(self.arr)
+
+    @cached_property
+    def _runs(self) -> tuple[np.ndarray, np.ndarray]:
+        bits = self.bits
+        if not len(bits):
+            return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], bits[1:] != bits[:-1])))
+        lengths = np.diff(np.append(starts, len(bits)))
+        return bits[starts], lengths
+
+    @property
+    def run_bits(self) -> np.ndarray:
+        """Bit value of each run of equal bits"""
+        return self._runs[0]
+
+    @property
+    def run_lengths(self) -> np.ndarray:
+        """Length of each run of equal bits"""
+        return self._runs[1]
+
+    @property
+    def num_runs(self) -> int:
+        return len(self.run_lengths)
+
+    def longest_run(self, bit: int) -> int:
+        lengths = self.run_lengths[self.run_bits == bit]
+        return int(lengths.max()) if len(lengths) else 0
+
+    @cached_property
+    def run_length_counts(self) -> np.ndarray:
+        """Number of runs of each length 1 to `BIT_RUN_LENGTH_BINS` (the last bin also counts all
+        longer runs)
+        """
+        return run_length_counts(self.run_lengths)
+
+    @cached_property
+    def ngram_counts(self) -> np.ndarray:
+        """Counts of every bit n-gram, in `bit_ngram_names` order"""
+        return all_bit_ngram_counts(self.arr)
+
+
+def run_length_counts(lengths: np.ndarray) -> np.ndarray:
+    """Number of `lengths` of each length 1 to `BIT_RUN_LENGTH_BINS` (the last bin also counts all
+    longer runs)
+    """
+    lengths = np.minimum(lengths, BIT_RUN_LENGTH_BINS)
+    return np.bincount(lengths, minlength=BIT_RUN_LENGTH_BINS + 1)[1:]
+
+
+def bit_run_values_from_counts(
+    longest_0: int, longest_1: int, num_runs: int, num_bits: int
+) -> list:
+    """Values of `BIT_RUN_NAMES` from the longest runs and the numbers of runs and bits"""
+    return [longest_0, longest_1, num_bits / num_runs, num_runs / num_bits]
+
+
+def bit_run_length_values_from_counts(counts: np.ndarray, num_runs: int) -> list[float]:
+    """Values of `BIT_RUN_LENGTH_NAMES` from `run_length_counts`"""
+    return (100.0 * counts / num_runs).tolist()
+
+
+def bit_ngram_values_from_counts(counts: np.ndarray, num_bits: int) -> list[float]:
+    """Values of `bit_ngram_names()` from `all_bit_ngram_counts`: percent of the windows of each
+    length that are each pattern
+    """
+    num_windows = np.concatenate(
+        [
+            np.full(2**ngram_len, num_bits - ngram_len + 1)
+            for ngram_len in range(1, BIT_NGRAM_MAX_LEN + 1)
+        ]
+    )
+    return (100.0 * counts / num_windows).tolist()
+
+
+def bit_run_values(bits: BitSample) -> list:
+    """Values of `BIT_RUN_NAMES`"""
+    return bit_run_values_from_counts(
+        bits.longest_run(0), bits.longest_run(1), bits.num_runs, bits.num_bits
+    )
+
+
+def bit_run_length_values(bits: BitSample) -> list[float]:
+    """Values of `BIT_RUN_LENGTH_NAMES`"""
+    return bit_run_length_values_from_counts(bits.run_length_counts, bits.num_runs)
+
+
+def bit_ngram_values(bits: BitSample) -> list[float]:
+    """Values of `bit_ngram_names()`"""
+    return bit_ngram_values_from_counts(bits.ngram_counts, bits.num_bits)
@@ -0,0 +1,181 @@
+"""Block features of a sample from a [n_blocks, block_size] view of it.
+The sample is reshaped once per block size (see `binary.block_view`, which has the same blocks as
+`binary.blocks`) and every block statistic is an axis reduction over the view. Values match the
+pure Python functions in `mlc.anal.binary`: floats are summed left to right like their loops, and
+each block's variance is summed with Python's `sum` and rooted with `** 0.5` like
+`binary.variance` and `binary.standard_deviation` (`sum` of floats is compensated from Python 3.12
+on).
+"""
+
+from functools import cached_property
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from mlc.anal.binary import block_view, FeatureType
+from mlc.anal.ent import ent_block_stats, EntBlockResults
+
+
+# Cipher block sizes
+BLOCK_SIZES: tuple[int, ...] = (8, 16, 32, 64)
+
+# Averaged over `length // block_size`, so defined as soon as there's one block's worth of data
+BLOCK_RANGE_NAMES: tuple[str, ...] = (
+    "average_block_max",
+    "average_block_min",
+    "average_block_max_minus_min",
+)
+# Averaged over the number of blocks
+BLOCK_AVERAGE_NAMES: tuple[str, ...] = (
+    "average_xor_per_block_8bit",
+    "average_block_average",
+    "average_block_variance",
+    "average_block_standard_deviation",
+)
+BLOCK_ENT_AVERAGE_NAMES: tuple[str, ...] = (
+    "ent_entropy_block_average",
+    "ent_chi_square_block_average",
+    "ent_monte_carlo_pi_block_average",
+    # Name as defined in `mlc.anal.binary`
+    "ent_serial_correlation_bkock_average",
+)
+_ENT_FIELDS: tuple[str, ...] = ("entropy", "chi_square", "monte_carlo_pi", "serial_correlation")
+
+
+def block_position_names(block_size: int) -> tuple[str, ...]:
+    return tuple(
+        f"percent_of_blocks_idx_{pos}_eq_{num}" for pos in range(block_size) for num in range(256)
+    )
+
+
+def block_feature_names(block_size: int) -> tuple[str, ...]:
+    """Names of every block feature for blocks of `block_size` bytes"""
+    return (
+        BLOCK_RANGE_NAMES
+        + BLOCK_AVERAGE_NAMES
+        + BLOCK_ENT_AVERAGE_NAMES
+        + block_position_names(block_size)
+    )
+
+
+def sequential_sum(values: np.ndarray, start: float = 0.0) -> float:
+    """`start` plus `values` added one at a time, left to right (same rounding as a Python loop)"""
+    if not len(values):
+        return start
+    return float(np.add.accumulate(np.concatenate(([start], values)))[-1])
+
+
+class BlockSample:
+    """Per block values of a [n_blocks, block_size] uint8 matrix. Element `i` of each array is
+    block `i`'s value. Each is computed the first time it's needed.
+    """
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.num_blocks, self.block_size = matrix.shape
+
+    @classmethod
+    def from_data(cls, data: bytes, block_size: int) -> "BlockSample":
+        return cls(block_view(data, block_size))
+
+    @cached_property
+    def maxes(self) -> np.ndarray:
+        return self.matrix.max(axis=1).astype(np.int64)
+
+    @cached_property
+    def mins(self) -> np.ndarray:
+        return self.matrix.min(axis=1).astype(np.int64)
+
+    @cached_property
+    def xors(self) -> np.ndarray:
+        return np.bitwise_xor.reduce(self.matrix, axis=1).astype(np.int64)
+
+    @cached_property
+    def averages(self) -> np.ndarray:
+        return self.matrix.sum(axis=1, dtype=np.int64) / self.block_size
+
+    @cached_property
+    def variances(self) -> np.ndarray:
+        # Each block's squared differences summed with `sum`, like `binary.variance`
+        squares = (self.matrix - self.averages[:, None]) ** 2
+        return np.array([sum(row) / self.block_size for row in squares.tolist()])
+
+    @cached_property
+    def standard_deviations(self) -> np.ndarray:
+        # `** 0.5` like `binary.standard_deviation`
+        return np.array([variance**0.5 for variance in self.variances.tolist()])
+
+    @cached_property
+    def position_counts(self) -> np.ndarray:
+        """[block_size, 256] number of blocks with each byte value at each position"""
+        offsets = np.arange(self.block_size, dtype=np.int64) * 256
+        return np.bincount(
+            (self.matrix + offsets).ravel(), minlength=self.block_size * 256
+        ).reshape(self.block_size, 256)
+
+    @cached_property
+    def ent(self) -> EntBlockResults:
+        return ent_block_stats(self.matrix)
+
+
+def block_range_values(blocks: BlockSample, length: int) -> list[float]:
+    """Values of `BLOCK_RANGE_NAMES` for a sample of `length` bytes"""
+    max_sum = int(blocks.maxes.sum())
+    min_sum = int(blocks.mins.sum())
+    num_whole_blocks = length // blocks.block_size
+    return [
+        max_sum / num_whole_blocks,
+        min_sum / num_whole_blocks,
+        (max_sum - min_sum) / num_whole_blocks,
+    ]
+
+
+def block_average_values(blocks: BlockSample) -> list[float]:
+    """Values of `BLOCK_AVERAGE_NAMES`"""
+    num_blocks = blocks.num_blocks
+    return [
+        int(blocks.xors.sum()) / num_blocks,
+        sequential_sum(blocks.averages) / num_blocks,
+        sequential_sum(blocks.variances) / num_blocks,
+        sequential_sum(blocks.standard_deviations) / num_blocks,
+    ]
+
+
+def block_ent_average_values(blocks: BlockSample) -> list[float]:
+    """Values of `BLOCK_ENT_AVERAGE_NAMES`"""
+    # Same as `binary._ent_block_average`
+    return [sum(getattr(blocks.ent, field).tolist()) / blocks.num_blocks for field in _ENT_FIELDS]
+
+
+def block_position_values(blocks: BlockSample, length: int) -> list[float]:
+    """Values of `block_position_names(block_size)` for a sample of `length` bytes"""
+    return (100.0 * blocks.position_counts.ravel() / (length / blocks.block_size)).tolist()
+
+
+def calculate_block_features(
+    data: bytes,
+    block_sizes: Sequence[int] = BLOCK_SIZES,
+    names: Optional[Iterable[str]] = None,
+) -> dict[int, dict[str, FeatureType]]:
+    """Block features of `data` for each block size, as {block size: {name: value}}.
+    Only the features in `names` are calculated if given. Like the pure Python functions, raises
+    `ZeroDivisionError` if a feature isn't defined because `data` is too short.
+    """
+    wanted = None if names is None else set(names)
+    features = {}
+    for block_size in block_sizes:
+        blocks = BlockSample.from_data(data, block_size)
+        groups = [
+            (BLOCK_RANGE_NAMES, lambda: block_range_values(blocks, len(data))),
+            (BLOCK_AVERAGE_NAMES, lambda: block_average_values(blocks)),
+            (BLOCK_ENT_AVERAGE_NAMES, lambda: block_ent_average_values(blocks)),
+            (block_position_names(block_size), lambda: block_position_values(blocks, len(data))),
+        ]
+        features[block_size] = {}
+        for group_names, compute in groups:
+            if wanted is not None and wanted.isdisjoint(group_names):
+                continue
+            for name, value in zip(group_names, compute()):
+                if wanted is None or name in wanted:
+                    features[block_size][name] = value
+    return features
@@ -0,0 +1,208 @@
+"""Persistent cache of feature values in a local SQLite database.
+Values are keyed by the digest of the sample's content and the feature's name, and stored with the
+version of the code that computed them: the package version, a digest of the source of the modules
+features are computed with (`SOURCE_MODULES`: the vectorized families and their helpers) and a
+digest of the feature's own code (see `FeatureRegistry.code_version`). Entries from other versions
+are misses and get replaced, so a rerun over the same corpus only computes features that are
+missing or out of date.
+The number of entries is bounded: the least recently used ones are evicted first. Hits only update
+their last use in memory; those updates are written in batches, with the next values stored.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import math
+from pathlib import Path
+import sqlite3
+from typing import Iterable, Mapping, Sequence, Union
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS, FeatureType
+from mlc.anal.registry import FeatureRegistry, source_digest
+from mlc.utils.version import CURRENT_VERSION
+
+
+# A few thousand samples' worth of every feature
+DEFAULT_MAX_ENTRIES: int = 10_000_000
+# Digest size (in bytes) of sample contents
+DIGEST_SIZE: int = 20
+# Modules whose code computes feature values, besides the features' own functions
+SOURCE_MODULES: tuple[str, ...] = (
+    "mlc.anal.binary",
+    "mlc.anal.bits",
+    "mlc.anal.blockwise",
+    "mlc.anal.ent",
+    "mlc.anal.tables",
+    "mlc.anal.vectorized",
+    "mlc.compression",
+)
+# Hits whose last use is kept in memory before it's written
+MAX_PENDING_USES: int = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    digest BLOB NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (digest, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS features_last_used ON features (last_used);
+"""
+# SQLite variable limit is at least 999 in every build
+_MAX_VARIABLES: int = 900
+
+
+def content_digest(data: bytes) -> bytes:
+    """Digest identifying a sample by its content"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class FeatureCache:
+    """Feature values keyed by (content digest, feature name, feature code version).
+    `hits` and `misses` count feature lookups since the cache was opened.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        registry: FeatureRegistry = BYTE_ARRAY_ANAL_FUNCS,
+        version: str = CURRENT_VERSION,
+        source_modules: Sequence[str] = SOURCE_MODULES,
+    ):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.registry = registry
+        self.version = version
+        self.source_version = source_digest(source_modules)
+        self.hits = 0
+        self.misses = 0
+        self._versions: dict[str, str] = {}
+        # Last use of hits that isn't written yet: (digest, name) -> clock
+        self._pending_uses: dict[tuple[bytes, str], int] = {}
+        self._conn = sqlite3.connect(self.path, timeout=60)
+        # Readers don't block the writer (other processes can share the cache)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        (last_used,) = self._conn.execute("SELECT MAX(last_used) FROM features").fetchone()
+        # Logical clock for LRU order
+        self._clock = last_used or 0
+        # Upper bound on the number of entries (replaced entries are counted again), so the table
+        # is only counted when it might be full
+        self._max_possible_entries = len(self)
+
+    def __enter__(self) -> "FeatureCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pending_uses:
+            with self._conn:
+                self._write_uses()
+        self._conn.close()
+
+    def feature_version(self, name: str) -> str:
+        """Version stored with (and required of) `name`'s cached values"""
+        version = self._versions.get(name)
+        if version is None:
+            version = f"{self.version}:{self.source_version}:{self.registry.code_version(name)}"
+            self._versions[name] = version
+        return version
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _write_uses(self) -> None:
+        """Writes the pending last uses of hits (in the caller's transaction)"""
+        if self._pending_uses:
+            self._conn.executemany(
+                "UPDATE features SET last_used = ? WHERE digest = ? AND name = ?",
+                [(clock, *key) for key, clock in self._pending_uses.items()],
+            )
+            self._pending_uses.clear()
+
+    def get_many(self, digest: bytes, names: Iterable[str]) -> dict[str, FeatureType]:
+        """Cached values of the `names` features of the sample with `digest`. Features that aren't
+        cached, or were cached by another version of their code, are left out.
+        """
+        names = list(names)
+        found = {}
+        for start in range(0, len(names), _MAX_VARIABLES):
+            batch = names[start : start + _MAX_VARIABLES]
+            rows = self._conn.execute(
+                "SELECT name, version, value FROM features WHERE digest = ? AND name IN "
+                f"({', '.join('?' * len(batch))})",
+                (digest, *batch),
+            )
+            for name, version, value in rows:
+                if version == self.feature_version(name):
+                    # SQLite stores NaN as NULL
+                    found[name] = math.nan if value is None else value
+        for name in found:
+            self._pending_uses[(digest, name)] = self._tick()
+        if len(self._pending_uses) >= MAX_PENDING_USES:
+            with self._conn:
+                self._write_uses()
+        self.hits += len(found)
+        self.misses += len(names) - len(found)
+        return found
+
+    def put_many(self, digest: bytes, features: Mapping[str, FeatureType]) -> None:
+        """Stores the `features` values of the sample with `digest`, evicting the least recently
+        used entries if the cache is full
+        """
+        with self._conn:
+            # Before eviction, which needs them
+            self._write_uses()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO features (digest, name, version, value, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (digest, name, self.feature_version(name), value, self._tick())
+                    for name, value in features.items()
+                ],
+            )
+            self._max_possible_entries += len(features)
+            if self._max_possible_entries > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM features WHERE (digest, name) IN "
+                "(SELECT digest, name FROM features ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._max_possible_entries = len(self)
+
+    def __len__(self) -> int:
+        (entries,) = self._conn.execute("SELECT COUNT(*) FROM features").fetchone()
+        return entries
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, entries=len(self))
+
+    def clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM features")
+        self._pending_uses.clear()
+        self._max_possible_entries = 0
@@ -0,0 +1,206 @@
+"""Export of computed features as a partitioned Parquet dataset.
+Rows are written in batches through `pyarrow.dataset`, so files are split into row groups and into
+hive style directories per partition column value (e.g. `label=AES/`). Each partition buffers a
+row group before writing it, so row groups are sized in bytes (`DEFAULT_ROW_GROUP_BYTES`): with
+thousands of feature columns a fixed number of rows would buffer gigabytes.
+Loaders (pandas, Dask, LightGBM, XGBoost) can then read only the columns and partitions they need.
+Features are float32 columns (like `calculate_features_batch`). Labels are dictionary encoded.
+Each feature field's metadata has its registry family and parameters, and the schema metadata maps
+each family to its features, so a family's columns can be selected without knowing their names.
+`pyarrow` is imported on first use.
+"""
+
+import json
+import os
+from typing import Iterable, Iterator, Optional, Sequence, TYPE_CHECKING, Union
+import uuid
+
+import numpy as np
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS
+from mlc.anal.features import calculate_features_batch
+from mlc.utils.version import CURRENT_VERSION
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+LABEL_COLUMN: str = "label"
+SAMPLE_ID_COLUMN: str = "sample_id"
+# Target (uncompressed) size of a Parquet row group
+DEFAULT_ROW_GROUP_BYTES: int = 64 * 1024 * 1024
+# Size in bytes of a feature value, which most columns are
+_COLUMN_BYTES: int = 4
+# Rows per file in each partition
+DEFAULT_MAX_ROWS_PER_FILE: int = 1024 * 1024
+# Rows calculated at a time
+DEFAULT_EXPORT_BATCH_SIZE: int = 4096
+
+# Field and schema metadata keys
+FAMILY_KEY: bytes = b"mlc.family"
+PARAMS_KEY: bytes = b"mlc.params"
+FAMILIES_KEY: bytes = b"mlc.families"
+VERSION_KEY: bytes = b"mlc.version"
+
+
+def feature_schema(names: Sequence[str], with_labels: bool = True) -> "pa.Schema":
+    """Schema of exported rows: the sample ID, the (dictionary encoded) label if `with_labels`, then
+    a float32 field per feature carrying its family metadata
+    """
+    import pyarrow as pa
+
+    fields = [pa.field(SAMPLE_ID_COLUMN, pa.int64())]
+    if with_labels:
+        fields.append(pa.field(LABEL_COLUMN, pa.dictionary(pa.int32(), pa.string())))
+    families: dict[str, list[str]] = {}
+    for name in names:
+        info = BYTE_ARRAY_ANAL_FUNCS.info(name)
+        families.setdefault(info.family, []).append(name)
+        metadata = {FAMILY_KEY: info.family, PARAMS_KEY: json.dumps(info.params, default=str)}
+        fields.append(pa.field(name, pa.float32(), metadata=metadata))
+    return pa.schema(
+        fields, metadata={FAMILIES_KEY: json.dumps(families), VERSION_KEY: CURRENT_VERSION}
+    )
+
+
+def default_row_group_size(num_columns: int, row_group_bytes: int = DEFAULT_ROW_GROUP_BYTES) -> int:
+    """Rows per row group so that a row group of `num_columns` columns is about `row_group_bytes`"""
+    return max(1, row_group_bytes // (num_columns * _COLUMN_BYTES))
+
+
+def feature_families(schema: "pa.Schema") -> dict[str, list[str]]:
+    """Family name to the names of its feature columns, from an exported dataset's schema"""
+    return json.loads(schema.metadata[FAMILIES_KEY])
+
+
+def feature_record_batch(
+    schema: "pa.Schema",
+    matrix: np.ndarray,
+    sample_ids: Sequence[int],
+    labels: Optional[Sequence[str]] = None,
+) -> "pa.RecordBatch":
+    """Record batch of `schema` from a [n_rows, n_features] matrix in the schema's feature order"""
+    import pyarrow as pa
+
+    columns = [pa.array(np.asarray(sample_ids, dtype=np.int64))]
+    if labels is not None:
+        columns.append(pa.array(labels, type=pa.string()).dictionary_encode())
+    matrix = np.asarray(matrix, dtype=np.float32)
+    columns += [pa.array(matrix[:, col]) for col in range(matrix.shape[1])]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write_feature_batches(
+    batches: Iterable["pa.RecordBatch"],
+    schema: "pa.Schema",
+    path: Union[str, os.PathLike],
+    partition_by: Sequence[str] = (LABEL_COLUMN,),
+    row_group_size: Optional[int] = None,
+    max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+) -> None:
+    """Writes record batches of `schema` to a Parquet dataset in directory `path`, adding files next
+    to any already there. Row groups have `row_group_size` rows (`default_row_group_size` of the
+    schema if not given).
+    """
+    import pyarrow.dataset as ds
+
+    row_group_size = row_group_size or default_row_group_size(len(schema))
+
+    ds.write_dataset(
+        batches,
+        path,
+        schema=schema,
+        format="parquet",
+        partitioning=list(partition_by) or None,
+        partitioning_flavor="hive",
+        # Unique file names, so exporting more rows to the same dataset doesn't replace files
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        min_rows_per_group=row_group_size,
+        max_rows_per_group=row_group_size,
+        max_rows_per_file=max(max_rows_per_file, row_group_size),
+    )
+
+
+def export_features(
+    samples: Iterable[bytes],
+    path: Union[str, os.PathLike],
+    labels: Optional[Iterable[str]] = None,
+    sample_ids: Optional[Iterable[int]] = None,
+    names: Optional[Sequence[str]] = None,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    partition_by: Optional[Sequence[str]] = None,
+    row_group_size: Optional[int] = None,
+    max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+) -> list[str]:
+    """Calculates the features of every sample (selected like `calculate_all_binary_features`) and
+    writes them, with each sample's label, to a Parquet dataset in directory `path`.
+    Samples are calculated `batch_size` at a time. `sample_ids` default to row numbers.
+    `partition_by` defaults to the label (when labels are given).
+    Returns the feature names.
+    """
+    names = BYTE_ARRAY_ANAL_FUNCS.select(include=include, exclude=exclude, names=names)
+    schema = feature_schema(names, with_labels=labels is not None)
+    if partition_by is None:
+        partition_by = () if labels is None else (LABEL_COLUMN,)
+
+    def batches() -> Iterator["pa.RecordBatch"]:
+        label_iter = None if labels is None else iter(labels)
+        id_iter = None if sample_ids is None else iter(sample_ids)
+        num_rows = 0
+        batch: list[bytes] = []
+        for data in samples:
+            batch.append(data)
+            if len(batch) == batch_size:
+                yield make_batch(batch, num_rows, label_iter, id_iter)
+                num_rows += len(batch)
+                batch = []
+        if batch:
+            yield make_batch(batch, num_rows, label_iter, id_iter)
+
+    def make_batch(batch, num_rows, label_iter, id_iter) -> "pa.RecordBatch":
+        matrix, _ = calculate_features_batch(batch, names)
+        if id_iter is None:
+            ids = range(num_rows, num_rows + len(batch))
+        else:
+            ids = [next(id_iter) for _ in batch]
+        batch_labels = None if label_iter is None else [next(label_iter) for _ in batch]
+        return feature_record_batch(schema, matrix, ids, batch_labels)
+
+    write_feature_batches(batches(), schema, path, partition_by, row_group_size, max_rows_per_file)
+    return names
+
+
+def read_exported_features(
+    path: Union[str, os.PathLike],
+    names: Optional[Sequence[str]] = None,
+    families: Optional[Sequence[str]] = None,
+    labels: Optional[Sequence[str]] = None,
+) -> "pa.Table":
+    """Reads an exported dataset: the sample IDs, labels (if exported) and the `names` features plus
+    every feature of `families` (all features if neither is given). Only the partitions of `labels`
+    (all if not given) are read.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        path, format="parquet", partitioning=ds.HivePartitioning.discover(infer_dictionary=True)
+    )
+    # Metadata of the written schema (the discovered one has the partition fields at the end)
+    file_schema = ds.dataset(dataset.files[0], format="parquet").schema if dataset.files else None
+    has_labels = LABEL_COLUMN in dataset.schema.names
+    if names is None and families is None:
+        columns = None
+    else:
+        columns = [SAMPLE_ID_COLUMN] + ([LABEL_COLUMN] if has_labels else []) + list(names or [])
+        if families and file_schema is not None:
+            family_names = feature_families(file_schema)
+            columns += [name for family in families for name in family_names.get(family, [])]
+    row_filter = None
+    if labels is not None:
+        row_filter = ds.field(LABEL_COLUMN).isin(list(labels))
+    return dataset.to_table(
+        columns=None if columns is None else list(dict.fromkeys(columns)), filter=row_filter
+    )
@@ -1,19 +1,233 @@
+import json
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple, TYPE_CHECKING, Union
+
+import numpy as np
+
 from mlc.anal.binary import (
     BYTE_ARRAY_ANAL_FUNCS,
     BYTE_ARRAYS_ANAL_FUNCS,
     FeatureType,
 )
+from mlc.anal.matrix_file import FeatureMatrixWriter
+from mlc.anal.vectorized import (
+    ByteSample,
+    calculate_vectorized_features,
+    calculate_vectorized_pair_features,
+    PAIR_FEATURE_NAMES,
+    pair_feature_matrix,
+    vectorized_columns,
+)
+from mlc.compression import CompressionType
+
+if TYPE_CHECKING:
+    # Imported by callers that use a cache, so plain feature calculation doesn't import sqlite3
+    from mlc.anal.cache import FeatureCache
 
 
-def calculate_all_binary_features(data: bytes) -> dict[str, FeatureType]:
+# Rows calculated and appended to a feature matrix file at a time
+DEFAULT_FILE_BATCH_SIZE: int = 1024
+
+
+def _calculate_features(data: bytes, selected: list[str]) -> dict[str, FeatureType]:
+    # Vectorized implementations give identical values, so only fall back to the pure Python
+    # functions for features that don't have one
+    vectorized = calculate_vectorized_features(data, selected)
     features = {}
-    for func_name, func in BYTE_ARRAY_ANAL_FUNCS.items():
-        features[func_name] = func(data)
+    for func_name in selected:
+        if func_name in vectorized:
+            features[func_name] = vectorized[func_name]
+        else:
+            features[func_name] = BYTE_ARRAY_ANAL_FUNCS[func_name](data)
     return features
 
 
+def _cached_features(
+    cache: "FeatureCache",
+    data: bytes,
+    names: list[str],
+    compute: Callable[[bytes, list[str]], dict[str, FeatureType]],
+) -> dict[str, FeatureType]:
+    """Values of the `names` features of `data`, in `names` order. Only the ones missing from
+    `cache` (or out of date) are computed, by `compute(data, missing_names)`, and then stored.
+    """
+    from mlc.anal.cache import content_digest
+
+    digest = content_digest(data)
+    found = cache.get_many(digest, names)
+    missing = [name for name in names if name not in found]
+    if missing:
+        computed = compute(data, missing)
+        cache.put_many(digest, computed)
+        found.update(computed)
+    return {name: found[name] for name in names}
+
+
+def calculate_all_binary_features(
+    data: bytes,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    names: Optional[Iterable[str]] = None,
+    cache: Optional["FeatureCache"] = None,
+) -> dict[str, FeatureType]:
+    """Calculates every feature, or only the ones selected by `include`, `exclude` and `names`
+    (see `FeatureRegistry.select`). Only the selected features are computed.
+    If `cache` is given, cached values are reused and only missing features are computed.
+    """
+    selected = BYTE_ARRAY_ANAL_FUNCS.select(include=include, exclude=exclude, names=names)
+    if cache is None:
+        return _calculate_features(data, selected)
+    return _cached_features(cache, data, selected, _calculate_features)
+
+
 def calculate_all_binary_pair_features(data1: bytes, data2: bytes) -> dict[str, FeatureType]:
+    vectorized = calculate_vectorized_pair_features(data1, data2)
     features = {}
-    for func_name, func in BYTE_ARRAYS_ANAL_FUNCS.items():
-        features[func_name] = func(data1, data2)
+    for func_name in BYTE_ARRAYS_ANAL_FUNCS:
+        if func_name in vectorized:
+            features[func_name] = vectorized[func_name]
+        else:
+            features[func_name] = BYTE_ARRAYS_ANAL_FUNCS[func_name](data1, data2)
     return features
+
+
+def _output_matrix(
+    num_rows: int, num_cols: int, dtype: np.dtype, out: Optional[np.ndarray]
+) -> np.ndarray:
+    """A new [num_rows, num_cols] matrix, or `out` if it has that shape and `dtype`"""
+    if out is None:
+        return np.empty((num_rows, num_cols), dtype=dtype)
+    if out.shape != (num_rows, num_cols):
+        raise ValueError(f"Expected a [{num_rows}, {num_cols}] out matrix, got {out.shape}")
+    if out.dtype != dtype:
+        raise ValueError(f"Expected an out matrix of {np.dtype(dtype)}, got {out.dtype}")
+    return out
+
+
+def calculate_pair_features_batch(
+    pairs: Sequence[Tuple[bytes, bytes]],
+    names: Optional[Sequence[str]] = None,
+    dtype: np.dtype = np.float32,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, list[str]]:
+    """Calculates pair features for every (data1, data2) pair into a [n_pairs, n_features] matrix,
+    like `calculate_features_batch` (an `out` matrix must be of that shape and `dtype`). Vectorized
+    pair features are computed for all pairs at once.
+    Returns the matrix and the column names.
+    """
+    names = BYTE_ARRAYS_ANAL_FUNCS.select(names=names)
+    matrix = _output_matrix(len(pairs), len(names), dtype, out)
+    vectorized_cols = [col for col, name in enumerate(names) if name in PAIR_FEATURE_NAMES]
+    if vectorized_cols:
+        value_idxs = [PAIR_FEATURE_NAMES.index(names[col]) for col in vectorized_cols]
+        matrix[:, vectorized_cols] = pair_feature_matrix(pairs)[:, value_idxs]
+    for col, name in enumerate(names):
+        if name not in PAIR_FEATURE_NAMES:
+            func = BYTE_ARRAYS_ANAL_FUNCS[name]
+            for row, (data1, data2) in enumerate(pairs):
+                matrix[row, col] = func(data1, data2)
+    return matrix, names
+
+
+def feature_names(
+    include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None
+) -> list[str]:
+    """Names of all single sample features (or those selected by `include` and `exclude`
+    patterns), in the order used for feature matrix columns
+    """
+    return BYTE_ARRAY_ANAL_FUNCS.select(include=include, exclude=exclude)
+
+
+def load_feature_list(path: Union[str, Path]) -> list[str]:
+    """Reads a saved feature selection: either a JSON list of names, or one name per line (blank
+    lines and lines starting with "#" are skipped)
+    """
+    text = Path(path).read_text()
+    if text.lstrip().startswith("["):
+        return list(json.loads(text))
+    lines = (line.strip() for line in text.splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def calculate_features_batch(
+    samples: Sequence[bytes],
+    names: Optional[Sequence[str]] = None,
+    dtype: np.dtype = np.float32,
+    out: Optional[np.ndarray] = None,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    cache: Optional["FeatureCache"] = None,
+) -> Tuple[np.ndarray, list[str]]:
+    """Calculates features for every sample into a preallocated [n_samples, n_features] matrix.
+    Columns are in the order of `names` (all features, in `feature_names()` order, if not given),
+    filtered by the `include` and `exclude` patterns.
+    If `out` is given, it's filled in instead of allocating a new matrix; it must be of that shape
+    and `dtype`.
+    If `cache` is given, cached values are reused and only missing features are computed.
+    Returns the matrix and the column names.
+    """
+    names = BYTE_ARRAY_ANAL_FUNCS.select(include=include, exclude=exclude, names=names)
+    matrix = _output_matrix(len(samples), len(names), dtype, out)
+    if cache is not None:
+        for row, data in zip(matrix, samples):
+            if not data:
+                raise ZeroDivisionError("Cannot calculate features of empty data")
+            row[:] = list(_cached_features(cache, data, names, _calculate_features).values())
+        return matrix, names
+
+    columns = vectorized_columns(names)
+    vectorized_cols = {int(col) for _, _, cols in columns for col in cols}
+    fallback_funcs = [
+        (col, BYTE_ARRAY_ANAL_FUNCS[name])
+        for col, name in enumerate(names)
+        if col not in vectorized_cols
+    ]
+
+    for row, data in zip(matrix, samples):
+        if not data:
+            raise ZeroDivisionError("Cannot calculate features of empty data")
+        sample = ByteSample(data)
+        sample.prefetch(family for family, _, _ in columns)
+        for family, value_idxs, cols in columns:
+            row[cols] = np.asarray(family.values(sample), dtype=np.float64)[value_idxs]
+        for col, func in fallback_funcs:
+            row[col] = func(data)
+    return matrix, names
+
+
+def calculate_features_to_file(
+    samples: Iterable[bytes],
+    path: Union[str, Path],
+    sample_ids: Optional[Iterable[int]] = None,
+    names: Optional[Sequence[str]] = None,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+    compression: Optional[CompressionType] = CompressionType.ZLIB,
+) -> list[str]:
+    """Calculates features for every sample and appends them to a feature matrix file (see
+    `mlc.anal.matrix_file`), `batch_size` rows per block, so only one batch is in memory at a time.
+    An existing file is appended to and must have the same columns. `sample_ids` default to row
+    numbers. `compression` is the per column compression (None for uncompressed).
+    Returns the column names.
+    """
+    names = BYTE_ARRAY_ANAL_FUNCS.select(include=include, exclude=exclude, names=names)
+    ids = None if sample_ids is None else iter(sample_ids)
+    with FeatureMatrixWriter(path, names, compression) as writer:
+        batch = []
+        for data in samples:
+            batch.append(data)
+            if len(batch) == batch_size:
+                _append_batch(writer, batch, names, ids)
+                batch = []
+        if batch:
+            _append_batch(writer, batch, names, ids)
+    return names
+
+
+def _append_batch(
+    writer: FeatureMatrixWriter, batch: list[bytes], names: list[str], ids: Optional[Iterator[int]]
+) -> None:
+    matrix, _ = calculate_features_batch(batch, names)
+    batch_ids = None if ids is None else [next(ids) for _ in batch]
+    writer.append(matrix, batch_ids)
@@ -0,0 +1,307 @@
+"""Column-oriented float32 feature matrix files.
+A file is a header followed by any number of blocks of rows, so more rows can be appended without
+rewriting it. The header holds the feature names (the column index). Each block holds its sample
+IDs and every column of its rows as a separate payload, compressed on its own (after splitting the
+float32 values into byte planes, which compress much better than interleaved floats). Readers only
+touch the blocks and columns they're asked for, and uncompressed payloads are read straight from a
+memory map without copying.
+
+Layout (little endian):
+    MAGIC, u32 header length, JSON header {"version", "dtype", "names"}
+    per block: BLOCK_MAGIC, u64 block header length, JSON block header
+        {"num_rows", "compression", "ids_size", "column_sizes"},
+        int64 sample IDs, then each column's payload in name order
+JSON headers are padded with spaces so payloads start 8 byte aligned.
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from mlc.compression import compress, CompressionType, decompress
+
+
+MAGIC: bytes = b"MLCFMAT1"
+BLOCK_MAGIC: bytes = b"MLCBLOCK"
+FORMAT_VERSION: int = 1
+DTYPE: np.dtype = np.dtype("<f4")
+_ID_DTYPE: np.dtype = np.dtype("<i8")
+_HEADER_LEN = struct.Struct("<I")
+_BLOCK_HEADER_LEN = struct.Struct("<Q")
+_ALIGNMENT: int = 8
+
+
+def _padded_json(obj: dict, prefix_len: int) -> bytes:
+    """`obj` as JSON padded with spaces so `prefix_len` bytes plus it end on an aligned offset"""
+    encoded = json.dumps(obj, separators=(",", ":")).encode()
+    return encoded + b" " * (-(prefix_len + len(encoded)) % _ALIGNMENT)
+
+
+def _encode_column(
+    values: np.ndarray, compression: Optional[CompressionType], kwargs: Dict
+) -> bytes:
+    if compression is None:
+        return values.tobytes()
+    # Byte planes: all the first bytes of the floats, then all the second bytes, etc.
+    planes = values.view(np.uint8).reshape(-1, DTYPE.itemsize).T.tobytes()
+    return compress(planes, compression, dict(kwargs))
+
+
+def _decode_column(
+    payload: memoryview, num_rows: int, compression: Optional[CompressionType]
+) -> np.ndarray:
+    if compression is None:
+        return np.frombuffer(payload, dtype=DTYPE, count=num_rows)
+    planes = np.frombuffer(decompress(bytes(payload), compression), dtype=np.uint8)
+    return planes.reshape(DTYPE.itemsize, num_rows).T.copy().view(DTYPE).ravel()
+
+
+class _Block:
+    """Location of one block's payloads in the file"""
+
+    def __init__(self, header: dict, payload_offset: int, row_offset: int):
+        self.num_rows: int = header["num_rows"]
+        self.compression = (
+            None if header["compression"] is None else CompressionType[header["compression"]]
+        )
+        self.row_offset = row_offset
+        self.ids_offset = payload_offset
+        self.ids_size: int = header["ids_size"]
+        column_offsets = np.cumsum([payload_offset + self.ids_size] + header["column_sizes"])
+        self.column_offsets: list[int] = column_offsets.tolist()
+        self.end: int = self.column_offsets[-1]
+
+
+def _read_header(handle) -> Tuple[dict, int]:
+    """File header and the offset of the first block"""
+    magic = handle.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not a feature matrix file")
+    (header_len,) = _HEADER_LEN.unpack(handle.read(_HEADER_LEN.size))
+    header = json.loads(handle.read(header_len))
+    if header["version"] > FORMAT_VERSION:
+        raise ValueError(f"Unsupported feature matrix file version {header['version']}")
+    return header, len(MAGIC) + _HEADER_LEN.size + header_len
+
+
+def _read_blocks(buf, offset: int) -> list[_Block]:
+    """Every block from `offset` to the end of `buf`"""
+    blocks = []
+    row_offset = 0
+    while offset < len(buf):
+        header_start = offset + len(BLOCK_MAGIC) + _BLOCK_HEADER_LEN.size
+        if bytes(buf[offset : offset + len(BLOCK_MAGIC)]) != BLOCK_MAGIC or header_start > len(buf):
+            raise ValueError(f"Corrupt feature matrix block at offset {offset}")
+        (header_len,) = _BLOCK_HEADER_LEN.unpack_from(buf, offset + len(BLOCK_MAGIC))
+        header = json.loads(bytes(buf[header_start : header_start + header_len]))
+        block = _Block(header, header_start + header_len, row_offset)
+        if block.end > len(buf):
+            raise ValueError(f"Truncated feature matrix block at offset {offset}")
+        blocks.append(block)
+        row_offset += block.num_rows
+        offset = block.end
+    return blocks
+
+
+class FeatureMatrixWriter:
+    """Appends blocks of rows to a feature matrix file. A new file is created with `names` as its
+    columns; an existing one is appended to, and `names` (if given) must match its columns.
+    `compression` (None for uncompressed) and `compression_kwargs` are passed to
+    `mlc.compression.compress` for every column payload.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        names: Optional[Sequence[str]] = None,
+        compression: Optional[CompressionType] = CompressionType.ZLIB,
+        compression_kwargs: Optional[Dict] = None,
+    ):
+        self.path = path
+        self.compression = compression
+        self.compression_kwargs = compression_kwargs or {}
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as handle:
+                header, _ = _read_header(handle)
+            if names is not None and list(names) != header["names"]:
+                raise ValueError("Feature names don't match the existing file's")
+            self.names: list[str] = header["names"]
+            with FeatureMatrixFile(path) as existing:
+                self.num_rows = existing.num_rows
+            self._handle = open(path, "ab")
+        else:
+            if names is None:
+                raise ValueError("Feature names are needed to create a feature matrix file")
+            self.names = list(names)
+            self.num_rows = 0
+            self._handle = open(path, "wb")
+            prefix_len = len(MAGIC) + _HEADER_LEN.size
+            header = _padded_json(
+                {"version": FORMAT_VERSION, "dtype": DTYPE.str, "names": self.names}, prefix_len
+            )
+            self._handle.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+
+    def append(self, matrix: np.ndarray, sample_ids: Optional[Iterable[int]] = None) -> None:
+        """Appends the rows of a [n_rows, n_features] matrix (cast to float32) as one block.
+        `sample_ids` default to the row numbers in the file.
+        """
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.names):
+            raise ValueError(f"Expected a [n_rows, {len(self.names)}] matrix, got {matrix.shape}")
+        num_rows = matrix.shape[0]
+        if sample_ids is None:
+            ids = np.arange(self.num_rows, self.num_rows + num_rows, dtype=_ID_DTYPE)
+        else:
+            ids = np.asarray(list(sample_ids), dtype=_ID_DTYPE)
+        if len(ids) != num_rows:
+            raise ValueError(f"Got {len(ids)} sample IDs for {num_rows} rows")
+
+        columns = np.asarray(matrix, dtype=DTYPE).T
+        payloads = [
+            _encode_column(np.ascontiguousarray(column), self.compression, self.compression_kwargs)
+            for column in columns
+        ]
+        prefix_len = self._handle.tell() + len(BLOCK_MAGIC) + _BLOCK_HEADER_LEN.size
+        header = _padded_json(
+            {
+                "num_rows": num_rows,
+                "compression": None if self.compression is None else self.compression.name,
+                "ids_size": ids.nbytes,
+                "column_sizes": [len(payload) for payload in payloads],
+            },
+            prefix_len,
+        )
+        self._handle.write(BLOCK_MAGIC + _BLOCK_HEADER_LEN.pack(len(header)) + header)
+        self._handle.write(ids.tobytes())
+        for payload in payloads:
+            self._handle.write(payload)
+        self._handle.flush()
+        self.num_rows += num_rows
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "FeatureMatrixWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class FeatureMatrixFile:
+    """Memory mapped reader of a feature matrix file. Only the blocks and columns that are read
+    are touched (and decompressed).
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, "rb") as handle:
+            header, blocks_offset = _read_header(handle)
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        self.names: list[str] = header["names"]
+        self._name_idxs = {name: idx for idx, name in enumerate(self.names)}
+        self._blocks = _read_blocks(self._buf, blocks_offset)
+        self.num_rows: int = sum(block.num_rows for block in self._blocks)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.num_rows, len(self.names)
+
+    @property
+    def sample_ids(self) -> np.ndarray:
+        """Sample ID of every row"""
+        return np.concatenate(
+            [
+                np.frombuffer(
+                    self._buf[block.ids_offset : block.ids_offset + block.ids_size],
+                    dtype=_ID_DTYPE,
+                )
+                for block in self._blocks
+            ]
+            or [np.zeros(0, dtype=_ID_DTYPE)]
+        )
+
+    def _column(self, block: _Block, col: int) -> np.ndarray:
+        payload = self._buf[block.column_offsets[col] : block.column_offsets[col + 1]]
+        return _decode_column(payload, block.num_rows, block.compression)
+
+    def column(self, name: str) -> np.ndarray:
+        """Every value of one feature"""
+        return self.read([name])[:, 0]
+
+    def read(
+        self,
+        names: Optional[Sequence[str]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> np.ndarray:
+        """[stop - start, n_names] float32 matrix of rows `start` to `stop` (all rows if not given)
+        of the `names` columns (all columns if not given)
+        """
+        names = self.names if names is None else list(names)
+        unknown = [name for name in names if name not in self._name_idxs]
+        if unknown:
+            raise ValueError(f"Unknown feature names: {unknown}")
+        cols = [self._name_idxs[name] for name in names]
+        start, stop, _ = slice(start, stop).indices(self.num_rows)
+        matrix = np.empty((max(0, stop - start), len(cols)), dtype=DTYPE)
+        for block in self._blocks:
+            block_start = max(start, block.row_offset) - block.row_offset
+            block_stop = min(stop, block.row_offset + block.num_rows) - block.row_offset
+            if block_start >= block_stop:
+                continue
+            rows = slice(
+                block.row_offset + block_start - start, block.row_offset + block_stop - start
+            )
+            for out_col, col in enumerate(cols):
+                matrix[rows, out_col] = self._column(block, col)[block_start:block_stop]
+        return matrix
+
+    def close(self) -> None:
+        self._buf.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "FeatureMatrixFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_feature_matrix(
+    path: Union[str, os.PathLike],
+    matrix: np.ndarray,
+    names: Sequence[str],
+    sample_ids: Optional[Iterable[int]] = None,
+    compression: Optional[CompressionType] = CompressionType.ZLIB,
+    compression_kwargs: Optional[Dict] = None,
+) -> None:
+    """Writes a new feature matrix file (replacing any existing one) with one block"""
+    if os.path.exists(path):
+        os.remove(path)
+    with FeatureMatrixWriter(path, names, compression, compression_kwargs) as writer:
+        writer.append(matrix, sample_ids)
+
+
+def load_feature_matrix(
+    path: Union[str, os.PathLike],
+    names: Optional[Sequence[str]] = None,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Tuple[np.ndarray, list[str], np.ndarray]:
+    """Training input from a feature matrix file: the [n_rows, n_names] matrix of rows `start` to
+    `stop` of the `names` columns (everything if not given), the column names and the rows' sample
+    IDs
+    """
+    with FeatureMatrixFile(path) as matrix_file:
+        names = matrix_file.names if names is None else list(names)
+        start, stop, _ = slice(start, stop).indices(matrix_file.num_rows)
+        return (
+            matrix_file.read(names, start, stop),
+            names,
+            matrix_file.sample_ids[start:stop],
+        )
@@ -0,0 +1,130 @@
+"""Parallel feature calculation across processes.
+Samples are packed into one shared memory segment and workers write their rows straight into a
+shared output matrix, so neither the samples nor the results are pickled. Work is split into
+contiguous chunks of roughly equal total size (in bytes), which also keeps rows in input order.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS
+from mlc.anal.features import calculate_features_batch
+
+
+# More chunks than workers evens out the load when per-sample cost varies
+DEFAULT_CHUNKS_PER_WORKER: int = 4
+
+
+def size_balanced_chunks(sizes: Sequence[int], num_chunks: int) -> list[Tuple[int, int]]:
+    """Splits indices [0, len(sizes)) into at most `num_chunks` contiguous (start, stop) ranges with
+    roughly equal total size
+    """
+    total = sum(sizes)
+    num_chunks = max(1, min(num_chunks, len(sizes)))
+    target = total / num_chunks
+    chunks = []
+    start = 0
+    running = 0
+    for idx, size in enumerate(sizes):
+        running += size
+        # Close a chunk once it reaches its share of the total
+        if running >= target * (len(chunks) + 1) and idx + 1 < len(sizes):
+            chunks.append((start, idx + 1))
+            start = idx + 1
+    if start < len(sizes):
+        chunks.append((start, len(sizes)))
+    return chunks
+
+
+def _calculate_chunk(
+    in_shm_name: str,
+    chunk_offsets: np.ndarray,
+    out_shm_name: str,
+    out_shape: Tuple[int, int],
+    dtype: np.dtype,
+    start: int,
+    stop: int,
+    names: list[str],
+) -> None:
+    in_shm = SharedMemory(name=in_shm_name)
+    out_shm = SharedMemory(name=out_shm_name)
+    try:
+        # `chunk_offsets` are the offsets of samples `start` to `stop` (inclusive)
+        samples = [
+            bytes(in_shm.buf[begin:end]) for begin, end in zip(chunk_offsets, chunk_offsets[1:])
+        ]
+        out = np.ndarray(out_shape, dtype=dtype, buffer=out_shm.buf)
+        calculate_features_batch(samples, names, dtype=dtype, out=out[start:stop])
+        del out
+    finally:
+        in_shm.close()
+        out_shm.close()
+
+
+def calculate_features_parallel(
+    samples: Sequence[bytes],
+    names: Optional[Sequence[str]] = None,
+    dtype: np.dtype = np.float32,
+    workers: Optional[int] = None,
+    start_method: Optional[str] = None,
+    chunks_per_worker: int = DEFAULT_CHUNKS_PER_WORKER,
+) -> Tuple[np.ndarray, list[str]]:
+    """Same as `calculate_features_batch`, but spread across `workers` processes (all CPUs if not
+    given). `start_method` is a `multiprocessing` start method ("fork", "spawn", "forkserver"); the
+    platform default is used if not given.
+    """
+    # Unknown names fail here, before any shared memory or worker is set up
+    names = BYTE_ARRAY_ANAL_FUNCS.select(names=names)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(samples) <= 1:
+        return calculate_features_batch(samples, names, dtype=dtype)
+
+    dtype = np.dtype(dtype)
+    sizes = [len(data) for data in samples]
+    offsets = np.zeros(len(samples) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    out_shape = (len(samples), len(names))
+
+    # Size 0 segments aren't allowed
+    in_shm = SharedMemory(create=True, size=max(1, int(offsets[-1])))
+    out_shm = SharedMemory(create=True, size=max(1, out_shape[0] * out_shape[1] * dtype.itemsize))
+    try:
+        for data, offset in zip(samples, offsets):
+            in_shm.buf[offset : offset + len(data)] = data
+
+        chunks = size_balanced_chunks(sizes, workers * chunks_per_worker)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context(start_method),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _calculate_chunk,
+                    in_shm.name,
+                    # Only this chunk's offsets, not every sample's
+                    offsets[start : stop + 1],
+                    out_shm.name,
+                    out_shape,
+                    dtype,
+                    start,
+                    stop,
+                    names,
+                )
+                for start, stop in chunks
+            ]
+            for future in futures:
+                # Re-raises any exception from the worker
+                future.result()
+
+        matrix = np.ndarray(out_shape, dtype=dtype, buffer=out_shm.buf).copy()
+    finally:
+        in_shm.close()
+        in_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
+    return matrix, names
@@ -0,0 +1,186 @@
+"""Declarative registry of analysis features.
+Generated features are described as a family (a name format, a factory and the parameters to call
+the factory with) instead of being created up front. Names are enumerated from the parameters when
+first needed and each callable is only created the first time it's looked up, so selecting a few
+hundred features out of thousands only creates those few hundred.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+import hashlib
+import importlib.util
+from types import CodeType
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+ParamsT = dict[str, Any]
+
+
+def _hash_code(hasher, code: CodeType) -> None:
+    hasher.update(code.co_code)
+    for const in code.co_consts:
+        # Nested functions, lambdas and comprehensions have their own code objects
+        if isinstance(const, CodeType):
+            _hash_code(hasher, const)
+        else:
+            hasher.update(repr(const).encode())
+    hasher.update(repr(code.co_names).encode())
+
+
+def code_digest(func: Callable, params: Optional[ParamsT] = None) -> str:
+    """Digest of `func`'s bytecode, constants and referenced names (and `params`, if `func` is a
+    factory). Changes when the function's implementation does, but not when only functions it
+    calls change.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    _hash_code(hasher, func.__code__)
+    if params is not None:
+        hasher.update(repr(sorted(params.items())).encode())
+    return hasher.hexdigest()
+
+
+def source_digest(modules: Iterable[str]) -> str:
+    """Digest of the source files of `modules` (importable names, e.g. "mlc.anal.tables"), which
+    aren't imported. Covers what `code_digest` doesn't: the helpers and vectorized implementations
+    that features are actually computed with.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for module in modules:
+        spec = importlib.util.find_spec(module)
+        if spec is None or spec.origin is None:
+            raise ValueError(f"No source for module '{module}'")
+        hasher.update(module.encode())
+        with open(spec.origin, "rb") as handle:
+            hasher.update(handle.read())
+    return hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class FeatureFamily:
+    """Features created by calling `factory(**params)` for each of `params()`.
+    Each feature's name is `name_fmt.format(**params)`.
+    """
+
+    name: str
+    name_fmt: str
+    factory: Callable[..., Callable]
+    params: Callable[[], Iterable[ParamsT]]
+
+    def members(self) -> Iterator[tuple[str, ParamsT]]:
+        """(feature name, params) of each feature in the family"""
+        for params in self.params():
+            yield self.name_fmt.format(**params), params
+
+
+@dataclass(frozen=True)
+class FeatureInfo:
+    """Where a registered feature comes from"""
+
+    family: str
+    params: ParamsT
+
+
+class FeatureRegistry(Mapping):
+    """Feature name to callable mapping, in registration order. Plain functions and whole feature
+    families can be registered. Callables from families are created lazily and cached.
+    `mark_attr` is set on every callable handed out so they can still be identified the same way
+    as the plain functions.
+    """
+
+    def __init__(self, mark_attr: Optional[str] = None):
+        self._mark_attr = mark_attr
+        self._entries: list[Union[FeatureFamily, tuple[str, Callable]]] = []
+        self._funcs: dict[str, Callable] = {}
+        # Name to (family or None, params), built when first needed
+        self._index: Optional[dict[str, tuple[Optional[FeatureFamily], ParamsT]]] = None
+
+    def add_func(self, name: str, func: Callable) -> Callable:
+        """Registers a single feature"""
+        self._entries.append((name, func))
+        self._funcs[name] = func
+        self._index = None
+        return func
+
+    def add_family(self, family: FeatureFamily) -> FeatureFamily:
+        """Registers every feature in `family` without creating any of them"""
+        self._entries.append(family)
+        self._index = None
+        return family
+
+    def _get_index(self) -> dict[str, tuple[Optional[FeatureFamily], ParamsT]]:
+        if self._index is None:
+            index = {}
+            for entry in self._entries:
+                if isinstance(entry, FeatureFamily):
+                    for name, params in entry.members():
+                        index[name] = (entry, params)
+                else:
+                    index[entry[0]] = (None, {})
+            self._index = index
+        return self._index
+
+    def __getitem__(self, name: str) -> Callable:
+        func = self._funcs.get(name)
+        if func is None:
+            family, params = self._get_index()[name]
+            func = family.factory(**params)
+            if self._mark_attr:
+                setattr(func, self._mark_attr, True)
+            self._funcs[name] = func
+        return func
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._get_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_index())
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def info(self, name: str) -> FeatureInfo:
+        """Family and parameters of feature `name`. Plain functions are their own family."""
+        family, params = self._get_index()[name]
+        return FeatureInfo(family=name if family is None else family.name, params=params)
+
+    def code_version(self, name: str) -> str:
+        """Digest of the code behind feature `name`: the function, or the family's factory and
+        the parameters it's called with
+        """
+        family, params = self._get_index()[name]
+        if family is None:
+            return code_digest(self._funcs[name])
+        return code_digest(family.factory, params)
+
+    def families(self) -> list[str]:
+        """Names of every registered family (including plain functions), in registration order"""
+        return [
+            entry.name if isinstance(entry, FeatureFamily) else entry[0] for entry in self._entries
+        ]
+
+    def select(
+        self,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> list[str]:
+        """Names of the features to compute.
+        `names` is an explicit list (e.g. a saved feature selection) and keeps its order. Otherwise
+        every feature is a candidate, in registration order. `include` and `exclude` are
+        `fnmatch`-style patterns: if `include` is given, only names matching one of them are kept,
+        then names matching any of `exclude` are dropped.
+        """
+        if names is not None:
+            selected = list(names)
+            unknown = [name for name in selected if name not in self]
+            if unknown:
+                raise ValueError(f"Unknown feature names: {unknown}")
+        else:
+            selected = list(self)
+        if include is not None:
+            include = list(include)
+            selected = [name for name in selected if any(fnmatchcase(name, p) for p in include)]
+        if exclude is not None:
+            exclude = list(exclude)
+            selected = [name for name in selected if not any(fnmatchcase(name, p) for p in exclude)]
+        return selected
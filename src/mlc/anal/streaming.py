@@ -0,0 +1,550 @@
+"""Feature calculation for samples given in chunks (e.g. files too large to load into memory).
+Chunks are folded into running accumulators (byte histogram, adjacent byte comparison counts,
+per block statistics, XOR folds, mean and variance with Welford's method, `ent` statistics) and
+features are computed from those at the end, so memory stays bounded by the chunk size.
+
+Features are identical to the in-memory ones, except the variance and standard deviation (Welford's
+method rounds differently than summing squared differences), block variances (see
+`mlc.anal.blockwise`) and, from Python 3.12 on, block averages of `ent` statistics (`sum` of floats
+is compensated there), which can differ in the last few bits.
+Features that need the whole sample at once (compression ratios and Kolmogorov complexity estimates)
+aren't supported by `StreamingFeatures`. `FeatureAccumulator` can also keep the data, up to a given
+size, to compute those when a snapshot asks for them.
+"""
+
+from functools import lru_cache
+import mmap
+import os
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from mlc.anal import binary
+from mlc.anal.binary import (
+    BYTE_ARRAY_ANAL_FUNCS,
+    FeatureType,
+    HISTOGRAM_FEATURE_NAMES,
+    histogram_feature_values,
+)
+from mlc.anal.bits import (
+    all_bit_ngram_counts,
+    bit_ngram_names,
+    bit_ngram_values_from_counts,
+    BIT_RUN_LENGTH_NAMES,
+    bit_run_length_values_from_counts,
+    BIT_RUN_NAMES,
+    bit_run_values_from_counts,
+    BitSample,
+    run_length_counts,
+)
+from mlc.anal.blockwise import (
+    BLOCK_AVERAGE_NAMES,
+    BLOCK_ENT_AVERAGE_NAMES,
+    block_position_names,
+    BLOCK_RANGE_NAMES,
+    BlockSample,
+    sequential_sum,
+)
+from mlc.anal.ent import EntAccumulator
+from mlc.anal.features import calculate_all_binary_features
+from mlc.anal.vectorized import (
+    as_uint8,
+    byte_average_values,
+    INT_AVERAGE_WIDTHS,
+    int_average_names,
+    int_averages_from_plane_sums,
+    int_plane_sums,
+    per_byte_tables,
+    VECTORIZED_FEATURE_FAMILIES,
+)
+
+
+DEFAULT_CHUNK_SIZE: int = 1 << 20
+
+_ADJACENT_NAMES: tuple[str, ...] = (
+    "percent_bytes_lt_next_byte",
+    "percent_bytes_le_next_byte",
+    "percent_bytes_gt_next_byte",
+    "percent_bytes_ge_next_byte",
+    "percent_bytes_eq_next_byte",
+    "average_abs_difference_between_bytes",
+)
+_ENT_FIELDS: tuple[str, ...] = ("entropy", "chi_square", "monte_carlo_pi", "serial_correlation")
+
+
+def per_byte_feature_names() -> tuple[str, ...]:
+    return per_byte_tables()[0]
+
+
+class _BlockAccumulator:
+    """Sums of per block values of the same blocks `binary.blocks` yields. The last block is only
+    counted once data after it is seen, since `blocks` skips a final block that ends exactly at the
+    end.
+    """
+
+    def __init__(self, block_size_bytes: int):
+        self.block_size_bytes = block_size_bytes
+        self.num_blocks = 0
+        self.max_sum = 0
+        self.min_sum = 0
+        self.xor_sum = 0
+        self.average_sum = 0.0
+        self.variance_sum = 0.0
+        self.standard_deviation_sum = 0.0
+        self.ent_sums = dict.fromkeys(_ENT_FIELDS, 0.0)
+        self.position_counts = np.zeros((block_size_bytes, 256), dtype=np.int64)
+        self._pending = np.empty(0, dtype=np.uint8)
+
+    def update(self, chunk: np.ndarray) -> None:
+        data = np.concatenate([self._pending, chunk]) if len(self._pending) else chunk
+        num_blocks = max(0, (len(data) - 1) // self.block_size_bytes)
+        self._pending = data[num_blocks * self.block_size_bytes :].copy()
+        if not num_blocks:
+            return
+
+        blocks = BlockSample(
+            data[: num_blocks * self.block_size_bytes].reshape(num_blocks, self.block_size_bytes)
+        )
+        self.num_blocks += num_blocks
+        self.max_sum += int(blocks.maxes.sum())
+        self.min_sum += int(blocks.mins.sum())
+        self.xor_sum += int(blocks.xors.sum())
+        # Continues summing left to right, so these match the in-memory values exactly
+        self.average_sum = sequential_sum(blocks.averages, self.average_sum)
+        self.variance_sum = sequential_sum(blocks.variances, self.variance_sum)
+        self.standard_deviation_sum = sequential_sum(
+            blocks.standard_deviations, self.standard_deviation_sum
+        )
+        self.position_counts += blocks.position_counts
+        for field in _ENT_FIELDS:
+            self.ent_sums[field] = sum(getattr(blocks.ent, field).tolist(), self.ent_sums[field])
+
+
+class _IntAccumulator:
+    """Byte plane sums of the `width` byte ints `int_average_values` reads"""
+
+    def __init__(self, width: int):
+        self.width = width
+        self.num_ints = 0
+        self.plane_sums = [0] * width
+        self.num_negative_le = 0
+        self.num_negative_be = 0
+        self._pending = np.empty(0, dtype=np.uint8)
+
+    def update(self, chunk: np.ndarray) -> None:
+        data = np.concatenate([self._pending, chunk]) if len(self._pending) else chunk
+        num_ints = len(data) // self.width
+        self._pending = data[num_ints * self.width :].copy()
+        plane_sums, num_negative_le, num_negative_be = int_plane_sums(
+            data[: num_ints * self.width].reshape(num_ints, self.width)
+        )
+        self.num_ints += num_ints
+        self.plane_sums = [
+            total + plane_sum for total, plane_sum in zip(self.plane_sums, plane_sums)
+        ]
+        self.num_negative_le += num_negative_le
+        self.num_negative_be += num_negative_be
+
+    def values(self) -> list[float]:
+        return int_averages_from_plane_sums(
+            self.plane_sums, self.num_negative_le, self.num_negative_be, self.num_ints
+        )
+
+
+class _BitAccumulator:
+    """Bit n-gram counts and runs of equal bits. The run at the end of the data seen so far is
+    left open, since the next chunk can continue it.
+    """
+
+    def __init__(self):
+        self.num_bits = 0
+        self.ngram_counts = np.zeros(len(bit_ngram_names()), dtype=np.int64)
+        self.num_runs = 0
+        self.run_length_counts = np.zeros(len(BIT_RUN_LENGTH_NAMES), dtype=np.int64)
+        self.longest_runs = [0, 0]
+        self._last = None
+        self._open_bit = None
+        self._open_length = 0
+
+    def update(self, chunk: np.ndarray) -> None:
+        if self._last is None:
+            self.ngram_counts += all_bit_ngram_counts(chunk)
+        else:
+            # N-grams across the boundary, without the ones inside the previous last byte (already
+            # counted)
+            last = np.array([self._last], dtype=np.uint8)
+            self.ngram_counts += all_bit_ngram_counts(np.concatenate([last, chunk]))
+            self.ngram_counts -= all_bit_ngram_counts(last)
+        self._last = int(chunk[-1])
+        self.num_bits += len(chunk) * 8
+
+        bits = BitSample(chunk)
+        run_bits = bits.run_bits
+        lengths = bits.run_lengths.copy()
+        if self._open_bit is not None:
+            if run_bits[0] == self._open_bit:
+                lengths[0] += self._open_length
+            else:
+                self._close_runs(np.array([self._open_bit]), np.array([self._open_length]))
+        self._close_runs(run_bits[:-1], lengths[:-1])
+        self._open_bit = int(run_bits[-1])
+        self._open_length = int(lengths[-1])
+
+    def _close_runs(self, run_bits: np.ndarray, lengths: np.ndarray) -> None:
+        self.num_runs += len(lengths)
+        self.run_length_counts += run_length_counts(lengths)
+        for bit in (0, 1):
+            bit_lengths = lengths[run_bits == bit]
+            if len(bit_lengths):
+                self.longest_runs[bit] = max(self.longest_runs[bit], int(bit_lengths.max()))
+
+    def _runs_with_open(self) -> tuple[int, np.ndarray, list[int]]:
+        """Number of runs, run length counts and longest runs, with the open run closed"""
+        if self._open_bit is None:
+            return self.num_runs, self.run_length_counts, self.longest_runs
+        counts = self.run_length_counts + run_length_counts(np.array([self._open_length]))
+        longest_runs = list(self.longest_runs)
+        longest_runs[self._open_bit] = max(longest_runs[self._open_bit], self._open_length)
+        return self.num_runs + 1, counts, longest_runs
+
+    def run_values(self) -> list:
+        num_runs, _, longest_runs = self._runs_with_open()
+        return bit_run_values_from_counts(*longest_runs, num_runs, self.num_bits)
+
+    def run_length_values(self) -> list[float]:
+        num_runs, counts, _ = self._runs_with_open()
+        return bit_run_length_values_from_counts(counts, num_runs)
+
+    def ngram_values(self) -> list[float]:
+        return bit_ngram_values_from_counts(self.ngram_counts, self.num_bits)
+
+
+class StreamingFeatures:
+    """Running accumulators for one sample given in chunks with `update`. `features` can be called
+    at any point and gives the features of all the chunks seen so far.
+    """
+
+    def __init__(self, block_size_bytes: Optional[int] = None):
+        self.block_size_bytes = block_size_bytes or binary.DEFAULT_BLOCK_SIZE_BYTES
+        self.length = 0
+        self._hist = np.zeros(256, dtype=np.int64)
+        # lt, le, gt, ge, eq counts of each byte compared to the next one
+        self._adjacent_counts = np.zeros(5, dtype=np.int64)
+        self._abs_diff_sum = 0
+        self._last = None
+        self._xor_8bit = 0
+        self._xor_16bit_le = 0
+        self._xor_16bit_be = 0
+        # Odd byte at the end of the data seen so far, waiting for its 16 bit word's second byte
+        self._xor_16bit_pending = None
+        # Welford's method
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._blocks = _BlockAccumulator(self.block_size_bytes)
+        self._ent = EntAccumulator()
+        self._ints = [_IntAccumulator(width) for width in INT_AVERAGE_WIDTHS]
+        self._bits = _BitAccumulator()
+
+    def update(self, chunk: Union[bytes, bytearray, memoryview]) -> None:
+        arr = as_uint8(chunk)
+        if not len(arr):
+            return
+        self._hist += np.bincount(arr, minlength=256)
+        self._update_adjacent(arr)
+        self._update_xor(arr)
+        self._update_variance(arr)
+        self._blocks.update(arr)
+        self._ent.update(arr)
+        for ints in self._ints:
+            ints.update(arr)
+        self._bits.update(arr)
+        self.length += len(arr)
+
+    def _update_adjacent(self, arr: np.ndarray) -> None:
+        if self._last is not None:
+            first = int(arr[0])
+            self._adjacent_counts += [
+                self._last < first,
+                self._last <= first,
+                self._last > first,
+                self._last >= first,
+                self._last == first,
+            ]
+            self._abs_diff_sum += abs(self._last - first)
+        cur = arr[:-1]
+        nxt = arr[1:]
+        self._adjacent_counts += [
+            np.count_nonzero(cur < nxt),
+            np.count_nonzero(cur <= nxt),
+            np.count_nonzero(cur > nxt),
+            np.count_nonzero(cur >= nxt),
+            np.count_nonzero(cur == nxt),
+        ]
+        self._abs_diff_sum += int(np.abs(cur.astype(np.int16) - nxt).sum(dtype=np.int64))
+        self._last = int(arr[-1])
+
+    def _update_xor(self, arr: np.ndarray) -> None:
+        self._xor_8bit ^= int(np.bitwise_xor.reduce(arr))
+        if self._xor_16bit_pending is not None:
+            self._xor_16bit_le ^= self._xor_16bit_pending | (int(arr[0]) << 8)
+            self._xor_16bit_be ^= (self._xor_16bit_pending << 8) | int(arr[0])
+            self._xor_16bit_pending = None
+            arr = arr[1:]
+        num_words = len(arr) // 2
+        words = arr[: num_words * 2]
+        self._xor_16bit_le ^= int(np.bitwise_xor.reduce(words.view("<u2")))
+        self._xor_16bit_be ^= int(np.bitwise_xor.reduce(words.view(">u2")))
+        if len(arr) > num_words * 2:
+            self._xor_16bit_pending = int(arr[-1])
+
+    def _update_variance(self, arr: np.ndarray) -> None:
+        # Chunk mean and sum of squared differences, combined with the running ones (the parallel
+        # form of Welford's method)
+        chunk_mean = float(arr.mean())
+        chunk_m2 = float(((arr - chunk_mean) ** 2).sum())
+        total = self.length + len(arr)
+        delta = chunk_mean - self._mean
+        self._mean += delta * len(arr) / total
+        self._m2 += chunk_m2 + delta**2 * self.length * len(arr) / total
+
+    def _groups(self) -> list[tuple[tuple[str, ...], Callable[[], list[FeatureType]]]]:
+        """(names, function returning their values) of each group of features computed together"""
+        per_byte_names, per_byte_table, per_byte_scales = per_byte_tables()
+        block_size = self.block_size_bytes
+        blocks = self._blocks
+        return [
+            (HISTOGRAM_FEATURE_NAMES, lambda: histogram_feature_values(self._hist, self.length)),
+            (
+                VECTORIZED_FEATURE_FAMILIES["average_byte"].names,
+                lambda: byte_average_values(self._hist, self.length),
+            ),
+            (
+                per_byte_names,
+                lambda: (per_byte_scales * (per_byte_table @ self._hist) / self.length).tolist(),
+            ),
+            (_ADJACENT_NAMES, self._adjacent_values),
+            (
+                ("xor_all_bytes_8bit", "xor_all_bytes_16bit_le", "xor_all_bytes_16bit_be"),
+                self._xor_values,
+            ),
+            (("variance", "standard_deviation"), self._variance_values),
+            (
+                BLOCK_RANGE_NAMES,
+                lambda: [
+                    blocks.max_sum / (self.length // block_size),
+                    blocks.min_sum / (self.length // block_size),
+                    (blocks.max_sum - blocks.min_sum) / (self.length // block_size),
+                ],
+            ),
+            (
+                BLOCK_AVERAGE_NAMES,
+                lambda: [
+                    blocks.xor_sum / blocks.num_blocks,
+                    blocks.average_sum / blocks.num_blocks,
+                    blocks.variance_sum / blocks.num_blocks,
+                    blocks.standard_deviation_sum / blocks.num_blocks,
+                ],
+            ),
+            (
+                block_position_names(block_size),
+                lambda: (
+                    100.0 * blocks.position_counts.ravel() / (self.length / block_size)
+                ).tolist(),
+            ),
+            (
+                (
+                    "ent_entropy",
+                    "ent_chi_square",
+                    "ent_chi_square_normalized",
+                    "ent_monte_carlo_pi",
+                    "ent_serial_correlation",
+                ),
+                self._ent_values,
+            ),
+            (
+                BLOCK_ENT_AVERAGE_NAMES,
+                lambda: [blocks.ent_sums[field] / blocks.num_blocks for field in _ENT_FIELDS],
+            ),
+            *((int_average_names(ints.width), ints.values) for ints in self._ints),
+            (bit_ngram_names(), self._bits.ngram_values),
+            (BIT_RUN_NAMES, self._bits.run_values),
+            (BIT_RUN_LENGTH_NAMES, self._bits.run_length_values),
+        ]
+
+    def _adjacent_values(self) -> list[FeatureType]:
+        if self.length < 2:
+            return [0.0] * 5 + [0]
+        percents = (100.0 * self._adjacent_counts / (self.length - 1)).tolist()
+        return percents + [self._abs_diff_sum / (self.length - 1)]
+
+    def _xor_values(self) -> list[int]:
+        xor_16bit_le = self._xor_16bit_le
+        xor_16bit_be = self._xor_16bit_be
+        if self._xor_16bit_pending is not None:
+            # A trailing single byte is a word on its own
+            xor_16bit_le ^= self._xor_16bit_pending
+            xor_16bit_be ^= self._xor_16bit_pending
+        return [self._xor_8bit, xor_16bit_le, xor_16bit_be]
+
+    def _variance_values(self) -> list[float]:
+        variance = self._m2 / self.length
+        return [variance, variance**0.5]
+
+    def _ent_values(self) -> list[float]:
+        results = self._ent.result()
+        return [
+            results.entropy,
+            results.chi_square,
+            results.chi_square / self.length,
+            results.monte_carlo_pi,
+            results.serial_correlation,
+        ]
+
+    def feature_names(self) -> list[str]:
+        """Names of every feature that can be calculated from the accumulators"""
+        return [name for names, _ in self._groups() for name in names]
+
+    def features(self, names: Optional[Iterable[str]] = None) -> dict[str, FeatureType]:
+        """Features of all the data seen so far. Calculates the features in `names` (every
+        supported feature if not given); raises a `ValueError` for names that aren't supported.
+        """
+        if not self.length:
+            # Matches the in-memory functions
+            raise ZeroDivisionError("Cannot calculate features of empty data")
+        groups = self._groups()
+        wanted = None
+        if names is not None:
+            wanted = set(names)
+            supported = {name for group_names, _ in groups for name in group_names}
+            unsupported = sorted(wanted - supported)
+            if unsupported:
+                raise ValueError(f"Features not supported for streaming: {unsupported}")
+
+        features = {}
+        for group_names, compute in groups:
+            if wanted is not None and wanted.isdisjoint(group_names):
+                continue
+            for name, value in zip(group_names, compute()):
+                if wanted is None or name in wanted:
+                    features[name] = value
+        return features
+
+
+@lru_cache(maxsize=None)
+def non_decomposable_feature_names() -> tuple[str, ...]:
+    """Registered features that can't be updated from running accumulators (e.g. compression
+    ratios), in registration order. `FeatureAccumulator` computes them from the whole data.
+    """
+    supported = set(StreamingFeatures().feature_names())
+    return tuple(name for name in BYTE_ARRAY_ANAL_FUNCS if name not in supported)
+
+
+class FeatureAccumulator(StreamingFeatures):
+    """Features of a sample that keeps growing (appended to with `update`). Decomposable features
+    are updated in O(len(chunk)) per `update` and computed from the running accumulators (histogram,
+    Welford's mean and variance, etc.) only, so the data isn't kept for them.
+    Non-decomposable ones (`non_decomposable_feature_names`, e.g. compression ratios) need the whole
+    data, which is only kept while the sample is at most `max_data_bytes` long (not at all by
+    default). Keeping it costs up to `max_data_bytes` of memory, and the first snapshot asking for
+    them after an `update` copies the data and recomputes them over all of it; later snapshots
+    reuse their values until the next `update`. Once the sample is longer, the data is dropped and
+    only decomposable features are available.
+    """
+
+    def __init__(self, max_data_bytes: int = 0):
+        # Registered block features use the default block size
+        super().__init__()
+        if max_data_bytes < 0:
+            raise ValueError("The data size limit can't be negative")
+        self.max_data_bytes = max_data_bytes
+        self._data: Optional[bytearray] = bytearray() if max_data_bytes else None
+        self._non_decomposable = {}
+
+    @property
+    def keeps_data(self) -> bool:
+        """Whether the data is kept, so snapshots can give non-decomposable features"""
+        return self._data is not None
+
+    def update(self, chunk: Union[bytes, bytearray, memoryview]) -> None:
+        super().update(chunk)
+        if self._data is None or not len(chunk):
+            return
+        self._non_decomposable.clear()
+        if self.length > self.max_data_bytes:
+            self._data = None
+        else:
+            self._data += chunk
+
+    def snapshot(self, names: Optional[Iterable[str]] = None) -> dict[str, FeatureType]:
+        """Features of all the data seen so far, like `features.calculate_all_binary_features` of
+        it: every available registered feature (or the ones in `names`), in the same order. Raises
+        a `ValueError` for non-decomposable features in `names` once the data isn't kept.
+        """
+        non_decomposable = set(non_decomposable_feature_names())
+        if names is None and self._data is None:
+            names = [name for name in BYTE_ARRAY_ANAL_FUNCS if name not in non_decomposable]
+        selected = BYTE_ARRAY_ANAL_FUNCS.select(names=names)
+        features = self.features([name for name in selected if name not in non_decomposable])
+        missing = [
+            name
+            for name in selected
+            if name in non_decomposable and name not in self._non_decomposable
+        ]
+        if missing:
+            if self._data is None:
+                raise ValueError(
+                    f"Features need the whole data, which isn't kept past {self.max_data_bytes} "
+                    f"bytes: {missing}"
+                )
+            self._non_decomposable.update(
+                calculate_all_binary_features(bytes(self._data), names=missing)
+            )
+        return {
+            name: self._non_decomposable[name] if name in non_decomposable else features[name]
+            for name in selected
+        }
+
+
+def calculate_streaming_features(
+    chunks: Iterable[Union[bytes, bytearray, memoryview]],
+    names: Optional[Iterable[str]] = None,
+    block_size_bytes: Optional[int] = None,
+) -> dict[str, FeatureType]:
+    """Features of the data made of `chunks` joined together"""
+    accumulator = StreamingFeatures(block_size_bytes)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.features(names)
+
+
+def iter_file_chunks(
+    path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+
+def calculate_file_features(
+    path: Union[str, os.PathLike],
+    names: Optional[Iterable[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
+    block_size_bytes: Optional[int] = None,
+) -> dict[str, FeatureType]:
+    """Features of a file's contents, read `chunk_size` bytes at a time. With `use_mmap`, the file
+    is memory mapped and chunks are slices of the mapping instead of copies.
+    """
+    accumulator = StreamingFeatures(block_size_bytes)
+    if use_mmap and os.path.getsize(path):
+        with (
+            open(path, "rb") as handle,
+            mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+            memoryview(mapped) as view,
+        ):
+            for start in range(0, len(view), chunk_size):
+                accumulator.update(view[start : start + chunk_size])
+    else:
+        for chunk in iter_file_chunks(path, chunk_size):
+            accumulator.update(chunk)
+    return accumulator.features(names)
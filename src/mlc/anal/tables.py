@@ -0,0 +1,87 @@
+"""Precomputed 256-entry tables of per byte values and predicates.
+Element `byte` of each table is the value for that byte value, so a table gives the values for a
+whole sample with `table[data]`, and the sum over a sample with the dot product of the sample's byte
+histogram and the table (O(256) once the histogram exists). Predicate tables are boolean, so their
+dot product with a histogram is the number of matching bytes.
+Bit indices are 0 for the least significant bit, except for bit ranges, which index into the byte's
+bit string (`binary._bin`, most significant bit first).
+The tables (and numpy) are only built on first access, so importing this module is cheap.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@lru_cache(maxsize=None)
+def get_tables() -> dict[str, "np.ndarray"]:
+    """Every table by name. Built on first call."""
+    import numpy as np
+
+    byte_values = np.arange(256, dtype=np.int64)
+    # [256, 8] bits of each byte value, most significant first
+    bit_strings = np.unpackbits(byte_values.astype(np.uint8)[:, None], axis=1)
+    popcount = bit_strings.sum(axis=1, dtype=np.int64)
+    lower_nibble = byte_values & 0x0F
+    upper_nibble = byte_values >> 4
+    # Bit-reversed byte values
+    mirrored = np.packbits(bit_strings[:, ::-1], axis=1)[:, 0].astype(np.int64)
+    return {
+        "BYTE_VALUES": byte_values,
+        "_BIT_STRINGS": bit_strings,
+        "POPCOUNT": popcount,
+        "ZERO_BIT_COUNT": 8 - popcount,
+        "LOWER_NIBBLE": lower_nibble,
+        "UPPER_NIBBLE": upper_nibble,
+        "MIRRORED": mirrored,
+        # Sum of the indices of the bits that are on
+        "ON_BIT_POSITION_SUM": bit_strings[:, ::-1] @ np.arange(8, dtype=np.int64),
+        # Indices of the bits that are on
+        "BITS_ON_INDICES": tuple(
+            tuple(np.flatnonzero(bits[::-1]).tolist()) for bits in bit_strings
+        ),
+        # [8, 256] row `bit` says whether bit `bit` is on
+        "BIT_ON": ((byte_values[None, :] >> np.arange(8)[:, None]) & 1).astype(bool),
+        "BIT0_AND_BIT7_ON": (byte_values & 0b10000001) == 0b10000001,
+        # Lower ("first") nibble compared to the upper ("second") nibble
+        "NIBBLE_GT": lower_nibble > upper_nibble,
+        "NIBBLE_GE": lower_nibble >= upper_nibble,
+        "NIBBLE_LT": lower_nibble < upper_nibble,
+        "NIBBLE_LE": lower_nibble <= upper_nibble,
+        "NIBBLE_EQ": lower_nibble == upper_nibble,
+        # The complement is the (negative) Python `~`, so this never matches
+        "NIBBLE_EQ_COMPLEMENT": lower_nibble == ~upper_nibble,
+        # Mirroring the upper nibble as a byte moves its bits to the upper nibble
+        "NIBBLE_EQ_MIRROR": lower_nibble == mirrored[upper_nibble],
+        # [255, 256] row `mask - 1` says whether all of the bits of `mask` are on
+        "MASK_MATCH": (byte_values[None, :] & byte_values[1:, None]) == byte_values[1:, None],
+    }
+
+
+def __getattr__(name: str):
+    # The tables used to be built at import time. Once built they're module attributes, so this is
+    # only called on first access. Dunder lookups (e.g. `__path__` by the import system) don't
+    # build them.
+    if name.startswith("__") or name not in get_tables():
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    tables = get_tables()
+    globals().update(tables)
+    return tables[name]
+
+
+@lru_cache(maxsize=None)
+def bit_range_equal(start_1: int, end_1: int, start_2: int, end_2: int) -> "np.ndarray":
+    """Whether bits `start_1` to `end_1` equal bits `start_2` to `end_2` (inclusive indices into
+    the bit string, so 0 is the most significant bit)
+    """
+    bits = get_tables()["_BIT_STRINGS"]
+    return (bits[:, start_1 : end_1 + 1] == bits[:, start_2 : end_2 + 1]).all(axis=1)
+
+
+def count_matching(hist: "np.ndarray", table: "np.ndarray") -> int:
+    """Sum of `table` over the bytes of a sample with byte histogram `hist` (the number of matching
+    bytes for a predicate table)
+    """
+    return int(hist @ table)
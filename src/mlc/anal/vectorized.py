@@ -0,0 +1,721 @@
+"""NumPy implementation of the per-byte feature families in `mlc.anal.binary`.
+Each sample is loaded once into a `np.frombuffer` uint8 view and every feature family is computed
+with the lookup tables in `mlc.anal.tables` (most families are a byte histogram times a table)
+and array reductions instead of looping over bytes in Python. Values are
+identical to the pure Python functions in `mlc.anal.binary` (same counts, same float operations in
+the same order), so these can be used in place of them in the feature calculation path.
+Block features come from `mlc.anal.blockwise`. Each compression ratio is its own family, so only
+the compressors of the selected ratios run, and they run concurrently (see `ByteSample.prefetch`).
+Values several families need (the byte histogram, the mean, unpacked bits, block matrices,
+compressed sizes, ...) are intermediates: each family declares the ones it requires and a
+`ByteSample` computes each of them once per sample, in dependency order, and counts their uses.
+The variance's squared differences are summed with Python's `sum`, like `binary.variance`, since
+`sum` of floats is compensated from Python 3.12 on.
+Pair features are computed for many pairs at once from the XOR and difference of the pairs' bytes.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+from mlc.anal import binary, tables
+from mlc.anal.binary import (
+    bit_symmetry_func_name,
+    bit_symmetry_ranges,
+    FeatureType,
+    HISTOGRAM_FEATURE_NAMES,
+    histogram_feature_values,
+)
+from mlc.anal.bits import (
+    bit_ngram_names,
+    bit_ngram_values,
+    BIT_RUN_LENGTH_NAMES,
+    bit_run_length_values,
+    BIT_RUN_NAMES,
+    bit_run_values,
+    BitSample,
+    bytes_containing_bits_table,
+    bytes_containing_bits_names,
+)
+from mlc.anal.blockwise import (
+    block_average_values,
+    block_ent_average_values,
+    BLOCK_AVERAGE_NAMES,
+    BLOCK_ENT_AVERAGE_NAMES,
+    block_position_names,
+    block_position_values,
+    BLOCK_RANGE_NAMES,
+    block_range_values,
+    BlockSample,
+)
+from mlc.anal.tables import count_matching
+from mlc.compression import compressed_size, compressed_sizes, CompressionType
+
+
+def as_uint8(data: bytes) -> np.ndarray:
+    """Zero-copy uint8 view of `data`"""
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+@dataclass(frozen=True)
+class Intermediate:
+    """A value computed from a sample that several features need. `compute` may use the
+    intermediates in `requires`, which are computed first.
+    """
+
+    name: str
+    requires: tuple[str, ...]
+    compute: Callable[["ByteSample"], Any]
+
+
+def _variance(sample: "ByteSample") -> float:
+    # Squared differences summed with `sum`, like `binary.variance` (compensated from Python 3.12 on)
+    return sum(((sample.arr - sample.get("mean")) ** 2).tolist()) / sample.length
+
+
+# Intermediates shared by the feature families, by name. Blocks are `block_intermediate(size)`.
+INTERMEDIATES: dict[str, Intermediate] = {
+    intermediate.name: intermediate
+    for intermediate in (
+        Intermediate("arr", (), lambda sample: as_uint8(sample.data)),
+        Intermediate("histogram", ("arr",), lambda sample: np.bincount(sample.arr, minlength=256)),
+        # Same as `sum(data) / len(data)`
+        Intermediate(
+            "mean",
+            ("histogram",),
+            lambda sample: count_matching(sample.histogram, tables.BYTE_VALUES) / sample.length,
+        ),
+        Intermediate("variance", ("arr", "mean"), _variance),
+        Intermediate("bits", ("arr",), lambda sample: BitSample(sample.arr)),
+        Intermediate("ent", (), lambda sample: binary.run_ent(sample.data)),
+    )
+}
+
+
+@lru_cache(maxsize=None)
+def block_intermediate(block_size: int) -> Intermediate:
+    """Blocks of `block_size` bytes (the same blocks as `binary.blocks`)"""
+
+    def compute(sample: "ByteSample") -> BlockSample:
+        num_blocks = max(0, (sample.length - 1) // block_size)
+        return BlockSample(sample.arr[: num_blocks * block_size].reshape(-1, block_size))
+
+    return Intermediate(f"blocks_{block_size}", ("arr",), compute)
+
+
+@lru_cache(maxsize=None)
+def compressed_size_intermediate(comp_type: CompressionType) -> Intermediate:
+    """Size of the sample compressed with `comp_type`"""
+    return Intermediate(
+        f"compressed_size_{comp_type.name.lower()}",
+        (),
+        lambda sample: compressed_size(sample.data, comp_type),
+    )
+
+
+# Compressed size intermediate name to its compression type
+_COMPRESSED_SIZE_TYPES: dict[str, CompressionType] = {
+    compressed_size_intermediate(comp_type).name: comp_type for comp_type in CompressionType
+}
+
+
+def _intermediate(name: str) -> Intermediate:
+    if name.startswith("blocks_"):
+        return block_intermediate(int(name.removeprefix("blocks_")))
+    if name in _COMPRESSED_SIZE_TYPES:
+        return compressed_size_intermediate(_COMPRESSED_SIZE_TYPES[name])
+    return INTERMEDIATES[name]
+
+
+class ByteSample:
+    """One sample and the intermediates shared between feature families. Each intermediate is
+    computed at most once, the first time it's needed. `uses` counts how many families and other
+    intermediates declared that they need each intermediate, so counts above 1 are reuse.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.length = len(data)
+        self.uses: Counter[str] = Counter()
+        self._values: dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        """Value of intermediate `name`, computing it (and what it requires) if needed"""
+        if name not in self._values:
+            intermediate = _intermediate(name)
+            self.require(intermediate.requires)
+            self._values[name] = intermediate.compute(self)
+        return self._values[name]
+
+    def prefetch(self, families: Iterable["VectorizedFamily"]) -> None:
+        """Computes the compressed sizes that `families` require in one `compressed_sizes` call, so
+        their compressors run concurrently instead of one after the other as each family needs its
+        size
+        """
+        comp_types = {
+            _COMPRESSED_SIZE_TYPES[name]: None
+            for family in families
+            for name in family.requires
+            if name in _COMPRESSED_SIZE_TYPES and name not in self._values
+        }
+        if len(comp_types) > 1:
+            for comp_type, size in compressed_sizes(self.data, comp_types).items():
+                self._values[compressed_size_intermediate(comp_type).name] = size
+
+    def require(self, names: Iterable[str]) -> None:
+        """Computes the `names` intermediates if needed and counts a use of each"""
+        for name in names:
+            self.get(name)
+            self.uses[name] += 1
+
+    @property
+    def computed(self) -> list[str]:
+        """Names of the intermediates computed so far, in the order they were computed"""
+        return list(self._values)
+
+    @property
+    def arr(self) -> np.ndarray:
+        return self.get("arr")
+
+    @property
+    def histogram(self) -> np.ndarray:
+        return self.get("histogram")
+
+    @property
+    def bits(self) -> BitSample:
+        return self.get("bits")
+
+    def blocks(self, block_size: int) -> BlockSample:
+        """Blocks of `block_size` bytes (the same blocks as `binary.blocks`)"""
+        return self.get(block_intermediate(block_size).name)
+
+
+@dataclass(frozen=True)
+class VectorizedFamily:
+    """A group of features computed together from one sample.
+    `compute` returns one value per name in `names`, in the same order. `requires` are the
+    intermediates it uses.
+    """
+
+    names: tuple[str, ...]
+    compute: Callable[[ByteSample], list[FeatureType]]
+    requires: tuple[str, ...] = ()
+
+    def values(self, sample: ByteSample) -> list[FeatureType]:
+        """`compute(sample)`, after computing (or reusing) the intermediates it requires"""
+        sample.require(self.requires)
+        return self.compute(sample)
+
+
+def _percent(counts: np.ndarray, length: int) -> list[float]:
+    # Same operation order as the pure Python functions: (100.0 * count) / length
+    return (100.0 * counts / length).tolist()
+
+
+def byte_average_values(hist: np.ndarray, length: int) -> list[FeatureType]:
+    """Values of the byte average features, in `VECTORIZED_FAMILIES[0].names` order, from a byte
+    histogram
+    """
+    byte_sum = count_matching(hist, tables.BYTE_VALUES)
+    lower_sum = count_matching(hist, tables.LOWER_NIBBLE)
+    upper_sum = count_matching(hist, tables.UPPER_NIBBLE)
+    bits_on = count_matching(hist, tables.POPCOUNT)
+    return [
+        byte_sum / length,
+        byte_sum // length,
+        (lower_sum + upper_sum) / (length * 2),
+        upper_sum / length,
+        lower_sum / length,
+        bits_on / (length * 8),
+        bits_on / length,
+        (length * 8 - bits_on) / length,
+        count_matching(hist, tables.ON_BIT_POSITION_SUM) / (length * 8),
+    ]
+
+
+def _byte_averages(sample: ByteSample) -> list[FeatureType]:
+    return byte_average_values(sample.histogram, sample.length)
+
+
+# Widths (in bytes) of the integer average features
+INT_AVERAGE_WIDTHS: tuple[int, ...] = (2, 3, 4, 5, 6, 7, 8)
+
+
+def int_average_names(width: int) -> tuple[str, ...]:
+    bits = width * 8
+    return (
+        f"average_uint{bits}_le",
+        f"average_uint{bits}_be",
+        f"average_int{bits}_le",
+        f"average_int{bits}_be",
+    )
+
+
+def int_plane_sums(ints: np.ndarray) -> tuple[list[int], int, int]:
+    """Sum of each byte plane (column) of a [n_ints, width] uint8 array, and the number of ints that
+    are negative as little and big endian signed ints
+    """
+    plane_sums = [int(plane_sum) for plane_sum in ints.sum(axis=0, dtype=np.int64)]
+    return (
+        plane_sums,
+        int(np.count_nonzero(ints[:, -1] >> 7)),
+        int(np.count_nonzero(ints[:, 0] >> 7)),
+    )
+
+
+def int_averages_from_plane_sums(
+    plane_sums: Sequence[int], num_negative_le: int, num_negative_be: int, num_ints: int
+) -> list[float]:
+    """Values of `int_average_names(len(plane_sums))` from the outputs of `int_plane_sums`"""
+    width = len(plane_sums)
+    unsigned_le = sum(plane_sum << (8 * idx) for idx, plane_sum in enumerate(plane_sums))
+    unsigned_be = sum(plane_sum << (8 * idx) for idx, plane_sum in enumerate(plane_sums[::-1]))
+    # Two's complement: negative ints are their unsigned value minus 2 ** bits
+    negative_le = num_negative_le << (8 * width)
+    negative_be = num_negative_be << (8 * width)
+    return [
+        unsigned_le / num_ints,
+        unsigned_be / num_ints,
+        (unsigned_le - negative_le) / num_ints,
+        (unsigned_be - negative_be) / num_ints,
+    ]
+
+
+def int_average_values(arr: np.ndarray, widths: Sequence[int] = INT_AVERAGE_WIDTHS) -> list[float]:
+    """Values of `int_average_names(width)` for each of `widths`, from a uint8 array.
+    Each width is one reduction over a [n_ints, width] view that sums every byte plane (column).
+    Both byte orders and both signednesses are assembled from the plane sums as Python ints, so
+    sums are exact at every width and the division rounds like the pure Python functions.
+    """
+    values = []
+    for width in widths:
+        num_ints = len(arr) // width
+        ints = arr[: num_ints * width].reshape(num_ints, width)
+        values += int_averages_from_plane_sums(*int_plane_sums(ints), num_ints)
+    return values
+
+
+def _histogram(sample: ByteSample) -> list[FeatureType]:
+    return histogram_feature_values(sample.histogram, sample.length)
+
+
+def _adjacent_bytes(sample: ByteSample) -> list[FeatureType]:
+    arr = sample.arr
+    if len(arr) < 2:
+        return [0.0] * 5 + [0]
+    cur = arr[:-1]
+    nxt = arr[1:]
+    counts = np.array(
+        [
+            np.count_nonzero(cur < nxt),
+            np.count_nonzero(cur <= nxt),
+            np.count_nonzero(cur > nxt),
+            np.count_nonzero(cur >= nxt),
+            np.count_nonzero(cur == nxt),
+        ]
+    )
+    diff_sum = int(np.abs(cur.astype(np.int16) - nxt).sum(dtype=np.int64))
+    return _percent(counts, len(arr) - 1) + [diff_sum / (len(arr) - 1)]
+
+
+def _xor_fold(sample: ByteSample) -> list[int]:
+    return [int(np.bitwise_xor.reduce(sample.arr))]
+
+
+def _xor_fold_16bit(sample: ByteSample) -> list[int]:
+    arr = sample.arr
+    num_words = len(arr) // 2
+    words = arr[: num_words * 2]
+    xor_le = int(np.bitwise_xor.reduce(words.view("<u2")))
+    xor_be = int(np.bitwise_xor.reduce(words.view(">u2")))
+    if len(arr) > num_words * 2:
+        # A trailing single byte is a word on its own
+        xor_le ^= int(arr[-1])
+        xor_be ^= int(arr[-1])
+    return [xor_le, xor_be]
+
+
+def _variance_values(sample: ByteSample) -> list[float]:
+    variance = sample.get("variance")
+    return [variance, variance**0.5]
+
+
+def _ent_values(sample: ByteSample) -> list[float]:
+    results = sample.get("ent")
+    return [
+        results.entropy,
+        results.chi_square,
+        results.chi_square / sample.length,
+        results.monte_carlo_pi,
+        results.serial_correlation,
+    ]
+
+
+# Compression ratio feature name to its compression type
+_COMPRESSION_RATIO_TYPES: dict[str, CompressionType] = {
+    f"compression_ratio_{comp_type.name.lower()}": comp_type for comp_type in CompressionType
+}
+
+
+def _compression_ratio_family(name: str, comp_type: CompressionType) -> VectorizedFamily:
+    # One family per compression type, so selecting one ratio only runs its compressor
+    intermediate = compressed_size_intermediate(comp_type).name
+    return VectorizedFamily(
+        names=(name,),
+        compute=lambda sample: [sample.get(intermediate) / sample.length],
+        requires=(intermediate,),
+    )
+
+
+VECTORIZED_FAMILIES: list[VectorizedFamily] = [
+    VectorizedFamily(
+        names=(
+            "average_byte",
+            "average_byte_int",
+            "average_nibble",
+            "average_upper_nibble",
+            "average_lower_nibble",
+            "average_bit",
+            "average_num_bits_on",
+            "average_num_bits_off",
+            "average_on_bit_position_8bits",
+        ),
+        compute=_byte_averages,
+        requires=("histogram",),
+    ),
+    VectorizedFamily(names=HISTOGRAM_FEATURE_NAMES, compute=_histogram, requires=("histogram",)),
+    VectorizedFamily(
+        names=bit_ngram_names(),
+        compute=lambda sample: bit_ngram_values(sample.bits),
+        requires=("bits",),
+    ),
+    VectorizedFamily(
+        names=BIT_RUN_NAMES, compute=lambda sample: bit_run_values(sample.bits), requires=("bits",)
+    ),
+    VectorizedFamily(
+        names=BIT_RUN_LENGTH_NAMES,
+        compute=lambda sample: bit_run_length_values(sample.bits),
+        requires=("bits",),
+    ),
+    VectorizedFamily(
+        names=(
+            "percent_bytes_lt_next_byte",
+            "percent_bytes_le_next_byte",
+            "percent_bytes_gt_next_byte",
+            "percent_bytes_ge_next_byte",
+            "percent_bytes_eq_next_byte",
+            "average_abs_difference_between_bytes",
+        ),
+        compute=_adjacent_bytes,
+        requires=("arr",),
+    ),
+    VectorizedFamily(names=("xor_all_bytes_8bit",), compute=_xor_fold, requires=("arr",)),
+    VectorizedFamily(
+        names=("xor_all_bytes_16bit_le", "xor_all_bytes_16bit_be"),
+        compute=_xor_fold_16bit,
+        requires=("arr",),
+    ),
+    VectorizedFamily(
+        names=("variance", "standard_deviation"), compute=_variance_values, requires=("variance",)
+    ),
+    VectorizedFamily(
+        names=(
+            "ent_entropy",
+            "ent_chi_square",
+            "ent_chi_square_normalized",
+            "ent_monte_carlo_pi",
+            "ent_serial_correlation",
+        ),
+        compute=_ent_values,
+        requires=("ent",),
+    ),
+] + [
+    _compression_ratio_family(name, comp_type)
+    for name, comp_type in _COMPRESSION_RATIO_TYPES.items()
+]
+
+
+@dataclass(frozen=True)
+class _PredicateGroup:
+    """Features that are `scale * (number of bytes matching a predicate) / length`. `table` returns
+    the [n_names, 256] predicate table, with a row per name.
+    """
+
+    names: tuple[str, ...]
+    table: Callable[[], np.ndarray]
+    scale: float = 100.0
+
+    def family(self) -> VectorizedFamily:
+        # Same operation order as the pure Python functions: (scale * count) / length
+        return VectorizedFamily(
+            names=self.names,
+            compute=lambda sample: (
+                self.scale * (self.table() @ sample.histogram) / sample.length
+            ).tolist(),
+            requires=("histogram",),
+        )
+
+
+_PREDICATE_GROUPS: list[_PredicateGroup] = [
+    _PredicateGroup(
+        names=tuple(f"percent_bytes_with_bit_{bit}_on" for bit in range(8))
+        + tuple(f"percent_bytes_with_bit_{bit}_off" for bit in range(8)),
+        table=lambda: np.concatenate([tables.BIT_ON, ~tables.BIT_ON]),
+    ),
+    _PredicateGroup(
+        names=(
+            "percent_bytes_first_nibble_gt_second_nibble",
+            "percent_bytes_first_nibble_ge_second_nibble",
+            "percent_bytes_first_nibble_lt_second_nibble",
+            "percent_bytes_first_nibble_le_second_nibble",
+            "percent_bytes_first_nibble_eq_second_nibble",
+            "percent_bytes_first_nibble_eq_complement_of_second_nibble",
+            "percent_bytes_first_nibble_eq_mirror_of_second_nibble",
+        ),
+        table=lambda: np.array(
+            [
+                tables.NIBBLE_GT,
+                tables.NIBBLE_GE,
+                tables.NIBBLE_LT,
+                tables.NIBBLE_LE,
+                tables.NIBBLE_EQ,
+                tables.NIBBLE_EQ_COMPLEMENT,
+                tables.NIBBLE_EQ_MIRROR,
+            ]
+        ),
+    ),
+    _PredicateGroup(
+        names=bytes_containing_bits_names(), table=lambda: bytes_containing_bits_table().T
+    ),
+    # Not a percent, unlike the others
+    _PredicateGroup(
+        names=("percent_bytes_bit0_bit7_symmetry",),
+        table=lambda: tables.BIT0_AND_BIT7_ON[None, :],
+        scale=1.0,
+    ),
+    _PredicateGroup(
+        names=tuple(bit_symmetry_func_name(*bit_range) for bit_range in bit_symmetry_ranges()),
+        table=lambda: np.array(
+            [tables.bit_range_equal(*bit_range) for bit_range in bit_symmetry_ranges()]
+        ),
+    ),
+]
+VECTORIZED_FAMILIES += [group.family() for group in _PREDICATE_GROUPS]
+
+
+@lru_cache(maxsize=None)
+def per_byte_tables() -> tuple[tuple[str, ...], np.ndarray, np.ndarray]:
+    """Names, [n_names, 256] predicate table and scale of every feature that only depends on how
+    many bytes match a predicate, for computing them from a byte histogram alone
+    """
+    names = tuple(name for group in _PREDICATE_GROUPS for name in group.names)
+    table = np.concatenate([group.table() for group in _PREDICATE_GROUPS]).astype(np.int64)
+    scales = np.concatenate([np.full(len(group.names), group.scale) for group in _PREDICATE_GROUPS])
+    return names, table, scales
+
+
+def _block_families(block_size: int) -> list[VectorizedFamily]:
+    # Families are split by when their values are undefined for short data, so each family raises
+    # `ZeroDivisionError` exactly when the pure Python functions do
+    requires = (block_intermediate(block_size).name,)
+    return [
+        VectorizedFamily(
+            names=BLOCK_RANGE_NAMES,
+            compute=lambda sample: block_range_values(sample.blocks(block_size), sample.length),
+            requires=requires,
+        ),
+        VectorizedFamily(
+            names=BLOCK_AVERAGE_NAMES,
+            compute=lambda sample: block_average_values(sample.blocks(block_size)),
+            requires=requires,
+        ),
+        VectorizedFamily(
+            names=BLOCK_ENT_AVERAGE_NAMES,
+            compute=lambda sample: block_ent_average_values(sample.blocks(block_size)),
+            requires=requires,
+        ),
+        VectorizedFamily(
+            names=block_position_names(block_size),
+            compute=lambda sample: block_position_values(sample.blocks(block_size), sample.length),
+            requires=requires,
+        ),
+    ]
+
+
+def _int_average_family(width: int) -> VectorizedFamily:
+    # One family per width, so each raises `ZeroDivisionError` exactly when the pure Python
+    # functions do (data shorter than `width`)
+    return VectorizedFamily(
+        names=int_average_names(width),
+        compute=lambda sample: int_average_values(sample.arr, (width,)),
+        requires=("arr",),
+    )
+
+
+VECTORIZED_FAMILIES += [_int_average_family(width) for width in INT_AVERAGE_WIDTHS]
+# Block features are registered for the default block size
+VECTORIZED_FAMILIES += _block_families(binary.DEFAULT_BLOCK_SIZE_BYTES)
+
+# Feature name to the family that computes it
+VECTORIZED_FEATURE_FAMILIES: dict[str, VectorizedFamily] = {
+    name: family for family in VECTORIZED_FAMILIES for name in family.names
+}
+# Feature name to its index in its family's output
+_VECTORIZED_FEATURE_POSITIONS: dict[str, int] = {
+    name: idx for family in VECTORIZED_FAMILIES for idx, name in enumerate(family.names)
+}
+
+
+def vectorized_columns(
+    names: Sequence[str],
+) -> list[tuple[VectorizedFamily, np.ndarray, np.ndarray]]:
+    """Groups `names` by the family that computes them. For each family needed, returns the family,
+    the indices of the wanted values in its output and the matching indices into `names`. Names that
+    don't have a vectorized implementation are skipped.
+    """
+    family_idxs = {family: ([], []) for family in VECTORIZED_FAMILIES}
+    for idx, name in enumerate(names):
+        family = VECTORIZED_FEATURE_FAMILIES.get(name)
+        if family is not None:
+            family_idxs[family][0].append(_VECTORIZED_FEATURE_POSITIONS[name])
+            family_idxs[family][1].append(idx)
+    return [
+        (family, np.array(value_idxs, dtype=np.intp), np.array(name_idxs, dtype=np.intp))
+        for family, (value_idxs, name_idxs) in family_idxs.items()
+        if name_idxs
+    ]
+
+
+def calculate_vectorized_features(
+    data: bytes, names: Optional[Iterable[str]] = None
+) -> dict[str, FeatureType]:
+    """Calculates the features in `names` (all vectorized features if not given). Names that don't
+    have a vectorized implementation are ignored. Only the families needed are computed.
+    """
+    if not data:
+        # Matches the pure Python functions rather than returning NaNs
+        raise ZeroDivisionError("Cannot calculate features of empty data")
+    return _sample_features(ByteSample(data), names)
+
+
+def _sample_features(
+    sample: ByteSample, names: Optional[Iterable[str]] = None
+) -> dict[str, FeatureType]:
+    if names is None:
+        families = VECTORIZED_FAMILIES
+        wanted = None
+    else:
+        wanted = {name for name in names if name in VECTORIZED_FEATURE_FAMILIES}
+        families = [
+            family for family in VECTORIZED_FAMILIES if any(n in wanted for n in family.names)
+        ]
+
+    sample.prefetch(families)
+    features = {}
+    for family in families:
+        for name, value in zip(family.names, family.values(sample)):
+            if wanted is None or name in wanted:
+                features[name] = value
+    return features
+
+
+def feature_intermediates(name: str) -> tuple[str, ...]:
+    """Every intermediate vectorized feature `name` depends on, directly or through other
+    intermediates, each after the ones it requires
+    """
+    ordered: dict[str, None] = {}
+
+    def visit(intermediate_name: str) -> None:
+        if intermediate_name not in ordered:
+            for required in _intermediate(intermediate_name).requires:
+                visit(required)
+            ordered[intermediate_name] = None
+
+    for required in VECTORIZED_FEATURE_FAMILIES[name].requires:
+        visit(required)
+    return tuple(ordered)
+
+
+@dataclass(frozen=True)
+class IntermediateReport:
+    """Intermediates computed for one sample, in the order they were computed, and how many
+    families and intermediates used each
+    """
+
+    computed: list[str]
+    uses: dict[str, int]
+
+    @property
+    def reused(self) -> dict[str, int]:
+        """Number of times each intermediate was reused instead of being computed again"""
+        return {name: uses - 1 for name, uses in self.uses.items() if uses > 1}
+
+
+def calculate_vectorized_features_with_report(
+    data: bytes, names: Optional[Iterable[str]] = None
+) -> tuple[dict[str, FeatureType], IntermediateReport]:
+    """`calculate_vectorized_features`, and which intermediates were computed and reused"""
+    if not data:
+        raise ZeroDivisionError("Cannot calculate features of empty data")
+    sample = ByteSample(data)
+    features = _sample_features(sample, names)
+    return features, IntermediateReport(computed=sample.computed, uses=dict(sample.uses))
+
+
+# Pair features, in `binary.BYTE_ARRAYS_ANAL_FUNCS` order
+PAIR_FEATURE_NAMES: tuple[str, ...] = (
+    "percent_bytes_equal",
+    "percent_bits_equal",
+    "average_abs_difference_between_byte_arrays",
+)
+
+
+def pair_feature_matrix(pairs: Sequence[tuple[bytes, bytes]]) -> np.ndarray:
+    """[n_pairs, len(PAIR_FEATURE_NAMES)] float64 values of the pair features. Like the pure Python
+    functions, each pair is compared over the length of its shorter sample. Raises
+    `ZeroDivisionError` if a pair has an empty sample.
+    """
+    lengths = np.array([min(len(data1), len(data2)) for data1, data2 in pairs], dtype=np.int64)
+    if not lengths.all():
+        raise ZeroDivisionError("Cannot calculate pair features of empty data")
+    # Every pair's common prefix, back to back
+    arr1 = as_uint8(b"".join(memoryview(data1)[:num] for (data1, _), num in zip(pairs, lengths)))
+    arr2 = as_uint8(b"".join(memoryview(data2)[:num] for (_, data2), num in zip(pairs, lengths)))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    def pair_sums(values: np.ndarray) -> np.ndarray:
+        # Exact integer sum of each pair's values
+        cumsum = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+        return cumsum[ends] - cumsum[starts]
+
+    xor = arr1 ^ arr2
+    equal_bytes = pair_sums(xor == 0)
+    equal_bits = pair_sums(tables.ZERO_BIT_COUNT[xor])
+    abs_differences = pair_sums(np.abs(arr1.astype(np.int16) - arr2))
+    # Same float operations as the pure Python functions
+    return np.column_stack(
+        (
+            100.0 * (equal_bytes / lengths),
+            100.0 * equal_bits / (lengths * 8),
+            abs_differences / lengths,
+        )
+    )
+
+
+def calculate_vectorized_pair_features(
+    data1: bytes, data2: bytes, names: Optional[Iterable[str]] = None
+) -> dict[str, FeatureType]:
+    """Calculates the pair features in `names` (all of them if not given) of one pair. Names that
+    don't have a vectorized implementation are ignored.
+    """
+    wanted = None if names is None else set(names)
+    values = pair_feature_matrix([(data1, data2)])[0].tolist()
+    return {
+        name: value
+        for name, value in zip(PAIR_FEATURE_NAMES, values)
+        if wanted is None or name in wanted
+    }
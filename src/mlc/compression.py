@@ -1,66 +1,55 @@
 #!/usr/bin/env python3
-"""Data compression and decompression utilities"""
+"""Data compression and decompression utilities.
+Compression libraries are imported on first use (see `get_type_to_funcs`) so that importing this
+module, and the feature modules that import it, stays cheap.
+"""
 
-import bz2
 from enum import auto
-import gzip
-import lzma
+from functools import lru_cache
+import io
 import os
-import tarfile
-import tempfile
-from typing import Callable, Dict, Optional, Tuple
-import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 from mlc.utils.better_enum import BetterEnum
 
-import zstd
+
+# Name of the single file in tars made by `_to_tar_data`
+TAR_MEMBER_NAME: str = "data"
+
+
+def _tar_info(size: int):
+    import tarfile
+
+    # Fixed metadata (mtime 0, no owner) so the same data always makes the same tar
+    tar_info = tarfile.TarInfo(TAR_MEMBER_NAME)
+    tar_info.size = size
+    return tar_info
 
 
 def _to_tar_data(data: bytes, open_flags: str = "w") -> bytes:
     """tars up `data` and returns the tar contents.
     Supports both uncompressed and compressed based on `open_flags`
     """
-    with (
-        tempfile.NamedTemporaryFile() as raw_content_file,
-        tempfile.NamedTemporaryFile() as file_tarred,
-    ):
-        raw_content_file.write(data)
-        raw_content_file.flush()
-        with tarfile.open(file_tarred.name, mode=open_flags) as tar_file:
-            tar_file.add(raw_content_file.name)
-            tar_filename = tar_file.name
+    import tarfile
 
-        with open(tar_filename, "rb") as handle:
-            return handle.read()
+    tarred = io.BytesIO()
+    with tarfile.open(fileobj=tarred, mode=open_flags) as tar_file:
+        tar_file.addfile(_tar_info(len(data)), io.BytesIO(data))
+    return tarred.getvalue()
 
 
 def _from_tar_data(data: bytes, open_flags: str = "r") -> bytes:
     """Interprets `data` as tar file contents and tries to untar them. Supports
     uncompressed and compressed formats of tar files (based on `open_flags`).
     """
-    untarred_data = b""
-    # This function is only a bit convoluted due to `tarfile` API pretty much
-    # just doing this on files
-    with (
-        tempfile.NamedTemporaryFile() as raw_content_file,
-        tempfile.TemporaryDirectory() as extract_dir,
-    ):
-        # Dump the binary tarfile contents to a temporary file
-        raw_content_file.write(data)
-        raw_content_file.flush()
-
-        # Read the temporary file as a tar
-        with tarfile.open(raw_content_file.name, mode=open_flags) as tar_file:
-            # Extract everything to disk in temporary dir
-            tar_file.extractall(path=extract_dir, filter="data")
-            # If created with `_to_tar_data`, should just be 1 file, so
-            # ordering doesn't matter
-            for tinfo in tar_file.getmembers():
-                # Should be an absolute path
-                untarred_filename = os.path.join(extract_dir, tinfo.name)
-                with open(untarred_filename, "rb") as handle:
-                    untarred_data += handle.read()
+    import tarfile
 
+    untarred_data = b""
+    with tarfile.open(fileobj=io.BytesIO(data), mode=open_flags) as tar_file:
+        # If created with `_to_tar_data`, should just be 1 file, so ordering doesn't matter
+        for tinfo in tar_file.getmembers():
+            if tinfo.isfile():
+                untarred_data += tar_file.extractfile(tinfo).read()
     return untarred_data
 
 
@@ -141,32 +130,56 @@ def zstd_compress(data: bytes, level: int = 22) -> bytes:
     """ZSTD_compress doesn't have any keyword arguments, so the method used below causes an error because we pass level
     as a kwarg.
     """
+    import zstd
+
     return zstd.ZSTD_compress(data, level)
 
 
-# Compress function, decompress function, compression level kwarg name, max
-# compression level value
-TYPE_TO_FUNCS: Dict[CompressionType, Tuple[Callable, Callable, str, int]] = {
-    CompressionType.GZIP: (gzip.compress, gzip.decompress, "compresslevel", 9),
-    CompressionType.ZSTD: (zstd_compress, zstd.ZSTD_uncompress, "level", 22),
-    CompressionType.LZMA: (
-        lzma.compress,
-        lzma.decompress,
-        "preset",
-        9 | lzma.PRESET_EXTREME,
-    ),
-    CompressionType.BZ2: (bz2.compress, bz2.decompress, "compresslevel", 9),
-    CompressionType.ZLIB: (zlib.compress, zlib.decompress, "level", 9),
-    CompressionType.TAR: (_to_tar, _from_tar, None, None),
-    CompressionType.TAR_GZ: (_to_tar_gz, _from_tar_gz, None, None),
-    CompressionType.TAR_BZ2: (_to_tar_bz2, _from_tar_bz2, None, None),
-    CompressionType.TAR_XZ: (_to_tar_xz, _from_tar_xz, None, None),
-}
+def zstd_decompress(data: bytes) -> bytes:
+    import zstd
+
+    return zstd.ZSTD_uncompress(data)
+
+
+@lru_cache(maxsize=None)
+def get_type_to_funcs() -> Dict[CompressionType, Tuple[Callable, Callable, str, int]]:
+    """Compress function, decompress function, compression level kwarg name, max
+    compression level value for each compression type. Imports the compression libraries the
+    first time it's called.
+    """
+    import bz2
+    import gzip
+    import lzma
+    import zlib
+
+    return {
+        CompressionType.GZIP: (gzip.compress, gzip.decompress, "compresslevel", 9),
+        CompressionType.ZSTD: (zstd_compress, zstd_decompress, "level", 22),
+        CompressionType.LZMA: (
+            lzma.compress,
+            lzma.decompress,
+            "preset",
+            9 | lzma.PRESET_EXTREME,
+        ),
+        CompressionType.BZ2: (bz2.compress, bz2.decompress, "compresslevel", 9),
+        CompressionType.ZLIB: (zlib.compress, zlib.decompress, "level", 9),
+        CompressionType.TAR: (_to_tar, _from_tar, None, None),
+        CompressionType.TAR_GZ: (_to_tar_gz, _from_tar_gz, None, None),
+        CompressionType.TAR_BZ2: (_to_tar_bz2, _from_tar_bz2, None, None),
+        CompressionType.TAR_XZ: (_to_tar_xz, _from_tar_xz, None, None),
+    }
+
+
+def __getattr__(name: str):
+    # `TYPE_TO_FUNCS` used to be built at import time
+    if name == "TYPE_TO_FUNCS":
+        return get_type_to_funcs()
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
 def compress(data: bytes, comp_type: CompressionType, kwargs: Optional[Dict] = None) -> bytes:
     """Compress `data` using `comp_type` compression algorithm"""
-    func_tup = TYPE_TO_FUNCS[comp_type]
+    func_tup = get_type_to_funcs()[comp_type]
     comp_func = func_tup[0]
     kwargs = kwargs or {}
     if func_tup[2] is not None and func_tup[3] is not None:
@@ -175,8 +188,121 @@ def compress(data: bytes, comp_type: CompressionType, kwargs: Optional[Dict] = N
     return comp_func(data, **kwargs)
 
 
+# Input is fed to incremental compressors in pieces of this size
+_COMPRESS_CHUNK_SIZE: int = 1 << 20
+
+
+def _incremental_compressor(comp_type: CompressionType, kwargs: Dict):
+    """Compressor object (with `compress` and `flush`) whose output is the same length as
+    `compress(data, comp_type, kwargs)`. Tar types are the compressor of the tar stream.
+    """
+    import bz2
+    import lzma
+    import zlib
+
+    if comp_type == CompressionType.ZLIB:
+        return zlib.compressobj(kwargs["level"])
+    if comp_type == CompressionType.GZIP:
+        # A gzip header without a file name, like `gzip.compress`
+        return zlib.compressobj(kwargs["compresslevel"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if comp_type == CompressionType.BZ2:
+        return bz2.BZ2Compressor(kwargs["compresslevel"])
+    if comp_type == CompressionType.LZMA:
+        return lzma.LZMACompressor(preset=kwargs["preset"])
+    # `tarfile`'s defaults for "w:gz", "w:bz2" and "w:xz"
+    if comp_type == CompressionType.TAR_GZ:
+        return zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if comp_type == CompressionType.TAR_BZ2:
+        return bz2.BZ2Compressor(9)
+    if comp_type == CompressionType.TAR_XZ:
+        return lzma.LZMACompressor()
+    raise ValueError(f"No incremental compressor for {comp_type}")
+
+
+def _tar_pieces(data: bytes) -> Iterator[bytes]:
+    """Pieces of `_to_tar_data(data)`, in order, without copying `data` into a tar buffer"""
+    import tarfile
+
+    yield _tar_info(len(data)).tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, "surrogateescape")
+    yield data
+    # Data is padded to whole blocks, then the archive ends with 2 empty blocks and is padded to
+    # whole records
+    yield tarfile.NUL * (-len(data) % tarfile.BLOCKSIZE + 2 * tarfile.BLOCKSIZE)
+    archive_size = (
+        tarfile.BLOCKSIZE + len(data) + -len(data) % tarfile.BLOCKSIZE + 2 * tarfile.BLOCKSIZE
+    )
+    yield tarfile.NUL * (-archive_size % tarfile.RECORDSIZE)
+
+
+_TAR_TYPES = (
+    CompressionType.TAR,
+    CompressionType.TAR_GZ,
+    CompressionType.TAR_BZ2,
+    CompressionType.TAR_XZ,
+)
+
+
+def compressed_size(data: bytes, comp_type: CompressionType, kwargs: Optional[Dict] = None) -> int:
+    """Length of `compress(data, comp_type, kwargs)`, without keeping the compressed output.
+    `data` is streamed through an incremental compressor and only output lengths are counted.
+    """
+    func_tup = get_type_to_funcs()[comp_type]
+    kwargs = dict(kwargs or {})
+    if func_tup[2] is not None and func_tup[3] is not None:
+        kwargs.setdefault(func_tup[2], func_tup[3])
+    if comp_type == CompressionType.ZSTD:
+        # The zstd bindings don't have an incremental compressor
+        return len(zstd_compress(data, **kwargs))
+
+    if comp_type in _TAR_TYPES:
+        pieces: Iterable[bytes] = _tar_pieces(data)
+    else:
+        pieces = [data]
+    if comp_type == CompressionType.TAR:
+        return sum(len(piece) for piece in pieces)
+
+    compressor = _incremental_compressor(comp_type, kwargs)
+    size = 0
+    for piece in pieces:
+        view = memoryview(piece)
+        for start in range(0, len(view), _COMPRESS_CHUNK_SIZE):
+            size += len(compressor.compress(view[start : start + _COMPRESS_CHUNK_SIZE]))
+    return size + len(compressor.flush())
+
+
+# Per process, since threads don't survive a fork
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    from concurrent.futures import ThreadPoolExecutor
+
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=len(CompressionType), thread_name_prefix="compressed_size"
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def compressed_sizes(
+    data: bytes, comp_types: Optional[Iterable[CompressionType]] = None
+) -> Dict[CompressionType, int]:
+    """`compressed_size` of `data` for each of `comp_types` (all types if not given). The
+    compressors run concurrently in a thread pool (zlib, bz2, lzma and zstd release the GIL).
+    """
+    comp_types = list(CompressionType) if comp_types is None else list(comp_types)
+    executor = _get_executor()
+    futures = {
+        comp_type: executor.submit(compressed_size, data, comp_type) for comp_type in comp_types
+    }
+    return {comp_type: future.result() for comp_type, future in futures.items()}
+
+
 def decompress(data: bytes, comp_type: CompressionType, kwargs: Optional[Dict] = None) -> bytes:
     """Decompress `data` using `comp_type` compression algorithm"""
-    func_tup = TYPE_TO_FUNCS[comp_type]
+    func_tup = get_type_to_funcs()[comp_type]
     kwargs = kwargs or {}
     return func_tup[1](data, **kwargs)
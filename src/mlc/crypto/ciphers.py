@@ -0,0 +1,67 @@
+"""Encryption and decryption by cipher type, with keys and IVs/nonces from the current randomness
+source (`mlc.utils.rand`), so generated ciphertexts are reproducible under a seeded source.
+"""
+
+from typing import Callable, Optional
+
+from mlc.crypto.aes import decrypt_aes, encrypt_aes
+from mlc.crypto.camellia import decrypt_camellia, encrypt_camellia
+from mlc.crypto.chacha20 import decrypt_chacha20, encrypt_chacha20
+from mlc.crypto.cipher_types import CipherType
+from mlc.crypto.metadata import CipherMetadata
+from mlc.utils.rand import rand_bytes
+
+
+CipherFunc = Callable[[CipherMetadata, bytes], bytes]
+
+# Implemented ciphers: (encrypt, decrypt)
+CIPHER_FUNCS: dict[CipherType, tuple[CipherFunc, CipherFunc]] = {
+    CipherType.AES: (encrypt_aes, decrypt_aes),
+    CipherType.CAMELIA: (encrypt_camellia, decrypt_camellia),
+    CipherType.CHACHA20: (encrypt_chacha20, decrypt_chacha20),
+}
+DEFAULT_MODE: str = "CBC"
+# Block size of AES and Camellia
+IV_NUM_BYTES: int = 16
+# ChaCha20 as implemented by cryptography: 4 byte counter + 12 byte nonce
+NONCE_NUM_BYTES: int = 16
+
+
+def _funcs(cipher_type: CipherType) -> tuple[CipherFunc, CipherFunc]:
+    if cipher_type not in CIPHER_FUNCS:
+        raise NotImplementedError(f"Cipher '{cipher_type.name}' isn't implemented")
+    return CIPHER_FUNCS[cipher_type]
+
+
+def random_cipher_metadata(
+    cipher_type: CipherType, key_size_bits: int, mode: Optional[str] = DEFAULT_MODE
+) -> CipherMetadata:
+    """Metadata with a new random key (and IV or nonce) for `cipher_type`"""
+    _funcs(cipher_type)
+    if key_size_bits % 8:
+        raise ValueError(f"Key size must be a whole number of bytes, got {key_size_bits} bits")
+    key = rand_bytes(key_size_bits // 8)
+    if cipher_type == CipherType.CHACHA20:
+        return CipherMetadata(
+            name=cipher_type.name,
+            num_bits=key_size_bits,
+            key=key,
+            nonce=rand_bytes(NONCE_NUM_BYTES),
+        )
+    return CipherMetadata(
+        name=cipher_type.name,
+        num_bits=key_size_bits,
+        key=key,
+        iv=rand_bytes(IV_NUM_BYTES),
+        mode=mode,
+    )
+
+
+def encrypt(metadata: CipherMetadata, data: bytes) -> bytes:
+    """Encrypts `data` with the cipher named by `metadata` (a `CipherType` name)"""
+    return _funcs(CipherType[metadata.name])[0](metadata, data)
+
+
+def decrypt(metadata: CipherMetadata, data: bytes) -> bytes:
+    """Decrypts `data` with the cipher named by `metadata` (a `CipherType` name)"""
+    return _funcs(CipherType[metadata.name])[1](metadata, data)
@@ -0,0 +1,110 @@
+"""Benchmark of the bulk random data generators against generating one byte at a time.
+The per byte versions are the previous implementations (one `os.urandom` call per byte), kept here
+as the baseline. Each generator is timed at each size with `mlc.anal.bench.time_call_ns` and the
+result has the speedup of the bulk version.
+
+Run with `python -m mlc.data_gen.bench`. Results are JSON.
+"""
+
+import argparse
+import json
+import os
+from typing import Callable, Optional, Sequence
+
+from mlc.anal.bench import environment, time_call_ns
+from mlc.data_gen.random_data import (
+    ASCII_RANGE,
+    rand_ascii_bytes,
+    rand_bytes,
+    rand_sparse_ascii_bytes,
+    rand_sparse_bytes,
+)
+
+
+DEFAULT_SIZES: tuple[int, ...] = (1024, 64 * 1024, 1024 * 1024)
+
+
+def _per_byte_int_in_range(low: int, high: int) -> int:
+    return (int.from_bytes(os.urandom(4), byteorder="little") % (high - low)) + low
+
+
+def _per_byte_ascii_bytes(length: int) -> bytes:
+    data = bytearray(length)
+    for i in range(length):
+        data[i] = _per_byte_int_in_range(ASCII_RANGE[0], ASCII_RANGE[1])
+    return bytes(data)
+
+
+def _per_byte_sparsify(data: bytes, percent_sparse: float = 60.0, sparse_byte: int = 0) -> bytes:
+    sparse = bytearray(data)
+    for i in range(len(sparse)):
+        if _per_byte_int_in_range(0, 101) <= percent_sparse:
+            sparse[i] = sparse_byte
+    return bytes(sparse)
+
+
+# Generator name to (bulk version, per byte version)
+GENERATORS: dict[str, tuple[Callable[[int], bytes], Callable[[int], bytes]]] = {
+    "rand_ascii_bytes": (rand_ascii_bytes, _per_byte_ascii_bytes),
+    "rand_sparse_bytes": (
+        rand_sparse_bytes,
+        lambda length: _per_byte_sparsify(rand_bytes(length)),
+    ),
+    "rand_sparse_ascii_bytes": (
+        rand_sparse_ascii_bytes,
+        lambda length: _per_byte_sparsify(_per_byte_ascii_bytes(length)),
+    ),
+}
+
+
+def bench_generators(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    names: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+) -> dict:
+    """{generator: {size: {"bulk_ns", "per_byte_ns", "speedup"}}} for each of `names` (every
+    generator if not given)
+    """
+    results = {}
+    for name in names or GENERATORS:
+        bulk, per_byte = GENERATORS[name]
+        results[name] = {}
+        for size in sizes:
+            bulk_ns = time_call_ns(bulk, (size,), repeat)
+            per_byte_ns = time_call_ns(per_byte, (size,), repeat)
+            results[name][size] = {
+                "bulk_ns": bulk_ns,
+                "per_byte_ns": per_byte_ns,
+                "speedup": per_byte_ns / bulk_ns,
+            }
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Random data generation benchmarks")
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="Sample sizes in bytes"
+    )
+    parser.add_argument(
+        "--generators",
+        nargs="+",
+        choices=list(GENERATORS),
+        help="Generators to time (all if not given)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timings per generator and size")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = {
+        "environment": environment(),
+        "generators": bench_generators(args.sizes, args.generators, args.repeat),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as handle:
+            json.dump(results, handle, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Generation of random data samples, in one process or sharded across a process pool.
+With `workers`, the samples are split evenly across processes. Each worker has its own randomness
+stream (spawned from the current source, see `mlc.utils.rand`) and writes its own output shard, so
+nothing is sent between processes but the shard's settings. A JSON manifest lists the shards with
+the seed and spawn key of each, which is all that's needed to regenerate them.
+Samples are written to sample files (`mlc.data_gen.sample_file`), labeled with their data type, or
+as lines of hex.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from enum import auto
+import json
+import multiprocessing
+import os
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from mlc.compression import CompressionType
+from mlc.data_gen.data_type_base import DataTypeSettingKey
+from mlc.data_gen.random_data import rand_int_in_range, RandomDataType
+from mlc.data_gen.sample_file import SampleFileWriter
+from mlc.utils.better_enum import BetterEnum
+from mlc.utils.rand import (
+    get_random_source,
+    RandomSource,
+    SeededRandomSource,
+    using_random_source,
+)
+from mlc.utils.version import CURRENT_VERSION
+
+
+MANIFEST_VERSION: int = 1
+
+
+class OutputFormat(BetterEnum):
+    """How generated samples are written"""
+
+    # Sample file (`mlc.data_gen.sample_file`)
+    BINARY = auto()
+    # A line of hex per sample. No labels or metadata.
+    HEX = auto()
+
+
+def gen_plaintext_samples(
+    num_samples: int, size_range: Tuple[int, int], data_type: RandomDataType
+) -> Iterable[bytes]:
+    """`num_samples` samples of `data_type` with lengths in range [size_range[0], size_range[1])"""
+    for _ in range(num_samples):
+        length = rand_int_in_range(size_range[0], size_range[1])
+        yield data_type.generate(
+            {
+                DataTypeSettingKey.LENGTH.name: length,
+            }
+        )
+
+
+class HexSampleWriter:
+    """Writes each sample as a line of hex, like `SampleFileWriter` without labels or metadata"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self._handle = open(path, "w", encoding="UTF-8")
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(
+        self, data: bytes, label: Optional[str] = None, metadata: Optional[Dict] = None
+    ) -> int:
+        self._handle.write(data.hex())
+        self._handle.write("\n")
+        self._count += 1
+        return self._count - 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "HexSampleWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_sample_writer(
+    path: Union[str, os.PathLike],
+    output_format: OutputFormat = OutputFormat.BINARY,
+    compression: Optional[CompressionType] = None,
+    metadata: Optional[Dict] = None,
+) -> Union[SampleFileWriter, HexSampleWriter]:
+    """Writer of samples in `output_format`. `compression` and `metadata` are only stored in sample
+    files.
+    """
+    if output_format == OutputFormat.HEX:
+        if compression is not None:
+            raise ValueError("Hex output can't be compressed")
+        return HexSampleWriter(path)
+    return SampleFileWriter(path, compression, metadata=metadata)
+
+
+def split_count(total: int, parts: int) -> list[int]:
+    """`total` split into `parts` counts that differ by at most one"""
+    return [total // parts + (idx < total % parts) for idx in range(parts)]
+
+
+def shard_filename(out_filename: str, idx: int) -> str:
+    """Filename of shard `idx` of output `out_filename`, e.g. data-00003.csv for data.csv"""
+    root, ext = os.path.splitext(out_filename)
+    return f"{root}-{idx:05d}{ext}"
+
+
+def manifest_filename(out_filename: str) -> str:
+    return f"{out_filename}.manifest.json"
+
+
+def _source_record(source: RandomSource) -> dict:
+    """What's needed to recreate `source` (nothing for unseeded sources)"""
+    if not isinstance(source, SeededRandomSource):
+        return {"seed": None, "spawn_key": None}
+    return {"seed": source.seed, "spawn_key": list(source.spawn_key)}
+
+
+def write_plaintext_samples(
+    writer: Union[SampleFileWriter, HexSampleWriter],
+    num_samples: int,
+    size_range: Tuple[int, int],
+    data_types: Sequence[RandomDataType],
+) -> int:
+    """Generates `num_samples` samples of each of `data_types` from the current randomness source
+    and writes them, labeled with their data type. Returns the number written.
+    """
+    metadata = _source_record(get_random_source())
+    for data_type in data_types:
+        for data in gen_plaintext_samples(num_samples, size_range, data_type):
+            writer.append(data, data_type.name, {"data_type": data_type.name, **metadata})
+    return len(writer)
+
+
+def _gen_shard(
+    path: str,
+    num_samples: int,
+    size_range: Tuple[int, int],
+    data_types: list[RandomDataType],
+    source: RandomSource,
+    output_format: OutputFormat,
+    compression: Optional[CompressionType],
+) -> int:
+    with using_random_source(source):
+        with open_sample_writer(path, output_format, compression, _source_record(source)) as writer:
+            return write_plaintext_samples(writer, num_samples, size_range, data_types)
+
+
+def generate_sharded(
+    out_filename: str,
+    num_samples: int,
+    size_range: Tuple[int, int],
+    data_types: Sequence[RandomDataType],
+    workers: Optional[int] = None,
+    start_method: Optional[str] = None,
+    settings: Optional[dict] = None,
+    output_format: OutputFormat = OutputFormat.BINARY,
+    compression: Optional[CompressionType] = None,
+) -> dict:
+    """Generates `num_samples` samples of each of `data_types` across `workers` processes (all CPUs
+    if not given), each writing one shard next to `out_filename`. Randomness streams are spawned
+    from the current randomness source. Writes the manifest (with `settings`, e.g. the command
+    line arguments, for reference) and returns it. Shards are written in `output_format` (with
+    `compression`, see `open_sample_writer`).
+    `start_method` is a `multiprocessing` start method; the platform default is used if not given.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, num_samples))
+    counts = split_count(num_samples, workers)
+    root_source = get_random_source()
+    sources = root_source.spawn(workers)
+    paths = [shard_filename(out_filename, idx) for idx in range(workers)]
+    data_types = list(data_types)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(start_method)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _gen_shard,
+                path,
+                count,
+                tuple(size_range),
+                data_types,
+                source,
+                output_format,
+                compression,
+            )
+            for path, count, source in zip(paths, counts, sources)
+        ]
+        # Re-raises any exception from a worker
+        written = [future.result() for future in futures]
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "mlc_version": CURRENT_VERSION,
+        "rng": root_source.source_type.name,
+        **_source_record(root_source),
+        "num_samples": num_samples,
+        "size_range": list(size_range),
+        "data_types": [data_type.name for data_type in data_types],
+        "format": output_format.name,
+        "compression": None if compression is None else compression.name,
+        "settings": settings or {},
+        "shards": [
+            {
+                # Relative to the manifest
+                "path": os.path.basename(path),
+                "num_samples": num_written,
+                **_source_record(source),
+            }
+            for path, num_written, source in zip(paths, written, sources)
+        ],
+    }
+    with open(manifest_filename(out_filename), "w", encoding="UTF-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
@@ -5,29 +5,41 @@ worth it. If it is worth it, then we can do it later.
 """
 
 import argparse
+import contextlib
 import enum
-
-# TODO: pass work jobs to distributed processing stuff. Especially large
-#       jobs and especially since data will go into a DB.
-import multiprocessing
+import json
 import os
 import sys
 import tempfile
-from typing import Iterable, List, Tuple
+from typing import List, Optional
 
-from mlc.compression import compress, CompressionType
+from mlc.compression import CompressionType
 from mlc.crypto.cipher_types import CipherType
-from mlc.data_gen.data_type_base import DataTypeSettingKey
-from mlc.data_gen.random_data import RandomDataType, rand_int_in_range
+from mlc.data_gen.generate import (
+    generate_sharded,
+    manifest_filename,
+    open_sample_writer,
+    OutputFormat,
+    write_plaintext_samples,
+)
+from mlc.data_gen.random_data import RandomDataType
+from mlc.data_gen.sample_file import SAMPLE_FILE_SUFFIX
 from mlc.utils.config import load_config
 from mlc.utils.io import eprint, LOG, set_up_logger
 from mlc.utils.log_db_handler import DatabaseLogHandler
+from mlc.utils.rand import (
+    make_random_source,
+    RandomSource,
+    RandomSourceType,
+    SeededRandomSource,
+    set_random_source,
+)
 from mlc.startup import pg
 
 
-def _gen_out_filename() -> str:
+def _gen_out_filename(suffix: str) -> str:
     with tempfile.NamedTemporaryFile(
-        prefix="gen_data_", suffix=".csv", delete=False, dir=os.getcwd()
+        prefix="gen_data_", suffix=suffix, delete=False, dir=os.getcwd()
     ) as temp_file:
         return temp_file.name
 
@@ -62,6 +74,18 @@ def _get_argparser() -> argparse.ArgumentParser:
         nargs=2,
         type=int,
     )
+    parser.add_argument(
+        "--output-format",
+        help="BINARY writes a sample file (raw bytes with each sample's label and metadata, "
+        "indexed for random access). HEX writes a line of hex per sample",
+        choices=OutputFormat.names(),
+        default=OutputFormat.BINARY.name,
+    )
+    parser.add_argument(
+        "--output-compression",
+        help="Compress each sample in BINARY output on its own (e.g. ZSTD)",
+        choices=CompressionType.names(),
+    )
     # Compression arguments
     parser.add_argument(
         "--compress",
@@ -87,9 +111,10 @@ def _get_argparser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--key-size",
-        help="Key size (in bits) to use for encryption",
+        help="Key size(s) (in bits) to use for encryption. One for every --cipher or one per cipher",
+        nargs="+",
         type=int,
-        default=256,
+        default=[256],
     )
     parser.add_argument(
         "--num-encryptions",
@@ -97,34 +122,130 @@ def _get_argparser() -> argparse.ArgumentParser:
         default=1,
         type=int,
     )
+    # Randomness arguments
+    parser.add_argument(
+        "--rng",
+        help="Source of randomness. URANDOM is cryptographic but can't be reproduced. The others "
+        "are seeded (fast, not cryptographic) and the seed is recorded so the data can be "
+        "regenerated",
+        choices=RandomSourceType.names(),
+        default=RandomSourceType.URANDOM.name,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed of a seeded --rng. If not given, a new seed is made and recorded",
+        type=int,
+    )
+    parser.add_argument(
+        "--features-output",
+        help="Also calculate the features of every output sample and write them to this feature "
+        "matrix file (row N is the Nth sample of the output)",
+        type=str,
+    )
+    # TODO: pass work jobs to distributed processing stuff. Especially large
+    #       jobs and especially since data will go into a DB.
+    parser.add_argument(
+        "--workers",
+        help="Split the samples across this many processes. Plain generation writes an output "
+        "shard (named after --output) per worker and a manifest of the shards. With compression, "
+        "encryption or features, the pipeline runs in this many processes (all CPUs if not "
+        "given) and writes one output. Each worker has its own randomness stream",
+        type=int,
+    )
     return parser
 
 
-def _gen_plaintext_samples(
-    num_samples: int, size_range: Tuple[int, int], data_type: RandomDataType
-) -> Iterable[bytes]:
-    for _ in range(num_samples):
-        length = rand_int_in_range(size_range[0], size_range[1])
-        yield data_type.generate(
-            {
-                DataTypeSettingKey.LENGTH.name: length,
-            }
-        )
+def _seed_filename(out_filename: str) -> str:
+    return f"{out_filename}.seed.json"
+
+
+def _seed_record(source: RandomSource, parsed_args: argparse.Namespace) -> dict:
+    """What's needed to regenerate the output: the seed (if any) and generation arguments"""
+    seeded = isinstance(source, SeededRandomSource)
+    return {
+        "rng": source.source_type.name,
+        "seed": source.seed if seeded else None,
+        "spawn_key": list(source.spawn_key) if seeded else None,
+        "args": vars(parsed_args),
+    }
 
 
-# TODO: finish data gen (e.g., here)
-def _compress_samples(
-    samples: Iterable[bytes], compression_type: CompressionType
-) -> Iterable[bytes]:
-    for sample in samples:
-        yield compress(sample, compression_type)
+def _record_seed(out_filename: str, source: RandomSource, parsed_args: argparse.Namespace) -> None:
+    """Writes the seed record next to the output"""
+    if not isinstance(source, SeededRandomSource):
+        return
+    record = _seed_record(source, parsed_args)
+    with open(_seed_filename(out_filename), "w", encoding="UTF-8") as handle:
+        json.dump(record, handle, indent=2)
+    LOG.info(
+        "Random data of '%s' is from %s seed %d", out_filename, source.source_type.name, source.seed
+    )
+    print(f"Seed: {source.seed} (recorded in '{_seed_filename(out_filename)}')")
+
+
+def _open_output(out_filename: str, parsed_args: argparse.Namespace, source: RandomSource):
+    return open_sample_writer(
+        out_filename,
+        OutputFormat[parsed_args.output_format],
+        _output_compression(parsed_args),
+        _seed_record(source, parsed_args),
+    )
+
+
+def _output_compression(parsed_args: argparse.Namespace) -> Optional[CompressionType]:
+    if parsed_args.output_compression is None:
+        return None
+    return CompressionType[parsed_args.output_compression]
 
 
-def _encrypt_samples(
-    samples: Iterable[bytes], cipher_type: CipherType, key_size_bits: int
-) -> Iterable[bytes]:
-    for sample in samples:
-        yield _encrypt_sample(sample, cipher_type, key_size_bits)
+def _write_pipeline_output(
+    out_filename: str,
+    parsed_args: argparse.Namespace,
+    data_types: List[RandomDataType],
+    source: RandomSource,
+) -> None:
+    """Runs the generate -> compress -> encrypt -> featurize pipeline and writes its output"""
+    # Imported here so plain generation doesn't load numpy, the ciphers and the analysis modules
+    import numpy as np
+
+    from mlc.anal.features import DEFAULT_FILE_BATCH_SIZE, feature_names
+    from mlc.anal.matrix_file import FeatureMatrixWriter
+    from mlc.data_gen.pipeline import PipelineConfig, run_pipeline
+
+    names = feature_names() if parsed_args.features_output else None
+    config = PipelineConfig(
+        data_types=data_types,
+        num_samples=parsed_args.num_samples,
+        size_range=tuple(parsed_args.size_range),
+        compression=CompressionType[parsed_args.compress] if parsed_args.compress else None,
+        keep_uncompressed=parsed_args.keep_uncompressed,
+        ciphers=[CipherType[cipher] for cipher in parsed_args.cipher],
+        key_sizes=parsed_args.key_size,
+        num_encryptions=parsed_args.num_encryptions,
+        feature_names=names,
+    )
+    if names is not None and os.path.exists(parsed_args.features_output):
+        # Replaced like the output, instead of appending this run's rows to an old file's
+        os.remove(parsed_args.features_output)
+    rows = []
+    with contextlib.ExitStack() as stack:
+        output = stack.enter_context(_open_output(out_filename, parsed_args, source))
+        writer = (
+            None
+            if names is None
+            else stack.enter_context(FeatureMatrixWriter(parsed_args.features_output, names))
+        )
+        for record in run_pipeline(config, workers=parsed_args.workers):
+            output.append(record.data, record.label, record.metadata)
+            if writer is not None:
+                rows.append(record.features)
+                if len(rows) == DEFAULT_FILE_BATCH_SIZE:
+                    writer.append(np.stack(rows))
+                    rows = []
+        if writer is not None and rows:
+            writer.append(np.stack(rows))
+    if names is not None:
+        print(f"Wrote features to file '{parsed_args.features_output}'")
 
 
 def main(args: List[str]) -> int:
@@ -132,7 +253,10 @@ def main(args: List[str]) -> int:
 
     parser = _get_argparser()
     parsed_args = parser.parse_args(args)
-    out_filename = parsed_args.output or _gen_out_filename()
+    output_format = OutputFormat[parsed_args.output_format]
+    out_filename = parsed_args.output or _gen_out_filename(
+        SAMPLE_FILE_SUFFIX if output_format == OutputFormat.BINARY else ".csv"
+    )
 
     config = load_config()
     db_manager = pg.set_up_db(
@@ -141,10 +265,31 @@ def main(args: List[str]) -> int:
     set_up_logger(additional_handlers=DatabaseLogHandler(db_manager))
 
     # Some validation
-    if parsed_args.cipher or parsed_args.key_size:
-        if len(parsed_args.cipher) != len(parsed_args.key_size):
-            eprint("Number of ciphers must equal number of key sizes")
+    if len(parsed_args.key_size) != 1 and len(parsed_args.cipher) != len(parsed_args.key_size):
+        eprint("Give one key size for every cipher or one per cipher")
+        return 1
+    if parsed_args.num_encryptions < 1:
+        eprint("Number of encryptions must be positive")
+        return 1
+    if parsed_args.cipher:
+        # Only loads the cipher libraries when encrypting
+        from mlc.crypto.ciphers import CIPHER_FUNCS
+
+        unsupported = [
+            cipher for cipher in parsed_args.cipher if CipherType[cipher] not in CIPHER_FUNCS
+        ]
+        if unsupported:
+            eprint(
+                f"Unsupported cipher(s): {unsupported}. Supported: "
+                f"{[cipher.name for cipher in CIPHER_FUNCS]}"
+            )
             return 1
+    if parsed_args.output_compression and output_format == OutputFormat.HEX:
+        eprint("Only BINARY output can be compressed")
+        return 1
+    if parsed_args.seed is not None and parsed_args.rng == RandomSourceType.URANDOM.name:
+        eprint("A seed needs a seeded --rng")
+        return 1
 
     if parsed_args.random_data:
         if not parsed_args.size_range:
@@ -155,17 +300,46 @@ def main(args: List[str]) -> int:
                 "Number of samples (must be positive) is required when " "generating random data"
             )
             return 1
+        if parsed_args.workers is not None and parsed_args.workers < 1:
+            eprint("Number of workers must be positive")
+            return 1
+
+        source = make_random_source(RandomSourceType[parsed_args.rng], parsed_args.seed)
+        set_random_source(source)
+        data_types = [RandomDataType[data_type] for data_type in parsed_args.random_data]
 
+        if parsed_args.compress or parsed_args.cipher or parsed_args.features_output:
+            _record_seed(out_filename, source, parsed_args)
+            print(f"Writing to file '{out_filename}'")
+            _write_pipeline_output(out_filename, parsed_args, data_types, source)
+            print(f"Wrote data to file '{out_filename}'")
+            return 0
+
+        if parsed_args.workers:
+            manifest = generate_sharded(
+                out_filename,
+                parsed_args.num_samples,
+                parsed_args.size_range,
+                data_types,
+                workers=parsed_args.workers,
+                settings=vars(parsed_args),
+                output_format=output_format,
+                compression=_output_compression(parsed_args),
+            )
+            if manifest["seed"] is not None:
+                print(f"Seed: {manifest['seed']}")
+            print(
+                f"Wrote {len(manifest['shards'])} shards, listed in "
+                f"'{manifest_filename(out_filename)}'"
+            )
+            return 0
+
+        _record_seed(out_filename, source, parsed_args)
         print(f"Writing to file '{out_filename}'")
-        with open(out_filename, "w") as handle:
-            for data_type in parsed_args.random_data:
-                for data in _gen_plaintext_samples(
-                    parsed_args.num_samples,
-                    parsed_args.size_range,
-                    RandomDataType[data_type],
-                ):
-                    handle.write(data.hex())
-                    handle.write("\n")
+        with _open_output(out_filename, parsed_args, source) as output:
+            write_plaintext_samples(
+                output, parsed_args.num_samples, parsed_args.size_range, data_types
+            )
         print(f"Wrote data to file '{out_filename}'")
 
     return 0
@@ -0,0 +1,226 @@
+"""Streaming generate -> compress -> encrypt -> featurize pipeline.
+Samples are numbered and processed in chunks of consecutive numbers. A worker process runs every
+stage on its chunk: each plaintext is generated, optionally compressed (`mlc.compression`), emitted
+as is and encrypted `num_encryptions` times with each cipher (`mlc.crypto`), and then the features
+of the chunk's outputs are optionally calculated in one batch. Running the stages together in the
+worker means samples are never pickled between stages; only a chunk's finished records go back.
+Chunks go through a process pool with at most `max_pending` in flight, which bounds the queue
+between the workers and the consumer: records are yielded in sample order as the oldest chunk
+finishes, so memory stays flat however large the job is, and every worker stays busy.
+
+Each sample's randomness (its length, contents, keys and IVs) comes from its own stream of the
+current randomness source, keyed by `PIPELINE_STREAM_ID` and the sample number (see
+`RandomSource.stream`). With a seeded source the output is the same whatever the number of workers
+or chunk size, and any one sample can be regenerated from the seed and its spawn key.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+import multiprocessing
+import os
+from typing import Deque, Iterator, Optional, Tuple
+
+import numpy as np
+
+from mlc.anal.features import calculate_features_batch
+from mlc.compression import compress, CompressionType
+from mlc.crypto.cipher_types import CipherType
+from mlc.crypto.ciphers import CIPHER_FUNCS, encrypt, random_cipher_metadata
+from mlc.data_gen.generate import gen_plaintext_samples
+from mlc.data_gen.random_data import RandomDataType
+from mlc.utils.rand import (
+    get_random_source,
+    RandomSource,
+    SeededRandomSource,
+    using_random_source,
+)
+
+
+# Samples per chunk sent to a worker
+DEFAULT_CHUNK_SIZE: int = 64
+# Chunks in flight per worker
+DEFAULT_PENDING_PER_WORKER: int = 2
+# First element of the sample streams' keys ("pipeline"), so they never collide with streams
+# spawned from the same source (`SeedSequence.spawn` numbers its children from 0)
+PIPELINE_STREAM_ID: int = 0x706970656C696E65
+
+
+@dataclass
+class PipelineConfig:
+    """What a pipeline run generates. `num_samples` plaintexts are generated of each data type.
+    `key_sizes` (bits) has one size for every cipher or one per cipher. No features are calculated
+    if `feature_names` is None.
+    """
+
+    data_types: list[RandomDataType]
+    num_samples: int
+    size_range: Tuple[int, int]
+    compression: Optional[CompressionType] = None
+    keep_uncompressed: bool = False
+    ciphers: list[CipherType] = field(default_factory=list)
+    key_sizes: list[int] = field(default_factory=lambda: [256])
+    num_encryptions: int = 1
+    feature_names: Optional[list[str]] = None
+
+    def __post_init__(self):
+        if len(self.key_sizes) != 1 and len(self.key_sizes) != len(self.ciphers):
+            raise ValueError("Give one key size for every cipher or one per cipher")
+        if self.num_encryptions < 1:
+            raise ValueError("Number of encryptions must be positive")
+        unsupported = [cipher.name for cipher in self.ciphers if cipher not in CIPHER_FUNCS]
+        if unsupported:
+            raise ValueError(f"Unsupported cipher(s): {unsupported}")
+
+    @property
+    def total_samples(self) -> int:
+        return len(self.data_types) * self.num_samples
+
+    def key_size(self, cipher_idx: int) -> int:
+        return self.key_sizes[0] if len(self.key_sizes) == 1 else self.key_sizes[cipher_idx]
+
+
+@dataclass
+class PipelineRecord:
+    """One output of the pipeline. Every record made from a plaintext has its `sample_id`.
+    `seed` and `spawn_key` identify the sample's randomness stream (None if not seeded).
+    """
+
+    sample_id: int
+    data_type: str
+    data: bytes
+    compression: Optional[str] = None
+    cipher: Optional[str] = None
+    key_size: Optional[int] = None
+    # Which of the sample's `num_encryptions` encryptions with `cipher`
+    encryption: Optional[int] = None
+    seed: Optional[int] = None
+    spawn_key: Optional[Tuple[int, ...]] = None
+    features: Optional[np.ndarray] = None
+
+    @property
+    def label(self) -> str:
+        """What the data is, by its outermost layer: the cipher, else the compression, else the
+        data type
+        """
+        return self.cipher or self.compression or self.data_type
+
+    @property
+    def metadata(self) -> dict:
+        """Everything but the data and features, e.g. for a sample file record"""
+        metadata = {
+            name: value for name, value in vars(self).items() if name not in ("data", "features")
+        }
+        if self.spawn_key is not None:
+            metadata["spawn_key"] = list(self.spawn_key)
+        return metadata
+
+
+def _generate(config: PipelineConfig, sample_id: int, source: RandomSource) -> PipelineRecord:
+    data_type = config.data_types[sample_id // config.num_samples]
+    seeded = isinstance(source, SeededRandomSource)
+    return PipelineRecord(
+        sample_id=sample_id,
+        data_type=data_type.name,
+        data=next(gen_plaintext_samples(1, config.size_range, data_type)),
+        seed=source.seed if seeded else None,
+        spawn_key=source.spawn_key if seeded else None,
+    )
+
+
+def _compress(config: PipelineConfig, record: PipelineRecord) -> list[PipelineRecord]:
+    if config.compression is None:
+        return [record]
+    compressed = replace(
+        record,
+        data=compress(record.data, config.compression),
+        compression=config.compression.name,
+    )
+    return [record, compressed] if config.keep_uncompressed else [compressed]
+
+
+def _encrypt(config: PipelineConfig, record: PipelineRecord) -> list[PipelineRecord]:
+    records = [record]
+    for cipher_idx, cipher in enumerate(config.ciphers):
+        key_size = config.key_size(cipher_idx)
+        for encryption in range(config.num_encryptions):
+            metadata = random_cipher_metadata(cipher, key_size)
+            records.append(
+                replace(
+                    record,
+                    data=encrypt(metadata, record.data),
+                    cipher=cipher.name,
+                    key_size=key_size,
+                    encryption=encryption,
+                )
+            )
+    return records
+
+
+def _featurize(config: PipelineConfig, records: list[PipelineRecord]) -> None:
+    if config.feature_names is None or not records:
+        return
+    matrix, _ = calculate_features_batch([record.data for record in records], config.feature_names)
+    for record, row in zip(records, matrix):
+        record.features = row
+
+
+def _run_chunk(
+    config: PipelineConfig, source: RandomSource, start: int, stop: int
+) -> list[PipelineRecord]:
+    records = []
+    for sample_id in range(start, stop):
+        sample_source = source.stream((PIPELINE_STREAM_ID, sample_id))
+        with using_random_source(sample_source):
+            plaintext = _generate(config, sample_id, sample_source)
+            for record in _compress(config, plaintext):
+                records += _encrypt(config, record)
+    _featurize(config, records)
+    return records
+
+
+def run_pipeline(
+    config: PipelineConfig,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_pending: Optional[int] = None,
+    start_method: Optional[str] = None,
+) -> Iterator[PipelineRecord]:
+    """Runs the pipeline of `config` across `workers` processes (all CPUs if not given; in this
+    process if 1), with randomness from the current source. Yields records in sample order.
+    At most `max_pending` chunks (2 per worker if not given) are in flight or waiting to be
+    consumed. `start_method` is a `multiprocessing` start method; the platform default is used if
+    not given.
+    """
+    source = get_random_source()
+    total = config.total_samples
+    # Lazily, so the chunk list doesn't grow with the job
+    chunks = ((start, min(start + chunk_size, total)) for start in range(0, total, chunk_size))
+    num_chunks = -(-total // chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or num_chunks <= 1:
+        for start, stop in chunks:
+            yield from _run_chunk(config, source, start, stop)
+        return
+
+    max_pending = max(1, max_pending or DEFAULT_PENDING_PER_WORKER * workers)
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, num_chunks), mp_context=multiprocessing.get_context(start_method)
+    )
+    pending: Deque[Future] = deque()
+
+    def submit_next() -> None:
+        chunk = next(chunks, None)
+        if chunk is not None:
+            pending.append(executor.submit(_run_chunk, config, source, *chunk))
+
+    try:
+        for _ in range(max_pending):
+            submit_next()
+        while pending:
+            # Re-raises any exception from the worker
+            records = pending.popleft().result()
+            submit_next()
+            yield from records
+    finally:
+        executor.shutdown(cancel_futures=True)
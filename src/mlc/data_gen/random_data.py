@@ -1,10 +1,17 @@
-"""Random data"""
+"""Random data.
+Byte sequences are generated in bulk: all the random bytes a sample needs are read with one
+call to the current randomness source (see `mlc.utils.rand`; `os.urandom` unless a seeded source is
+set) and mapped to the wanted range (and sparsity mask) with NumPy. Integers in a range are drawn
+without modulo bias: draws at or above the largest multiple of the range size that fits are rejected
+and drawn again.
+"""
 
 from enum import auto
-import os
 import struct
 from typing import Any
 
+import numpy as np
+
 from mlc.data_gen.data_type_base import DataTypeBase, DataTypeSettingKey
 from mlc.utils.rand import rand_bytes
 
@@ -35,22 +42,72 @@ class RandomDataType(DataTypeBase):
 
         if self == RandomDataType.SPARSE_ASCII:
             return rand_sparse_ascii_bytes(
-                length, sparse_percent=sparse_percent, sparse_byte=sparse_byte
+                length, percent_sparse=sparse_percent, sparse_byte=sparse_byte
             )
         if self == RandomDataType.SPARSE_BINARY:
-            return rand_sparse_bytes(length, sparse_percent=sparse_percent, sparse_byte=sparse_byte)
+            return rand_sparse_bytes(length, percent_sparse=sparse_percent, sparse_byte=sparse_byte)
         raise ValueError(f"Invalid data type '{self.value}'")
 
 
+def _rejection_limit(span: int, num_bits: int) -> int:
+    """Largest multiple of `span` that's at most 2 ** `num_bits`. Uniform `num_bits` bit draws below
+    it are uniform modulo `span`.
+    """
+    space = 1 << num_bits
+    return space - space % span
+
+
 def rand_int_in_range(low: int, high: int) -> int:
     """Generates a random integer that is in range [low, high) (`low` is
     inclusive, `high` is exclusive).
     """
-    return (int.from_bytes(os.urandom(4), byteorder="little") % (high - low)) + low
+    span = high - low
+    num_bytes = max(4, ((span - 1).bit_length() + 7) // 8)
+    limit = _rejection_limit(span, num_bytes * 8)
+    while True:
+        value = int.from_bytes(rand_bytes(num_bytes), byteorder="little")
+        if value < limit:
+            return (value % span) + low
+
+
+def rand_ints_in_range(count: int, low: int, high: int) -> np.ndarray:
+    """`count` random integers in range [low, high) as an int64 array, from as few random byte
+    reads as possible (almost always one). Draws are the smallest unsigned ints that cover the
+    range.
+    """
+    span = high - low
+    if span <= 0:
+        raise ValueError(f"Empty range [{low}, {high})")
+    if low < -(2**63) or high > 2**63 or span > 2**63:
+        raise ValueError(f"Range [{low}, {high}) doesn't fit in int64")
+    num_bytes = next(size for size in (1, 2, 4, 8) if span <= 1 << (size * 8))
+    dtype = np.dtype(f"<u{num_bytes}")
+    space = 1 << (num_bytes * 8)
+    limit = _rejection_limit(span, num_bytes * 8)
+    values = np.empty(count, dtype=np.int64)
+    filled = 0
+    while filled < count:
+        remaining = count - filled
+        # Expected number of draws needed for the rest, plus some slack so one call is almost
+        # always enough
+        num_draws = remaining * space // limit * 101 // 100 + 64
+        draws = np.frombuffer(rand_bytes(num_draws * num_bytes), dtype=dtype)
+        if span < space:
+            draws = draws[draws < limit] % span
+        draws = draws[:remaining]
+        values[filled : filled + len(draws)] = draws
+        filled += len(draws)
+    values += low
+    return values
+
+
+def _sparse_mask(length: int, percent_sparse: float) -> np.ndarray:
+    # Roughly `percent_sparse` of bytes are chosen (a draw in [0, 100] at most `percent_sparse`)
+    return rand_ints_in_range(length, 0, 101) <= percent_sparse
 
 
 def _rand_val_from_struct_fmt(struct_fmt: str):
-    return struct.unpack(struct_fmt, os.urandom(struct.calcsize(struct_fmt)))[0]
+    return struct.unpack(struct_fmt, rand_bytes(struct.calcsize(struct_fmt)))[0]
 
 
 def rand_uint64() -> int:
@@ -107,10 +164,9 @@ def rand_bytes_in_range(length: int, low: int, high: int) -> bytes:
     """Generate random bytes of length `length` where each value is in range
     [low, high).
     """
-    data = bytearray(length)
-    for i in range(length):
-        data[i] = rand_int_in_range(low, high)
-    return bytes(data)
+    if low < 0 or high > 256:
+        raise ValueError(f"Byte values must be in range [0, 256), got [{low}, {high})")
+    return rand_ints_in_range(length, low, high).astype(np.uint8).tobytes()
 
 
 def rand_ascii_bytes(length: int) -> bytes:
@@ -127,12 +183,9 @@ def rand_sparse_bytes(length: int, percent_sparse: float = 60.0, sparse_byte: in
     """Generate random bytes of length `length` that is roughly
     `percent_sparse` percent sparse where "sparse" just means `sparse_byte`.
     """
-    data = bytearray(rand_bytes(length))
-    for i in range(length):
-        # Roughly `percent_sparse` of bytes will be turned into `sparse_byte`
-        if rand_int_in_range(0, 101) <= percent_sparse:
-            data[i] = sparse_byte
-    return bytes(data)
+    data = np.frombuffer(rand_bytes(length), dtype=np.uint8).copy()
+    data[_sparse_mask(length, percent_sparse)] = sparse_byte
+    return data.tobytes()
 
 
 def rand_sparse_ascii_bytes(
@@ -142,12 +195,9 @@ def rand_sparse_ascii_bytes(
     `percent_sparse` percent sparse where "sparse" just means `sparse_byte`.
     The data is standard ASCII except for the `sparse_byte` values.
     """
-    data = bytearray(rand_ascii_bytes(length))
-    for i in range(length):
-        # Roughly `percent_sparse` of bytes will be turned into 0
-        if rand_int_in_range(0, 101) <= percent_sparse:
-            data[i] = sparse_byte
-    return bytes(data)
+    data = np.frombuffer(rand_ascii_bytes(length), dtype=np.uint8).copy()
+    data[_sparse_mask(length, percent_sparse)] = sparse_byte
+    return data.tobytes()
 
 
 def rand_sparse_ascii_str(length: int, percent_sparse: float = 60.0, sparse_byte: int = 0) -> str:
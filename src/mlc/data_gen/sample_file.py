@@ -0,0 +1,203 @@
+"""Binary files of generated samples.
+A file is a header, the records one after the other, and an index footer with the offset of every
+record, so any record is found in O(1) without scanning. Each record is its data's length prefix,
+its JSON metadata (label, data type, compression, cipher, seed, etc.) and the raw data bytes.
+The data of each record can be compressed as its own frame (e.g. zstd), so records stay randomly
+accessible. Readers memory map the file and return data as `memoryview` slices of the map, without
+copying (compressed data is decompressed into a new buffer).
+
+Layout (little endian):
+    MAGIC, u32 header length, JSON header {"version", "compression", "metadata"}
+    per record: u64 data length, u32 metadata length, JSON metadata {"label", ...}, data
+    index: u64 offset of each record
+    footer: u64 number of records, u64 index offset, FOOTER_MAGIC
+"""
+
+from dataclasses import dataclass
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, Optional, Union
+
+import numpy as np
+
+from mlc.compression import compress, CompressionType, decompress
+
+
+MAGIC: bytes = b"MLCSMPL1"
+FOOTER_MAGIC: bytes = b"MLCSIDX1"
+FORMAT_VERSION: int = 1
+SAMPLE_FILE_SUFFIX: str = ".mlcs"
+# zstd level used unless a `level` compression kwarg is given. The default (max) level is too slow
+# for writing lots of samples.
+DEFAULT_ZSTD_LEVEL: int = 3
+LABEL_KEY: str = "label"
+_HEADER_LEN = struct.Struct("<I")
+_RECORD_PREFIX = struct.Struct("<QI")
+_FOOTER = struct.Struct(f"<QQ{len(FOOTER_MAGIC)}s")
+_OFFSET_DTYPE: np.dtype = np.dtype("<u8")
+
+
+@dataclass
+class SampleRecord:
+    """A sample read from a sample file"""
+
+    data: memoryview
+    label: Optional[str]
+    metadata: Dict[str, Any]
+
+
+class SampleFileWriter:
+    """Writes a new sample file (replacing any existing one). The index is written on `close`, or
+    on leaving a `with` block without an exception (the file of a failed block has no index, so it
+    can't be mistaken for a complete one).
+    `compression` (None for uncompressed) and `compression_kwargs` are passed to
+    `mlc.compression.compress` for the data of every record. `metadata` is stored in the header
+    (e.g. generation settings).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        compression: Optional[CompressionType] = None,
+        compression_kwargs: Optional[Dict] = None,
+        metadata: Optional[Dict] = None,
+    ):
+        self.path = path
+        self.compression = compression
+        self.compression_kwargs = dict(compression_kwargs or {})
+        if compression == CompressionType.ZSTD:
+            self.compression_kwargs.setdefault("level", DEFAULT_ZSTD_LEVEL)
+        self._offsets: list[int] = []
+        self._handle = open(path, "wb")
+        header = json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "compression": None if compression is None else compression.name,
+                "metadata": metadata or {},
+            },
+            separators=(",", ":"),
+            default=str,
+        ).encode()
+        self._handle.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+        self._offset = self._handle.tell()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(
+        self, data: bytes, label: Optional[str] = None, metadata: Optional[Dict] = None
+    ) -> int:
+        """Writes a record. Returns its index."""
+        if self.compression is not None:
+            data = compress(bytes(data), self.compression, dict(self.compression_kwargs))
+        encoded = json.dumps(
+            {LABEL_KEY: label, **(metadata or {})}, separators=(",", ":"), default=str
+        ).encode()
+        self._offsets.append(self._offset)
+        self._handle.write(_RECORD_PREFIX.pack(len(data), len(encoded)))
+        self._handle.write(encoded)
+        self._handle.write(data)
+        self._offset += _RECORD_PREFIX.size + len(encoded) + len(data)
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self._handle.write(np.asarray(self._offsets, dtype=_OFFSET_DTYPE).tobytes())
+        self._handle.write(_FOOTER.pack(len(self._offsets), self._offset, FOOTER_MAGIC))
+        self._handle.close()
+
+    def __enter__(self) -> "SampleFileWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self._handle.close()
+
+
+class SampleFile:
+    """Memory mapped reader of a sample file. Uncompressed data are `memoryview` slices of the
+    map, so nothing is copied; drop them before closing the file (the map stays open as long as
+    any are in use).
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError("Not a sample file")
+            (header_len,) = _HEADER_LEN.unpack(handle.read(_HEADER_LEN.size))
+            header = json.loads(handle.read(header_len))
+            if header["version"] > FORMAT_VERSION:
+                raise ValueError(f"Unsupported sample file version {header['version']}")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        self.metadata: Dict[str, Any] = header["metadata"]
+        self.compression = (
+            None if header["compression"] is None else CompressionType[header["compression"]]
+        )
+
+        if len(self._buf) < len(MAGIC) + _HEADER_LEN.size + header_len + _FOOTER.size:
+            raise ValueError("Sample file has no index (it wasn't closed after writing)")
+        num_records, index_offset, footer_magic = _FOOTER.unpack_from(
+            self._buf, len(self._buf) - _FOOTER.size
+        )
+        index_end = index_offset + num_records * _OFFSET_DTYPE.itemsize
+        if footer_magic != FOOTER_MAGIC or index_end != len(self._buf) - _FOOTER.size:
+            raise ValueError("Sample file has no index (it wasn't closed after writing)")
+        self._offsets = np.frombuffer(self._buf[index_offset:index_end], dtype=_OFFSET_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _locate(self, idx: int) -> tuple[int, int, int]:
+        """Offsets of record `idx`'s metadata and data, and its data length"""
+        if not -len(self) <= idx < len(self):
+            raise IndexError(f"Record {idx} is out of range for {len(self)} records")
+        offset = int(self._offsets[idx])
+        data_len, metadata_len = _RECORD_PREFIX.unpack_from(self._buf, offset)
+        metadata_offset = offset + _RECORD_PREFIX.size
+        return metadata_offset, metadata_offset + metadata_len, data_len
+
+    def data(self, idx: int) -> memoryview:
+        """Data of record `idx`"""
+        _, data_offset, data_len = self._locate(idx)
+        data = self._buf[data_offset : data_offset + data_len]
+        if self.compression is None:
+            return data
+        return memoryview(decompress(bytes(data), self.compression))
+
+    def record_metadata(self, idx: int) -> Dict[str, Any]:
+        """Metadata of record `idx`, including its label"""
+        metadata_offset, data_offset, _ = self._locate(idx)
+        return json.loads(bytes(self._buf[metadata_offset:data_offset]))
+
+    def label(self, idx: int) -> Optional[str]:
+        return self.record_metadata(idx)[LABEL_KEY]
+
+    def __getitem__(self, idx: int) -> SampleRecord:
+        metadata = self.record_metadata(idx)
+        return SampleRecord(self.data(idx), metadata.pop(LABEL_KEY), metadata)
+
+    def __iter__(self) -> Iterator[SampleRecord]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def close(self) -> None:
+        # The offsets are a view of the map. Releasing and closing again does nothing.
+        self._offsets = np.zeros(0, dtype=_OFFSET_DTYPE)
+        self._buf.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Data views are still in use. The map is closed once they're dropped.
+            pass
+
+    def __enter__(self) -> "SampleFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -3,7 +3,7 @@
 from dataclasses import dataclass
 import logging
 import logging.handlers
-from pathlin import Path
+from pathlib import Path
 import os
 import shutil
 import sys
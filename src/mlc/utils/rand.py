@@ -1,6 +1,150 @@
+"""Random bytes.
+Everything that generates random data reads bytes from the current randomness source:
+- `OSRandomSource` (the default): cryptographic `os.urandom`
+- `SeededRandomSource`: a `numpy.random.Generator` (PCG64 or Philox) seeded from a
+  `numpy.random.SeedSequence`. The same seed gives the same bytes, so generated data can be
+  regenerated instead of stored. Independent streams (e.g. one per worker) come from `spawn`, or
+  from `stream` with a key of one's own (e.g. a sample number) when they must not depend on order.
+The current source is per process. Set it with `set_random_source` or `using_random_source`.
+"""
+
+from contextlib import contextmanager
+from enum import auto
 import os
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from mlc.utils.better_enum import BetterEnum
+
+
+class RandomSourceType(BetterEnum):
+    """Kinds of randomness source"""
+
+    URANDOM = auto()
+    PCG64 = auto()
+    PHILOX = auto()
+
+
+_BIT_GENERATORS = {
+    RandomSourceType.PCG64: np.random.PCG64,
+    RandomSourceType.PHILOX: np.random.Philox,
+}
+
+
+class RandomSource:
+    """Source of random bytes"""
+
+    source_type: RandomSourceType
+
+    def bytes(self, num_bytes: int) -> bytes:
+        raise NotImplementedError("No specific randomness source")
+
+    def spawn(self, num_streams: int) -> list["RandomSource"]:
+        """`num_streams` independent sources, e.g. one per worker"""
+        raise NotImplementedError("No specific randomness source")
+
+    def stream(self, key: Sequence[int]) -> "RandomSource":
+        """The independent source identified by `key` (the same key gives the same stream)"""
+        raise NotImplementedError("No specific randomness source")
+
+
+class OSRandomSource(RandomSource):
+    """Cryptographic random bytes from `os.urandom`. Can't be reproduced."""
+
+    source_type = RandomSourceType.URANDOM
+
+    def bytes(self, num_bytes: int) -> bytes:
+        return os.urandom(num_bytes)
+
+    def spawn(self, num_streams: int) -> list[RandomSource]:
+        return [OSRandomSource() for _ in range(num_streams)]
+
+    def stream(self, key: Sequence[int]) -> RandomSource:
+        return self
+
+
+class SeededRandomSource(RandomSource):
+    """Reproducible random bytes from a seeded `numpy.random.Generator`. Not cryptographic.
+    `seed` is the root seed (a new one from OS entropy if not given) and `spawn_key` identifies a
+    stream spawned from it; together they regenerate the same bytes.
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        source_type: RandomSourceType = RandomSourceType.PCG64,
+        spawn_key: Sequence[int] = (),
+    ):
+        if source_type not in _BIT_GENERATORS:
+            raise ValueError(f"'{source_type.name}' is not a seeded randomness source")
+        self.source_type = source_type
+        self.seed_sequence = np.random.SeedSequence(seed, spawn_key=tuple(spawn_key))
+        self.generator = np.random.Generator(_BIT_GENERATORS[source_type](self.seed_sequence))
+
+    @property
+    def seed(self) -> int:
+        return self.seed_sequence.entropy
+
+    @property
+    def spawn_key(self) -> tuple[int, ...]:
+        return self.seed_sequence.spawn_key
+
+    def bytes(self, num_bytes: int) -> bytes:
+        return self.generator.bytes(num_bytes)
+
+    def spawn(self, num_streams: int) -> list[RandomSource]:
+        """`num_streams` independent sources from `SeedSequence.spawn`. Spawning again gives new
+        streams (the children's spawn keys continue from the last spawn).
+        """
+        return [
+            SeededRandomSource(child.entropy, self.source_type, child.spawn_key)
+            for child in self.seed_sequence.spawn(num_streams)
+        ]
+
+    def stream(self, key: Sequence[int]) -> RandomSource:
+        """Source with `key` appended to this one's spawn key. Use keys that `spawn` won't (e.g.
+        longer ones) to keep the streams independent of spawned ones.
+        """
+        return SeededRandomSource(self.seed, self.source_type, self.spawn_key + tuple(key))
+
+
+def make_random_source(
+    source_type: RandomSourceType = RandomSourceType.URANDOM, seed: Optional[int] = None
+) -> RandomSource:
+    """Randomness source of `source_type`. `seed` is only valid for seeded sources."""
+    if source_type == RandomSourceType.URANDOM:
+        if seed is not None:
+            raise ValueError("os.urandom can't be seeded")
+        return OSRandomSource()
+    return SeededRandomSource(seed, source_type)
+
+
+_SOURCE: RandomSource = OSRandomSource()
+
+
+def get_random_source() -> RandomSource:
+    """The current randomness source"""
+    return _SOURCE
+
+
+def set_random_source(source: RandomSource) -> RandomSource:
+    """Makes `source` the current randomness source. Returns the previous one."""
+    global _SOURCE
+    previous, _SOURCE = _SOURCE, source
+    return previous
+
+
+@contextmanager
+def using_random_source(source: RandomSource) -> Iterator[RandomSource]:
+    """Context in which `source` is the current randomness source"""
+    previous = set_random_source(source)
+    try:
+        yield source
+    finally:
+        set_random_source(previous)
 
 
 def rand_bytes(num_bytes: int) -> bytes:
-    """Generate `num_bytes` random bytes"""
-    return os.urandom(num_bytes)
+    """Generate `num_bytes` random bytes from the current randomness source"""
+    return _SOURCE.bytes(num_bytes)
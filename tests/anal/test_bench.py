@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from mlc.anal.bench import (
+    bench_features,
+    cold_import_time_us,
+    feature_call,
+    imported_heavy_modules,
+    main,
+    scaling_exponent,
+    slowest_features,
+)
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS
+from mlc.data_gen.random_data import RandomDataType
+
+
+def test_binary_import_does_not_load_heavy_modules():
+    # Neither numpy nor the compressors
+    assert imported_heavy_modules("mlc.anal.binary") == []
+    assert imported_heavy_modules("mlc.anal.features") == ["numpy"]
+
+
+def test_cold_import_time():
+    assert cold_import_time_us("mlc.anal.binary") > 0
+
+
+def test_scaling_exponent():
+    assert scaling_exponent([64, 128, 256], [10.0, 20.0, 40.0]) == pytest.approx(1.0)
+    assert scaling_exponent([64, 128], [10.0, 40.0]) == pytest.approx(2.0)
+    assert scaling_exponent([64], [10.0]) is None
+
+
+def test_bench_features():
+    results = bench_features(
+        sizes=[64, 256],
+        data_types=[RandomDataType.BINARY, RandomDataType.SPARSE_ASCII],
+        include=["calc_entropy", "average_block_max"],
+        repeat=1,
+    )
+    assert set(results) == {"calc_entropy", "average_block_max"}
+    per_size = results["calc_entropy"]["BINARY"]["sizes"]
+    assert per_size[64]["ns_per_byte"] == pytest.approx(per_size[64]["ns"] / 64)
+    assert per_size[256]["peak_alloc_bytes"] > 0
+    assert results["calc_entropy"]["SPARSE_ASCII"]["scaling_exponent"] is not None
+    assert [cost["feature"] for cost in slowest_features(results, 1)] in (
+        ["calc_entropy"],
+        ["average_block_max"],
+    )
+
+    with pytest.raises(ValueError):
+        bench_features(sizes=[32], include=["calc_entropy"])
+
+
+def test_feature_call():
+    data = bytes(range(256)) * 4
+    # The calculation path by default, the registry function for reference
+    assert feature_call("calc_entropy")(data) == {"calc_entropy": 8.0}
+    assert feature_call("calc_entropy", reference=True) is BYTE_ARRAY_ANAL_FUNCS["calc_entropy"]
+    matrix, names = feature_call("percent_bytes_equal", pair=True)(data, data)
+    assert names == ["percent_bytes_equal"]
+    assert matrix[0, 0] == 100.0
+
+    results = bench_features(sizes=[64], include=["calc_entropy"], repeat=1, reference=True)
+    assert results["calc_entropy"]["BINARY"]["sizes"][64]["ns"] > 0
+
+
+def test_bench_pair_features(tmp_path):
+    output = tmp_path / "bench.json"
+    main(
+        [
+            "--benchmarks",
+            "pair_features",
+            "--sizes",
+            "64",
+            "128",
+            "--data-types",
+            "ASCII",
+            "--include",
+            "percent_bytes_equal",
+            "--repeat",
+            "1",
+            "--output",
+            str(output),
+        ]
+    )
+    results = json.loads(output.read_text())
+    assert set(results) == {"environment", "pair_features", "slowest_pair_features"}
+    assert list(results["pair_features"]) == ["percent_bytes_equal"]
+    assert set(results["pair_features"]["percent_bytes_equal"]["ASCII"]["sizes"]) == {"64", "128"}
@@ -1,5 +1,10 @@
+from collections import Counter
+import math
+import os
 import struct
 
+import pytest
+
 from mlc.anal.binary import (
     average_abs_difference_between_byte_arrays,
     average_abs_difference_between_bytes,
@@ -7,7 +12,12 @@ from mlc.anal.binary import (
     average_byte_int,
     average_num_bits_off,
     average_num_bits_on,
+    block_view,
+    blocks,
     break_bytes,
+    BYTE_ARRAY_ANAL_FUNCS,
+    calculate_histogram_features,
+    HISTOGRAM_FEATURE_NAMES,
     most_common_byte,
     percent_bits_equal,
     percent_bytes_with_bit_x_on,
@@ -144,3 +154,32 @@ def test_break_bytes_2_bytes_with_truncation():
         for boole in (True, False):
             for byte_val in range(0xFF + 1):
                 _break_bytes_test(struct.pack("<B", byte_val), [2, endian, boole], [])
+
+
+def test_histogram_features_match_per_byte_definitions():
+    for data in (b"\x00" * 20, b"\xff\x00" * 10, bytes(range(256)), os.urandom(1000)):
+        features = calculate_histogram_features(data)
+        assert set(features) == set(HISTOGRAM_FEATURE_NAMES)
+        for num in range(256):
+            assert features[f"percent_of_bytes_eq_{num}"] == 100.0 * data.count(num) / len(data)
+        for num in range(1, 255):
+            expected = 100.0 * sum(1 for byte in data if byte > num) / len(data)
+            assert features[f"percent_of_bytes_gt_{num}"] == expected
+        for mask in range(1, 256):
+            expected = 100.0 * sum(1 for byte in data if byte & mask == mask) / len(data)
+            assert features[f"percent_of_bytes_matching_mask_{mask}"] == expected
+        counts = Counter(data)
+        assert features["most_common_byte"] == max(counts, key=lambda b: (counts[b], b))
+        assert features["calc_entropy"] == pytest.approx(
+            -sum((c / len(data)) * math.log2(c / len(data)) for c in counts.values())
+        )
+        for name in HISTOGRAM_FEATURE_NAMES:
+            assert features[name] == BYTE_ARRAY_ANAL_FUNCS[name](data)
+
+
+def test_block_view_matches_blocks():
+    for length in range(0, 40):
+        data = os.urandom(length)
+        for block_size in (1, 3, 8, 16):
+            view = block_view(data, block_size)
+            assert [bytes(row) for row in view] == list(blocks(data, block_size))
@@ -0,0 +1,96 @@
+from itertools import groupby
+import os
+
+import numpy as np
+import pytest
+
+from mlc.anal.binary import (
+    _bin,
+    BYTE_ARRAY_ANAL_FUNCS,
+    bytes_to_bin_str,
+    kolmogorov_complexity_estimate,
+)
+from mlc.anal.bits import (
+    BIT_NGRAM_MAX_LEN,
+    bit_ngram_counts,
+    bit_ngram_names,
+    BIT_RUN_LENGTH_NAMES,
+    BIT_RUN_NAMES,
+    bit_string,
+    bytes_containing_bits_names,
+    ngram_patterns,
+)
+
+
+SAMPLES = [
+    b"\x00",
+    b"\xff" * 5,
+    b"\x0f\xf0",
+    b"\xaa\x55" * 10,
+    b"\x00" * 3 + b"\x01",
+] + [os.urandom(size) for size in (1, 2, 7, 100, 1000)]
+
+
+def _runs(data: bytes) -> list[tuple[str, int]]:
+    return [(bit, len(list(group))) for bit, group in groupby(bytes_to_bin_str(data))]
+
+
+@pytest.mark.parametrize("data", SAMPLES, ids=range(len(SAMPLES)))
+def test_bit_ngram_counts(data):
+    bit_str = bytes_to_bin_str(data)
+    arr = np.frombuffer(data, dtype=np.uint8)
+    for num_bits in range(1, 9):
+        windows = [bit_str[idx : idx + num_bits] for idx in range(len(bit_str) - num_bits + 1)]
+        counts = bit_ngram_counts(arr, num_bits)
+        assert counts.tolist() == [windows.count(patt) for patt in ngram_patterns(num_bits)]
+
+
+@pytest.mark.parametrize("data", SAMPLES, ids=range(len(SAMPLES)))
+def test_bit_features_match_bit_strings(data):
+    bit_str = bytes_to_bin_str(data)
+    for name in bit_ngram_names():
+        patt = name.rsplit("_", 1)[1]
+        count = sum(bit_str[idx:].startswith(patt) for idx in range(len(bit_str)))
+        assert BYTE_ARRAY_ANAL_FUNCS[name](data) == 100.0 * count / (len(bit_str) - len(patt) + 1)
+    for name in bytes_containing_bits_names():
+        patt = name.rsplit("_", 1)[1]
+        count = sum(1 for byte in data if patt in _bin(byte))
+        assert BYTE_ARRAY_ANAL_FUNCS[name](data) == 100.0 * count / len(data)
+
+    runs = _runs(data)
+    lengths = [length for _, length in runs]
+    assert BYTE_ARRAY_ANAL_FUNCS["longest_run_of_0_bits"](data) == max(
+        (length for bit, length in runs if bit == "0"), default=0
+    )
+    assert BYTE_ARRAY_ANAL_FUNCS["longest_run_of_1_bits"](data) == max(
+        (length for bit, length in runs if bit == "1"), default=0
+    )
+    assert BYTE_ARRAY_ANAL_FUNCS["average_bit_run_length"](data) == len(bit_str) / len(runs)
+    assert BYTE_ARRAY_ANAL_FUNCS["bit_runs_per_bit"](data) == len(runs) / len(bit_str)
+    for length, name in enumerate(BIT_RUN_LENGTH_NAMES[:-1], 1):
+        assert BYTE_ARRAY_ANAL_FUNCS[name](data) == 100.0 * lengths.count(length) / len(runs)
+    num_long = sum(1 for length in lengths if length >= len(BIT_RUN_LENGTH_NAMES))
+    assert BYTE_ARRAY_ANAL_FUNCS[BIT_RUN_LENGTH_NAMES[-1]](data) == 100.0 * num_long / len(runs)
+
+
+def test_names_are_registered():
+    names = bit_ngram_names() + bytes_containing_bits_names() + BIT_RUN_NAMES + BIT_RUN_LENGTH_NAMES
+    assert len(bit_ngram_names()) == sum(
+        2**num_bits for num_bits in range(1, BIT_NGRAM_MAX_LEN + 1)
+    )
+    assert len(bytes_containing_bits_names()) == 510
+    for name in names:
+        assert name in BYTE_ARRAY_ANAL_FUNCS
+
+
+def test_kolmogorov_complexity_estimate_binary():
+    data = os.urandom(100)
+    assert bit_string(np.frombuffer(data, dtype=np.uint8)) == bytes_to_bin_str(data).encode()
+    expected = kolmogorov_complexity_estimate(bytes_to_bin_str(data).encode())
+    assert BYTE_ARRAY_ANAL_FUNCS["kolmogorov_complexity_estimate_binary"](data) == expected
+
+
+def test_empty_data_raises():
+    for name in ("percent_bit_ngrams_0", "average_bit_run_length", BIT_RUN_LENGTH_NAMES[0]):
+        with pytest.raises(ZeroDivisionError):
+            BYTE_ARRAY_ANAL_FUNCS[name](b"")
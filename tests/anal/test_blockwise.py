@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from mlc.anal import binary
+from mlc.anal.binary import blocks
+from mlc.anal.blockwise import (
+    BLOCK_AVERAGE_NAMES,
+    block_feature_names,
+    BLOCK_RANGE_NAMES,
+    BLOCK_SIZES,
+    calculate_block_features,
+)
+
+
+@pytest.mark.parametrize("length", [65, 129, 1000, 4096])
+def test_matches_pure_python(length):
+    data = os.urandom(length)
+    features = calculate_block_features(data)
+    assert set(features) == set(BLOCK_SIZES)
+    for block_size, block_features in features.items():
+        assert list(block_features) == list(block_feature_names(block_size))
+        for name, value in block_features.items():
+            if name.startswith("percent_of_blocks_idx_"):
+                continue
+            expected = getattr(binary, name)(data, block_size_bytes=block_size)
+            assert value == expected, f"Feature '{name}' differs for {block_size} byte blocks"
+
+        for pos in range(block_size):
+            for num in range(256):
+                count = len([block for block in blocks(data, block_size) if block[pos] == num])
+                expected = 100.0 * count / (len(data) / block_size)
+                assert block_features[f"percent_of_blocks_idx_{pos}_eq_{num}"] == expected
+
+
+def test_selected_names():
+    features = calculate_block_features(
+        os.urandom(100), block_sizes=(8, 16), names=["average_block_max", "average_block_min"]
+    )
+    assert features == {
+        8: {name: features[8][name] for name in ("average_block_max", "average_block_min")},
+        16: {name: features[16][name] for name in ("average_block_max", "average_block_min")},
+    }
+
+
+def test_short_data():
+    # 16 bytes is one 16 byte block's worth, but `blocks` skips a block ending at the end of data
+    features = calculate_block_features(b"\x05" * 16, block_sizes=(16,), names=BLOCK_RANGE_NAMES)
+    assert features[16] == dict.fromkeys(BLOCK_RANGE_NAMES, 0.0)
+    with pytest.raises(ZeroDivisionError):
+        calculate_block_features(b"\x05" * 16, block_sizes=(16,), names=BLOCK_AVERAGE_NAMES)
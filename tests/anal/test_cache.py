@@ -0,0 +1,143 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS
+from mlc.anal.cache import content_digest, FeatureCache
+from mlc.anal.features import (
+    calculate_all_binary_features,
+    calculate_features_batch,
+    feature_names,
+)
+from mlc.anal.registry import code_digest, source_digest
+
+
+NAMES = feature_names(include=["calc_entropy", "average_*", "percent_bytes_gt_*"])
+
+
+def test_cached_values_match(tmp_path):
+    data = os.urandom(300)
+    expected = calculate_all_binary_features(data, names=NAMES)
+    with FeatureCache(tmp_path / "cache.db") as cache:
+        first = calculate_all_binary_features(data, names=NAMES, cache=cache)
+        assert cache.stats().misses == len(NAMES)
+        assert cache.stats().hits == 0
+        second = calculate_all_binary_features(data, names=NAMES, cache=cache)
+        assert cache.stats().hits == len(NAMES)
+        assert cache.stats().entries == len(NAMES)
+    assert first == expected
+    assert list(second) == NAMES
+    assert second == expected
+    for name in NAMES:
+        assert type(second[name]) is type(expected[name])
+
+
+def test_persists_and_only_computes_missing(tmp_path):
+    data = os.urandom(100)
+    path = tmp_path / "cache.db"
+    with FeatureCache(path) as cache:
+        calculate_all_binary_features(data, names=NAMES[:10], cache=cache)
+
+    with FeatureCache(path) as cache:
+        features = calculate_all_binary_features(data, names=NAMES[:20], cache=cache)
+        assert cache.hits == 10
+        assert cache.misses == 10
+    assert features == calculate_all_binary_features(data, names=NAMES[:20])
+
+
+def test_nan_values(tmp_path):
+    digest = content_digest(b"abc")
+    with FeatureCache(tmp_path / "cache.db") as cache:
+        cache.put_many(digest, {"calc_entropy": math.nan})
+        assert math.isnan(cache.get_many(digest, ["calc_entropy"])["calc_entropy"])
+
+
+def test_out_of_date_entries_are_misses(tmp_path):
+    digest = content_digest(b"abc")
+    path = tmp_path / "cache.db"
+    with FeatureCache(path, version="1") as cache:
+        cache.put_many(digest, {"calc_entropy": 1.5})
+        assert cache.get_many(digest, ["calc_entropy"]) == {"calc_entropy": 1.5}
+    with FeatureCache(path, version="2") as cache:
+        assert cache.get_many(digest, ["calc_entropy"]) == {}
+        assert cache.misses == 1
+        cache.put_many(digest, {"calc_entropy": 2.5})
+        assert cache.get_many(digest, ["calc_entropy"]) == {"calc_entropy": 2.5}
+        assert len(cache) == 1
+
+
+def test_source_change_invalidates(tmp_path, monkeypatch):
+    # A helper module features are computed with
+    module = tmp_path / "feature_helpers.py"
+    module.write_text("SCALE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    digest = content_digest(b"abc")
+    path = tmp_path / "cache.db"
+    with FeatureCache(path, source_modules=["feature_helpers"]) as cache:
+        cache.put_many(digest, {"calc_entropy": 1.5})
+    with FeatureCache(path, source_modules=["feature_helpers"]) as cache:
+        assert cache.get_many(digest, ["calc_entropy"]) == {"calc_entropy": 1.5}
+    module.write_text("SCALE = 2\n")
+    with FeatureCache(path, source_modules=["feature_helpers"]) as cache:
+        assert cache.get_many(digest, ["calc_entropy"]) == {}
+
+
+def test_hits_dont_write(tmp_path):
+    digest = content_digest(b"abc")
+    path = tmp_path / "cache.db"
+    with FeatureCache(path) as cache:
+        cache.put_many(digest, {"calc_entropy": 1.5, "calc_chi_square": 2.5})
+        changes = cache._conn.total_changes
+        for _ in range(3):
+            assert cache.get_many(digest, ["calc_entropy"]) == {"calc_entropy": 1.5}
+        assert cache._conn.total_changes == changes
+    # Last uses are written on close
+    with FeatureCache(path) as cache:
+        rows = dict(cache._conn.execute("SELECT name, last_used FROM features"))
+    assert rows["calc_entropy"] > rows["calc_chi_square"]
+
+
+def test_lru_eviction(tmp_path):
+    digests = [content_digest(bytes([idx])) for idx in range(4)]
+    with FeatureCache(tmp_path / "cache.db", max_entries=3) as cache:
+        for digest in digests[:3]:
+            cache.put_many(digest, {"calc_entropy": 1.0})
+        # Makes the first digest the most recently used
+        assert cache.get_many(digests[0], ["calc_entropy"])
+        cache.put_many(digests[3], {"calc_entropy": 1.0})
+        assert len(cache) == 3
+        assert cache.get_many(digests[1], ["calc_entropy"]) == {}
+        for digest in (digests[0], digests[2], digests[3]):
+            assert cache.get_many(digest, ["calc_entropy"])
+
+    with pytest.raises(ValueError):
+        FeatureCache(tmp_path / "other.db", max_entries=0)
+
+
+def test_batch_with_cache(tmp_path):
+    samples = [os.urandom(64), os.urandom(200), os.urandom(64)]
+    expected, _ = calculate_features_batch(samples, NAMES)
+    with FeatureCache(tmp_path / "cache.db") as cache:
+        for _ in range(2):
+            matrix, names = calculate_features_batch(samples, NAMES, cache=cache)
+            assert names == NAMES
+            np.testing.assert_array_equal(matrix, expected)
+        assert cache.hits == 3 * len(NAMES)
+
+
+def test_code_version():
+    def func(data):
+        return len(data)
+
+    def other_func(data):
+        return len(data) + 1
+
+    assert code_digest(func) == code_digest(func)
+    assert code_digest(func) != code_digest(other_func)
+    assert code_digest(func, {"num": 1}) != code_digest(func, {"num": 2})
+    assert source_digest(["mlc.anal.tables"]) == source_digest(["mlc.anal.tables"])
+    assert source_digest(["mlc.anal.tables"]) != source_digest(["mlc.anal.bits"])
+    names = feature_names(include=["percent_bytes_gt_*"])
+    assert len({BYTE_ARRAY_ANAL_FUNCS.code_version(name) for name in names}) == len(names)
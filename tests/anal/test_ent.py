@@ -0,0 +1,112 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from mlc.anal.binary import block_view, blocks
+from mlc.anal.ent import ent_block_stats, ent_stats, EntAccumulator, EntResults
+
+
+def _ent_port(data: bytes) -> EntResults:
+    """Direct, byte at a time port of `ent`'s randtest.c"""
+    counts = [0] * 256
+    monte = []
+    in_mont = m_count = 0
+    incirc = (256.0**3 - 1) ** 2
+    scc_first = True
+    scc_last = scc_u0 = scc_t1 = scc_t2 = scc_t3 = 0.0
+    for byte in data:
+        counts[byte] += 1
+        monte.append(byte)
+        if len(monte) == 6:
+            m_count += 1
+            montex = montey = 0.0
+            for idx in range(3):
+                montex = montex * 256.0 + monte[idx]
+                montey = montey * 256.0 + monte[3 + idx]
+            if montex * montex + montey * montey <= incirc:
+                in_mont += 1
+            monte = []
+        if scc_first:
+            scc_first = False
+            scc_last = 0.0
+            scc_u0 = byte
+        else:
+            scc_t1 += scc_last * byte
+        scc_t2 += byte
+        scc_t3 += byte * byte
+        scc_last = byte
+
+    total = len(data)
+    scc_t1 += scc_last * scc_u0
+    scc_t2 = scc_t2 * scc_t2
+    scc = total * scc_t3 - scc_t2
+    scc = -100000.0 if scc == 0.0 else (total * scc_t1 - scc_t2) / scc
+    expected = total / 256.0
+    chisq = sum((count - expected) ** 2 / expected for count in counts)
+    entropy = sum((c / total) * math.log2(total / c) for c in counts if c)
+    return EntResults(
+        entropy=entropy,
+        chi_square=chisq,
+        mean=sum(data) / total,
+        monte_carlo_pi=4.0 * (in_mont / m_count) if m_count else math.nan,
+        serial_correlation=scc,
+    )
+
+
+def _assert_close(actual: EntResults, expected: EntResults) -> None:
+    for field in EntResults.__dataclass_fields__:
+        assert getattr(actual, field) == pytest.approx(
+            getattr(expected, field), rel=1e-9, abs=1e-9, nan_ok=True
+        ), field
+
+
+@pytest.mark.parametrize("length", [1, 5, 6, 8, 13, 64, 1000, 65536])
+def test_ent_stats_matches_port(length):
+    data = os.urandom(length)
+    _assert_close(ent_stats(data), _ent_port(data))
+
+
+def test_ent_stats_constant_data():
+    results = ent_stats(b"\x00" * 600)
+    assert results.entropy == 0.0
+    assert results.chi_square == pytest.approx(600 * 255)
+    assert results.mean == 0.0
+    assert results.monte_carlo_pi == 4.0
+    assert results.serial_correlation == -100000.0
+
+
+@pytest.mark.parametrize("block_size", [8, 16, 32, 64])
+def test_ent_block_stats_matches_each_block(block_size):
+    data = os.urandom(block_size * 20 + 3)
+    block_results = ent_block_stats(block_view(data, block_size))
+    block_list = list(blocks(data, block_size))
+    assert len(block_results.entropy) == len(block_list)
+    for idx, block in enumerate(block_list):
+        _assert_close(
+            EntResults(
+                **{
+                    field: float(getattr(block_results, field)[idx])
+                    for field in EntResults.__dataclass_fields__
+                }
+            ),
+            _ent_port(block),
+        )
+
+
+def test_ent_block_stats_many_blocks():
+    """More blocks than are processed in one batch"""
+    data = os.urandom(8 * 10000)
+    block_results = ent_block_stats(block_view(data, 8))
+    assert block_results.mean.shape == (9999,)
+    assert np.allclose(block_results.mean, block_view(data, 8).mean(axis=1))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 6, 7, 1000])
+def test_ent_accumulator_matches_ent_stats(chunk_size):
+    data = os.urandom(997)
+    accumulator = EntAccumulator()
+    for start in range(0, len(data), chunk_size):
+        accumulator.update(np.frombuffer(data[start : start + chunk_size], dtype=np.uint8))
+    assert accumulator.result() == ent_stats(data)
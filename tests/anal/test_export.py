@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from mlc.anal.export import (
+    default_row_group_size,
+    DEFAULT_ROW_GROUP_BYTES,
+    export_features,
+    FAMILY_KEY,
+    feature_families,
+    read_exported_features,
+)
+from mlc.anal.features import calculate_features_batch, feature_names
+
+
+INCLUDE = ["calc_entropy", "percent_of_bytes_gt_*", "xor_*"]
+
+
+def test_export_and_read(tmp_path):
+    path = tmp_path / "features"
+    samples = [os.urandom(size) for size in range(50, 60)]
+    labels = ["AES", "ZLIB"] * 5
+    names = export_features(samples, path, labels, include=INCLUDE, row_group_size=2, batch_size=3)
+    assert names == feature_names(include=INCLUDE)
+    assert sorted(os.listdir(path)) == ["label=AES", "label=ZLIB"]
+
+    files = list((path / "label=AES").iterdir())
+    assert len(files) == 1
+    metadata = pq.ParquetFile(files[0]).metadata
+    assert [metadata.row_group(idx).num_rows for idx in range(metadata.num_row_groups)] == [2, 2, 1]
+    schema = pq.read_schema(files[0])
+    assert schema.field("percent_of_bytes_gt_3").metadata[FAMILY_KEY] == b"percent_of_bytes_gt"
+    assert feature_families(schema)["calc_entropy"] == ["calc_entropy"]
+
+    table = read_exported_features(path)
+    assert table.num_rows == len(samples)
+    assert pa.types.is_dictionary(table.schema.field("label").type)
+    rows = np.argsort(table["sample_id"].to_numpy())
+    expected, _ = calculate_features_batch(samples, names)
+    for col, name in enumerate(names):
+        np.testing.assert_array_equal(table[name].to_numpy()[rows], expected[:, col])
+    assert table["label"].to_pylist() == sorted(labels)
+
+
+def test_default_row_group_size(tmp_path):
+    # A row group of every feature stays around the target size
+    num_columns = len(feature_names()) + 2
+    assert default_row_group_size(num_columns) * num_columns * 4 <= DEFAULT_ROW_GROUP_BYTES
+    assert default_row_group_size(num_columns) >= 1024
+    assert default_row_group_size(10**9) == 1
+
+    path = tmp_path / "features"
+    export_features([os.urandom(64) for _ in range(5)], path, include=INCLUDE)
+    metadata = pq.ParquetFile(next(path.iterdir())).metadata
+    assert metadata.num_row_groups == 1
+
+
+def test_read_columns_and_partitions(tmp_path):
+    path = tmp_path / "features"
+    samples = [os.urandom(64) for _ in range(6)]
+    export_features(samples, path, ["a", "b", "c"] * 2, sample_ids=range(10, 16), include=INCLUDE)
+    # More rows go in new files next to the existing ones
+    export_features(samples[:2], path, ["a", "a"], sample_ids=[20, 21], include=INCLUDE)
+
+    table = read_exported_features(
+        path, names=["calc_entropy"], families=["percent_of_bytes_gt"], labels=["a"]
+    )
+    assert table.schema.names[:3] == ["sample_id", "label", "calc_entropy"]
+    assert table.schema.names[3:] == feature_names(include=["percent_of_bytes_gt_*"])
+    assert sorted(table["sample_id"].to_pylist()) == [10, 13, 20, 21]
+
+
+def test_unlabeled(tmp_path):
+    path = tmp_path / "features"
+    export_features([os.urandom(64)] * 3, path, include=["calc_entropy"])
+    table = read_exported_features(path)
+    assert table.schema.names == ["sample_id", "calc_entropy"]
+    assert sorted(table["sample_id"].to_pylist()) == [0, 1, 2]
@@ -1,10 +1,16 @@
 import json
 import os
 
+import numpy as np
 import pytest
 
-from mlc.anal.binary import FeatureType
-from mlc.anal.features import calculate_all_binary_features
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS, BYTE_ARRAYS_ANAL_FUNCS, FeatureType
+from mlc.anal.features import (
+    calculate_all_binary_features,
+    calculate_all_binary_pair_features,
+    calculate_features_batch,
+    calculate_pair_features_batch,
+)
 
 
 def test_doesnt_raise_exception_on_nonempty_data():
@@ -45,3 +51,84 @@ def test_features_dict_is_json_serializable():
         features = calculate_all_binary_features(os.urandom(32 * idx))
         # Test that this doesn't raise an exception
         json.dumps(features)
+
+
+def test_features_batch_matches_dict_columns():
+    samples = [os.urandom(32 * idx) for idx in range(1, 4)]
+    names = [
+        "average_byte",
+        "percent_of_bytes_eq_3",
+        "calc_entropy",
+        "variance",
+        "percent_bytes_with_bit_7_off",
+    ]
+    matrix, columns = calculate_features_batch(samples, names)
+    assert columns == names
+    assert matrix.shape == (len(samples), len(names))
+    assert matrix.dtype == np.float32
+    for row, data in zip(matrix, samples):
+        for value, name in zip(row, names):
+            assert value == np.float32(BYTE_ARRAY_ANAL_FUNCS[name](data))
+
+
+def test_features_batch_unknown_name():
+    with pytest.raises(ValueError):
+        calculate_features_batch([os.urandom(32)], ["not_a_feature"])
+
+
+def test_features_batch_out():
+    samples = [os.urandom(32) for _ in range(3)]
+    out = np.zeros((3, 2), dtype=np.float64)
+    matrix, _ = calculate_features_batch(samples, ["calc_entropy", "variance"], np.float64, out)
+    assert matrix is out
+    assert (out != 0).all()
+
+
+def test_features_batch_out_wrong_shape():
+    out = np.zeros((2, 2), dtype=np.float32)
+    with pytest.raises(ValueError):
+        calculate_features_batch([os.urandom(32)] * 3, ["calc_entropy", "variance"], out=out)
+
+
+def test_features_batch_out_wrong_dtype():
+    out = np.zeros((3, 2), dtype=np.float64)
+    with pytest.raises(ValueError):
+        calculate_features_batch([os.urandom(32)] * 3, ["calc_entropy", "variance"], out=out)
+
+
+def test_pair_features_batch():
+    pairs = [
+        (os.urandom(size), os.urandom(size + extra)) for size in (1, 16, 100) for extra in (0, 3)
+    ]
+    matrix, columns = calculate_pair_features_batch(pairs, dtype=np.float64)
+    assert columns == list(BYTE_ARRAYS_ANAL_FUNCS)
+    for row, (data1, data2) in zip(matrix, pairs):
+        assert dict(zip(columns, row.tolist())) == calculate_all_binary_pair_features(data1, data2)
+        for value, name in zip(row, columns):
+            assert value == BYTE_ARRAYS_ANAL_FUNCS[name](data1, data2)
+
+    matrix, columns = calculate_pair_features_batch(pairs, ["percent_bits_equal"])
+    assert columns == ["percent_bits_equal"]
+    assert matrix.shape == (len(pairs), 1)
+    assert matrix.dtype == np.float32
+
+
+def test_pair_features_batch_out():
+    pairs = [(os.urandom(16), os.urandom(16)) for _ in range(3)]
+    out = np.zeros((3, 1), dtype=np.float64)
+    matrix, _ = calculate_pair_features_batch(pairs, ["percent_bits_equal"], np.float64, out)
+    assert matrix is out
+    assert (out != 0).all()
+
+
+def test_pair_features_batch_out_wrong_shape():
+    pairs = [(os.urandom(16), os.urandom(16))] * 3
+    with pytest.raises(ValueError):
+        calculate_pair_features_batch(pairs, ["percent_bits_equal"], out=np.zeros((3, 2)))
+
+
+def test_pair_features_batch_out_wrong_dtype():
+    pairs = [(os.urandom(16), os.urandom(16))] * 3
+    out = np.zeros((3, 1), dtype=np.float64)
+    with pytest.raises(ValueError):
+        calculate_pair_features_batch(pairs, ["percent_bits_equal"], out=out)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from mlc.anal.features import calculate_features_batch, calculate_features_to_file, feature_names
+from mlc.anal.matrix_file import (
+    FeatureMatrixFile,
+    FeatureMatrixWriter,
+    load_feature_matrix,
+    write_feature_matrix,
+)
+from mlc.compression import CompressionType
+
+
+NAMES = ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("compression", [None, CompressionType.ZLIB, CompressionType.BZ2])
+def test_round_trip(tmp_path, compression):
+    path = tmp_path / "features.fmat"
+    matrix = np.random.default_rng(0).normal(size=(50, 3)).astype(np.float32)
+    matrix[3, 1] = np.nan
+    write_feature_matrix(path, matrix, NAMES, sample_ids=range(100, 150), compression=compression)
+    with FeatureMatrixFile(path) as matrix_file:
+        assert matrix_file.names == NAMES
+        assert matrix_file.shape == (50, 3)
+        np.testing.assert_array_equal(matrix_file.read(), matrix)
+        np.testing.assert_array_equal(matrix_file.sample_ids, np.arange(100, 150))
+        np.testing.assert_array_equal(matrix_file.column("b"), matrix[:, 1])
+
+
+def test_append_and_partial_reads(tmp_path):
+    path = tmp_path / "features.fmat"
+    blocks = [np.random.default_rng(idx).random((size, 3)) for idx, size in enumerate([5, 0, 7])]
+    for block in blocks:
+        with FeatureMatrixWriter(path, NAMES, compression=CompressionType.ZLIB) as writer:
+            writer.append(block)
+    full = np.concatenate(blocks).astype(np.float32)
+
+    with FeatureMatrixFile(path) as matrix_file:
+        assert matrix_file.num_rows == 12
+        np.testing.assert_array_equal(matrix_file.sample_ids, np.arange(12))
+        np.testing.assert_array_equal(matrix_file.read(["c", "a"], 3, 9), full[3:9, [2, 0]])
+        assert matrix_file.read(start=12).shape == (0, 3)
+        with pytest.raises(ValueError):
+            matrix_file.read(["d"])
+
+    matrix, names, ids = load_feature_matrix(path, ["b"], start=-2)
+    np.testing.assert_array_equal(matrix, full[-2:, [1]])
+    assert names == ["b"]
+    np.testing.assert_array_equal(ids, [10, 11])
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "features.fmat"
+    write_feature_matrix(path, np.zeros((2, 3)), NAMES)
+    with pytest.raises(ValueError):
+        FeatureMatrixWriter(path, ["a", "b"])
+    with FeatureMatrixWriter(path) as writer:
+        with pytest.raises(ValueError):
+            writer.append(np.zeros((2, 2)))
+        with pytest.raises(ValueError):
+            writer.append(np.zeros((2, 3)), sample_ids=[1])
+
+    # A partly written block
+    with open(path, "ab") as handle:
+        handle.write(b"MLCBLOCK\x10")
+    with pytest.raises(ValueError):
+        FeatureMatrixFile(path)
+    (tmp_path / "other").write_bytes(b"not a matrix")
+    with pytest.raises(ValueError):
+        FeatureMatrixFile(tmp_path / "other")
+
+
+def test_calculate_features_to_file(tmp_path):
+    path = tmp_path / "features.fmat"
+    samples = [os.urandom(size) for size in (64, 100, 300, 64, 50)]
+    names = feature_names(include=["calc_entropy", "average_*", "xor_*"])
+    calculate_features_to_file(samples[:3], path, names=names, batch_size=2)
+    calculate_features_to_file(samples[3:], path, sample_ids=[7, 8], names=names)
+
+    expected, _ = calculate_features_batch(samples, names)
+    matrix, read_names, ids = load_feature_matrix(path)
+    assert read_names == names
+    np.testing.assert_array_equal(matrix, expected)
+    np.testing.assert_array_equal(ids, [0, 1, 2, 7, 8])
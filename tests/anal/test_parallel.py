@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from mlc.anal.features import calculate_features_batch
+from mlc.anal.parallel import calculate_features_parallel, size_balanced_chunks
+
+
+NAMES = [
+    "average_byte",
+    "calc_entropy",
+    "percent_of_bytes_gt_100",
+    "average_block_max",
+    "xor_all_bytes_16bit_le",
+]
+
+
+def test_size_balanced_chunks_cover_everything_in_order():
+    sizes = [1, 100, 3, 3, 3, 50, 50, 1, 1, 200]
+    for num_chunks in range(1, 15):
+        chunks = size_balanced_chunks(sizes, num_chunks)
+        assert len(chunks) <= num_chunks
+        assert chunks[0][0] == 0
+        assert chunks[-1][1] == len(sizes)
+        for (_, stop), (start, _) in zip(chunks, chunks[1:]):
+            assert stop == start
+
+
+def test_size_balanced_chunks_balances_sizes():
+    chunks = size_balanced_chunks([10] * 100, 4)
+    assert chunks == [(0, 25), (25, 50), (50, 75), (75, 100)]
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_parallel_matches_serial(start_method):
+    samples = [os.urandom(16 + 37 * idx) for idx in range(40)]
+    expected, _ = calculate_features_batch(samples, NAMES)
+    matrix, names = calculate_features_parallel(
+        samples, NAMES, workers=3, start_method=start_method
+    )
+    assert names == NAMES
+    assert np.array_equal(matrix, expected)
+
+
+def test_parallel_worker_exception_is_raised():
+    with pytest.raises(ZeroDivisionError):
+        calculate_features_parallel([os.urandom(32), b"", os.urandom(32)], NAMES, workers=2)
+
+
+def test_parallel_unknown_names_fail_early(monkeypatch):
+    def no_shared_memory(*args, **kwargs):
+        raise AssertionError("Shared memory set up for unknown names")
+
+    monkeypatch.setattr("mlc.anal.parallel.SharedMemory", no_shared_memory)
+    with pytest.raises(ValueError):
+        calculate_features_parallel([os.urandom(32)] * 4, ["not_a_feature"], workers=2)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from mlc.anal.binary import BYTE_ARRAY_REGISTRY
+from mlc.anal.features import calculate_all_binary_features, load_feature_list
+from mlc.anal.registry import FeatureFamily, FeatureRegistry
+
+
+def _make_registry(created):
+    def factory(num):
+        created.append(num)
+        return lambda data: data.count(num)
+
+    registry = FeatureRegistry(mark_attr="_is_test_func")
+    registry.add_func("length", len)
+    registry.add_family(
+        FeatureFamily(
+            name="count",
+            name_fmt="count_{num}",
+            factory=factory,
+            params=lambda: ({"num": num} for num in range(4)),
+        )
+    )
+    return registry
+
+
+def test_family_funcs_created_lazily():
+    created = []
+    registry = _make_registry(created)
+    assert list(registry) == ["length", "count_0", "count_1", "count_2", "count_3"]
+    assert created == []
+    func = registry["count_2"]
+    assert created == [2]
+    assert registry["count_2"] is func
+    assert created == [2]
+    assert getattr(func, "_is_test_func")
+    assert registry.info("count_2").family == "count"
+    assert registry.info("count_2").params == {"num": 2}
+    assert registry.families() == ["length", "count"]
+
+
+def test_family_params_bound_per_feature():
+    registry = _make_registry([])
+    data = b"\x00\x01\x01\x02\x02\x02"
+    assert [registry[f"count_{num}"](data) for num in range(4)] == [1, 2, 3, 0]
+
+
+def test_select():
+    registry = _make_registry([])
+    assert registry.select(include=["count_*"], exclude=["count_1"]) == [
+        "count_0",
+        "count_2",
+        "count_3",
+    ]
+    assert registry.select(names=["count_3", "length"]) == ["count_3", "length"]
+    assert registry.select(names=["count_3", "length"], exclude=["len*"]) == ["count_3"]
+    with pytest.raises(ValueError):
+        registry.select(names=["count_4"])
+    with pytest.raises(KeyError):
+        registry["count_4"]
+
+
+def test_generated_features_bound_correctly():
+    data = bytes(range(10))
+    assert BYTE_ARRAY_REGISTRY["percent_of_bytes_gt_5"](data) == 40.0
+    assert BYTE_ARRAY_REGISTRY["percent_of_bytes_gt_6"](data) == 30.0
+    assert BYTE_ARRAY_REGISTRY["percent_bytes_with_bit_0_on"](b"\x01\x00") == 50.0
+    assert BYTE_ARRAY_REGISTRY["percent_bytes_with_bit_0_off"](b"\x01\x00\x00\x00") == 75.0
+
+
+def test_calculate_selected_features():
+    data = bytes(range(256))
+    features = calculate_all_binary_features(
+        data, include=["percent_of_bytes_eq_*", "average_byte"], exclude=["*_eq_1?"]
+    )
+    assert "average_byte" in features
+    assert "percent_of_bytes_eq_0" in features
+    assert "percent_of_bytes_eq_10" not in features
+    assert len(features) == 1 + 256 - 10
+    all_features = calculate_all_binary_features(data)
+    for name, value in features.items():
+        assert value == all_features[name]
+
+
+def test_load_feature_list(tmp_path):
+    json_path = tmp_path / "features.json"
+    json_path.write_text(json.dumps(["average_byte", "calc_entropy"]))
+    assert load_feature_list(json_path) == ["average_byte", "calc_entropy"]
+    text_path = tmp_path / "features.txt"
+    text_path.write_text("# saved selection\naverage_byte\n\ncalc_entropy\n")
+    assert load_feature_list(text_path) == ["average_byte", "calc_entropy"]
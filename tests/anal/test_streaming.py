@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS
+from mlc.anal.features import calculate_all_binary_features
+from mlc.anal.streaming import (
+    calculate_file_features,
+    calculate_streaming_features,
+    FeatureAccumulator,
+    non_decomposable_feature_names,
+    StreamingFeatures,
+)
+
+
+# Rounded differently than the in-memory functions
+APPROX_NAMES = {
+    "variance",
+    "standard_deviation",
+    "average_block_variance",
+    "average_block_standard_deviation",
+    # `sum` of floats is compensated from Python 3.12 on, so summing in chunks can round differently
+    "ent_entropy_block_average",
+    "ent_chi_square_block_average",
+    "ent_monte_carlo_pi_block_average",
+    "ent_serial_correlation_bkock_average",
+}
+
+
+def _split(data, sizes):
+    chunks = []
+    start = 0
+    while start < len(data):
+        size = sizes[len(chunks) % len(sizes)]
+        chunks.append(data[start : start + size])
+        start += size
+    return chunks
+
+
+def _assert_matches_in_memory(data, features):
+    for name, value in features.items():
+        expected = BYTE_ARRAY_ANAL_FUNCS[name](data)
+        if name in APPROX_NAMES:
+            assert value == pytest.approx(expected, rel=1e-9), f"Feature '{name}' differs"
+        else:
+            assert value == expected, f"Feature '{name}' differs"
+            assert type(value) is type(expected), f"Feature '{name}' has a different type"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [os.urandom(1001), bytes(range(256)) * 4, b"\x00" * 64 + os.urandom(37)],
+    ids=range(3),
+)
+@pytest.mark.parametrize("chunk_sizes", [[1], [7, 1, 13], [64], [100000]])
+def test_matches_in_memory(data, chunk_sizes):
+    features = calculate_streaming_features(_split(data, chunk_sizes))
+    _assert_matches_in_memory(data, features)
+
+
+def test_all_names_are_features():
+    for name in StreamingFeatures().feature_names():
+        assert name in BYTE_ARRAY_ANAL_FUNCS
+
+
+def test_selected_names():
+    data = os.urandom(100)
+    features = calculate_streaming_features([data], names=["calc_entropy", "xor_all_bytes_8bit"])
+    assert set(features) == {"calc_entropy", "xor_all_bytes_8bit"}
+    with pytest.raises(ValueError):
+        calculate_streaming_features([data], names=["compression_ratio_zlib"])
+
+
+def test_empty_raises():
+    with pytest.raises(ZeroDivisionError):
+        calculate_streaming_features([b"", b""])
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_file_features(tmp_path, use_mmap):
+    data = os.urandom(5000)
+    path = tmp_path / "sample.bin"
+    path.write_bytes(data)
+    features = calculate_file_features(path, chunk_size=333, use_mmap=use_mmap)
+    _assert_matches_in_memory(data, features)
+
+
+def test_accumulator_snapshots_match_in_memory():
+    data = os.urandom(700) + b"\xff" * 40
+    accumulator = FeatureAccumulator(max_data_bytes=len(data))
+    seen = b""
+    for chunk in _split(data, [300, 1, 13, 5]):
+        accumulator.update(chunk)
+        seen += chunk
+        snapshot = accumulator.snapshot()
+        expected = calculate_all_binary_features(seen)
+        assert list(snapshot) == list(expected)
+        for name, value in snapshot.items():
+            if name in APPROX_NAMES:
+                assert value == pytest.approx(expected[name], rel=1e-9), f"'{name}' differs"
+            else:
+                assert value == expected[name], f"Feature '{name}' differs"
+
+
+def test_accumulator_non_decomposable_are_lazy(monkeypatch):
+    import mlc.anal.streaming
+
+    names = ["compression_ratio_zlib", "calc_entropy"]
+    assert "compression_ratio_zlib" in non_decomposable_feature_names()
+    assert set(non_decomposable_feature_names()).isdisjoint(StreamingFeatures().feature_names())
+    calls = []
+
+    def calculate(data, names):
+        calls.append(names)
+        return calculate_all_binary_features(data, names=names)
+
+    monkeypatch.setattr(mlc.anal.streaming, "calculate_all_binary_features", calculate)
+    accumulator = FeatureAccumulator(max_data_bytes=200)
+    accumulator.update(os.urandom(100))
+    accumulator.snapshot(["calc_entropy"])
+    assert calls == []
+    first = accumulator.snapshot(names)
+    assert accumulator.snapshot(names) == first
+    assert calls == [["compression_ratio_zlib"]]
+    accumulator.update(b"\x00" * 100)
+    accumulator.snapshot(names)
+    assert len(calls) == 2
+
+
+def test_accumulator_keeps_no_data_by_default():
+    data = os.urandom(500)
+    accumulator = FeatureAccumulator()
+    accumulator.update(data)
+    assert not accumulator.keeps_data
+    snapshot = accumulator.snapshot()
+    assert list(snapshot) == [
+        name for name in BYTE_ARRAY_ANAL_FUNCS if name not in non_decomposable_feature_names()
+    ]
+    assert snapshot["calc_entropy"] == calculate_all_binary_features(data)["calc_entropy"]
+    with pytest.raises(ValueError):
+        accumulator.snapshot(["compression_ratio_zlib"])
+
+
+def test_accumulator_drops_data_past_limit():
+    accumulator = FeatureAccumulator(max_data_bytes=100)
+    accumulator.update(os.urandom(100))
+    assert accumulator.keeps_data
+    assert "compression_ratio_zlib" in accumulator.snapshot()
+    accumulator.update(b"\x00")
+    assert not accumulator.keeps_data
+    assert "compression_ratio_zlib" not in accumulator.snapshot()
+    with pytest.raises(ValueError):
+        accumulator.snapshot(["compression_ratio_zlib"])
+
+
+def test_accumulator_empty_raises():
+    with pytest.raises(ZeroDivisionError):
+        FeatureAccumulator().snapshot()
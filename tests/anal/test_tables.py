@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+
+from mlc.anal import tables
+from mlc.anal.binary import _bin, BYTE_ARRAY_ANAL_FUNCS, bit_symmetry_ranges, byte_histogram
+from mlc.anal.vectorized import per_byte_tables
+
+
+def test_tables_match_bit_strings():
+    for byte in range(256):
+        bits = _bin(byte)
+        assert tables.POPCOUNT[byte] == bits.count("1")
+        assert tables.ZERO_BIT_COUNT[byte] == bits.count("0")
+        assert tables.MIRRORED[byte] == int(bits[::-1], 2)
+        assert tables.BITS_ON_INDICES[byte] == tuple(
+            idx for idx, bit in enumerate(bits[::-1]) if bit == "1"
+        )
+        assert tables.ON_BIT_POSITION_SUM[byte] == sum(tables.BITS_ON_INDICES[byte])
+        for bit in range(8):
+            assert tables.BIT_ON[bit, byte] == (bits[7 - bit] == "1")
+        for start_1, end_1, start_2, end_2 in bit_symmetry_ranges():
+            assert tables.bit_range_equal(start_1, end_1, start_2, end_2)[byte] == (
+                bits[start_1 : end_1 + 1] == bits[start_2 : end_2 + 1]
+            )
+        for mask in range(1, 256):
+            assert tables.MASK_MATCH[mask - 1, byte] == (byte & mask == mask)
+
+
+def test_nibble_tables():
+    lower = tables.LOWER_NIBBLE
+    upper = tables.UPPER_NIBBLE
+    assert (lower + (upper << 4) == tables.BYTE_VALUES).all()
+    assert (tables.NIBBLE_GT == (lower > upper)).all()
+    assert not tables.NIBBLE_EQ_COMPLEMENT.any()
+    # Only when both nibbles are 0
+    assert np.flatnonzero(tables.NIBBLE_EQ_MIRROR).tolist() == [0]
+
+
+def test_per_byte_tables_match_features():
+    data = os.urandom(1000)
+    hist = byte_histogram(data)
+    names, table, scales = per_byte_tables()
+    assert table.shape == (len(names), 256)
+    values = (scales * (table @ hist) / len(data)).tolist()
+    for name, value in zip(names, values):
+        assert value == BYTE_ARRAY_ANAL_FUNCS[name](data), f"Feature '{name}' differs"
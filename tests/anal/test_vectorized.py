@@ -0,0 +1,162 @@
+import math
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from mlc.anal.binary import BYTE_ARRAY_ANAL_FUNCS, BYTE_ARRAYS_ANAL_FUNCS
+from mlc.anal.features import calculate_features_batch
+from mlc.anal.vectorized import (
+    as_uint8,
+    ByteSample,
+    calculate_vectorized_features,
+    calculate_vectorized_features_with_report,
+    calculate_vectorized_pair_features,
+    feature_intermediates,
+    int_average_names,
+    int_average_values,
+    INT_AVERAGE_WIDTHS,
+    PAIR_FEATURE_NAMES,
+    pair_feature_matrix,
+    VECTORIZED_FAMILIES,
+    VECTORIZED_FEATURE_FAMILIES,
+)
+from mlc.compression import compressed_size
+
+
+SAMPLES = [
+    b"\x00" * 20,
+    b"\xff" * 20,
+    b"\x81\x00\xc3\x18" * 5,
+    bytes(range(256)),
+    bytes(range(255, -1, -1)) * 3,
+    b"ab",
+    b"a",
+] + [os.urandom(size) for size in (8, 9, 16, 63, 1000, 4096)]
+
+
+def test_all_vectorized_names_are_features():
+    for name in VECTORIZED_FEATURE_FAMILIES:
+        assert name in BYTE_ARRAY_ANAL_FUNCS
+
+
+@pytest.mark.parametrize("data", SAMPLES, ids=range(len(SAMPLES)))
+def test_matches_pure_python_exactly(data):
+    sample = ByteSample(data)
+    for family in VECTORIZED_FAMILIES:
+        try:
+            expected = [BYTE_ARRAY_ANAL_FUNCS[name](data) for name in family.names]
+        except ZeroDivisionError:
+            # Undefined for short data
+            with pytest.raises(ZeroDivisionError):
+                family.compute(sample)
+            continue
+        for name, value, expected_value in zip(family.names, family.compute(sample), expected):
+            if isinstance(expected_value, float) and math.isnan(expected_value):
+                # `ent` statistics of very short data
+                assert math.isnan(value), f"Feature '{name}' differs"
+                continue
+            assert value == expected_value, f"Feature '{name}' differs"
+            assert type(value) is type(expected_value), f"Feature '{name}' has a different type"
+
+
+def test_subset_of_names():
+    data = os.urandom(64)
+    names = ["percent_of_bytes_eq_7", "average_byte", "not_a_vectorized_feature"]
+    features = calculate_vectorized_features(data, names)
+    assert set(features) == {"percent_of_bytes_eq_7", "average_byte"}
+
+
+def test_short_data_block_features():
+    # One block's worth of data has no blocks (the last block is always skipped), but block ranges
+    # are averaged over `len(data) // block_size`
+    names = ["average_block_max", "average_block_min"]
+    features = calculate_vectorized_features(b"\x01" * 8, names)
+    assert features == {"average_block_max": 0.0, "average_block_min": 0.0}
+    with pytest.raises(ZeroDivisionError):
+        calculate_vectorized_features(b"\x01" * 8, ["average_block_average"])
+
+
+def test_empty_data_raises():
+    with pytest.raises(ZeroDivisionError):
+        calculate_vectorized_features(b"")
+
+
+def test_pair_features_match_pure_python_exactly():
+    pairs = [(data, os.urandom(len(data))) for data in SAMPLES]
+    pairs += [(data1, data2) for data1 in SAMPLES[:4] for data2 in SAMPLES[-4:]]
+    assert list(PAIR_FEATURE_NAMES) == list(BYTE_ARRAYS_ANAL_FUNCS)
+    matrix = pair_feature_matrix(pairs)
+    for (data1, data2), row in zip(pairs, matrix.tolist()):
+        features = calculate_vectorized_pair_features(data1, data2)
+        for name, value in zip(PAIR_FEATURE_NAMES, row):
+            expected = BYTE_ARRAYS_ANAL_FUNCS[name](data1, data2)
+            assert value == expected, f"Feature '{name}' differs"
+            assert features[name] == expected
+            assert type(features[name]) is type(expected)
+
+
+def test_pair_features_empty_data_raises():
+    with pytest.raises(ZeroDivisionError):
+        pair_feature_matrix([(b"ab", b"cd"), (b"", b"cd")])
+
+
+@pytest.mark.parametrize(
+    "data", [b"\xff" * 100_003, b"\x80\x00" * 50_000, os.urandom(100_001)], ids=range(3)
+)
+def test_all_int_averages_in_one_call(data):
+    names = [name for width in INT_AVERAGE_WIDTHS for name in int_average_names(width)]
+    assert len(names) == 28
+    for name, value in zip(names, int_average_values(as_uint8(data))):
+        assert value == BYTE_ARRAY_ANAL_FUNCS[name](data), f"Feature '{name}' differs"
+
+
+def test_intermediates_are_computed_once():
+    data = os.urandom(300)
+    names = ["calc_chi_square", "average_byte", "variance", "standard_deviation", "ent_entropy"]
+    features, report = calculate_vectorized_features_with_report(data, names)
+    assert features == calculate_vectorized_features(data, names)
+    assert sorted(report.computed) == ["arr", "ent", "histogram", "mean", "variance"]
+    # Byte averages, the histogram family and the mean share the histogram
+    assert report.uses["histogram"] == 3
+    assert report.reused == {"arr": 1, "histogram": 2}
+
+    _, report = calculate_vectorized_features_with_report(data)
+    assert len(report.computed) == len(set(report.computed))
+    assert report.reused["histogram"] > 1
+    assert report.reused["blocks_8"] == 3
+
+
+def test_feature_intermediates():
+    assert feature_intermediates("standard_deviation") == ("arr", "histogram", "mean", "variance")
+    assert feature_intermediates("average_block_variance") == ("arr", "blocks_8")
+    assert feature_intermediates("compression_ratio_zlib") == ("compressed_size_zlib",)
+
+
+def test_compression_ratio_only_runs_its_compressor():
+    data = os.urandom(1000)
+    features, report = calculate_vectorized_features_with_report(data, ["compression_ratio_zlib"])
+    assert report.computed == ["compressed_size_zlib"]
+    expected = BYTE_ARRAY_ANAL_FUNCS["compression_ratio_zlib"](data)
+    assert features["compression_ratio_zlib"] == expected
+
+
+def test_compression_ratios_compress_concurrently(monkeypatch):
+    data = os.urandom(1000)
+    names = ["compression_ratio_zlib", "compression_ratio_bz2", "compression_ratio_lzma"]
+    expected = {name: BYTE_ARRAY_ANAL_FUNCS[name](data) for name in names}
+    # Only gets past the barrier if every compressor runs at the same time
+    barrier = threading.Barrier(len(names), timeout=10)
+    calls = []
+
+    def waiting_compressed_size(data, comp_type, kwargs=None):
+        barrier.wait()
+        calls.append(comp_type)
+        return compressed_size(data, comp_type, kwargs)
+
+    monkeypatch.setattr("mlc.compression.compressed_size", waiting_compressed_size)
+    assert calculate_vectorized_features(data, names) == expected
+    matrix, _ = calculate_features_batch([data], names, dtype=np.float64)
+    assert matrix[0].tolist() == list(expected.values())
+    assert len(calls) == 2 * len(names)
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from mlc.crypto.cipher_types import CipherType
+from mlc.crypto.ciphers import CIPHER_FUNCS, decrypt, encrypt, random_cipher_metadata
+from mlc.utils.rand import SeededRandomSource, using_random_source
+
+
+@pytest.mark.parametrize("cipher_type", list(CIPHER_FUNCS))
+def test_encrypt_decrypt(cipher_type):
+    data = os.urandom(1000)
+    metadata = random_cipher_metadata(cipher_type, 256)
+    ciphertext = encrypt(metadata, data)
+    assert ciphertext != data
+    assert decrypt(metadata, ciphertext) == data
+
+
+def test_seeded_metadata():
+    with using_random_source(SeededRandomSource(3)):
+        first = random_cipher_metadata(CipherType.AES, 128)
+    with using_random_source(SeededRandomSource(3)):
+        assert random_cipher_metadata(CipherType.AES, 128) == first
+    assert len(first.key) == 16
+
+
+def test_unimplemented():
+    with pytest.raises(NotImplementedError):
+        random_cipher_metadata(CipherType.RC4, 128)
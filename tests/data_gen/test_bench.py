@@ -0,0 +1,28 @@
+"""`data_gen.bench` module tests"""
+
+import unittest
+
+from mlc.data_gen.bench import bench_generators, GENERATORS
+
+
+class TestBenchGenerators(unittest.TestCase):
+    """`bench_generators` function"""
+
+    def test_results(self):
+        results = bench_generators(sizes=[64, 256], repeat=1)
+        self.assertEqual(set(results), set(GENERATORS))
+        for per_size in results.values():
+            self.assertEqual(set(per_size), {64, 256})
+            for measurements in per_size.values():
+                self.assertAlmostEqual(
+                    measurements["speedup"], measurements["per_byte_ns"] / measurements["bulk_ns"]
+                )
+
+    def test_per_byte_baselines(self):
+        for bulk, per_byte in GENERATORS.values():
+            with self.subTest(generator=bulk.__name__):
+                self.assertEqual(len(per_byte(100)), len(bulk(100)))
+
+
+if __name__ == "__main__":
+    unittest.main()
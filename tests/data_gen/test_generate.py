@@ -0,0 +1,76 @@
+"""`data_gen.generate` module tests"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from mlc.data_gen.generate import generate_sharded, manifest_filename, OutputFormat, split_count
+from mlc.data_gen.random_data import RandomDataType
+from mlc.data_gen.sample_file import SampleFile
+from mlc.utils.rand import OSRandomSource, SeededRandomSource, using_random_source
+
+
+DATA_TYPES = [RandomDataType.ASCII, RandomDataType.SPARSE_BINARY]
+
+
+def _read_shards(out_filename: str) -> tuple[dict, list[list[bytes]]]:
+    with open(manifest_filename(out_filename), encoding="UTF-8") as handle:
+        manifest = json.load(handle)
+    shards = []
+    for shard in manifest["shards"]:
+        path = os.path.join(os.path.dirname(out_filename), shard["path"])
+        if manifest["format"] == OutputFormat.HEX.name:
+            with open(path, encoding="UTF-8") as handle:
+                shards.append([bytes.fromhex(line) for line in handle.read().splitlines()])
+        else:
+            with SampleFile(path) as sample_file:
+                shards.append([bytes(record.data) for record in sample_file])
+    return manifest, shards
+
+
+class TestGenerateSharded(unittest.TestCase):
+    """`generate_sharded` function"""
+
+    def test_split_count(self):
+        self.assertEqual(split_count(10, 3), [4, 3, 3])
+        self.assertEqual(split_count(2, 4), [1, 1, 0, 0])
+
+    def test_seeded_shards(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            runs = []
+            for run in range(2):
+                out_filename = os.path.join(out_dir, f"run{run}.mlcs")
+                with using_random_source(SeededRandomSource(99)):
+                    generate_sharded(out_filename, 10, (5, 50), DATA_TYPES, workers=3)
+                runs.append(_read_shards(out_filename))
+            with SampleFile(os.path.join(out_dir, "run0-00001.mlcs")) as sample_file:
+                self.assertEqual(sample_file.label(0), "ASCII")
+                self.assertEqual(sample_file[-1].metadata["data_type"], "SPARSE_BINARY")
+                self.assertEqual(sample_file[0].metadata["spawn_key"], [1])
+
+        (manifest, shards), (_, shards_again) = runs
+        self.assertEqual(shards, shards_again)
+        self.assertEqual(manifest["seed"], 99)
+        self.assertEqual([shard["path"] for shard in manifest["shards"]][0], "run0-00000.mlcs")
+        self.assertEqual([shard["num_samples"] for shard in manifest["shards"]], [8, 6, 6])
+        self.assertEqual([shard["spawn_key"] for shard in manifest["shards"]], [[0], [1], [2]])
+        self.assertEqual([len(samples) for samples in shards], [8, 6, 6])
+        # Independent streams
+        self.assertEqual(len(set(data for samples in shards for data in samples)), 20)
+        for samples in shards:
+            for data in samples:
+                self.assertTrue(5 <= len(data) < 50)
+
+    def test_unseeded(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_filename = os.path.join(out_dir, "data.csv")
+            with using_random_source(OSRandomSource()):
+                manifest = generate_sharded(
+                    out_filename, 2, (5, 10), DATA_TYPES, workers=4, output_format=OutputFormat.HEX
+                )
+            self.assertIsNone(manifest["seed"])
+            self.assertEqual(manifest["rng"], "URANDOM")
+            # No more workers than samples
+            self.assertEqual(len(manifest["shards"]), 2)
+            self.assertEqual(sum(len(samples) for samples in _read_shards(out_filename)[1]), 4)
@@ -0,0 +1,74 @@
+"""`data_gen.main` module tests"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from mlc.anal.features import calculate_features_batch
+from mlc.anal.matrix_file import FeatureMatrixFile
+from mlc.data_gen import main as main_module
+from mlc.data_gen.sample_file import SampleFile
+from mlc.utils.rand import get_random_source, set_random_source
+
+
+class TestMainFeaturesOutput(unittest.TestCase):
+    """`main` with `--features-output`"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.out_filename = os.path.join(self.temp_dir.name, "out.mlcs")
+        self.features_filename = os.path.join(self.temp_dir.name, "out.fmat")
+        # No config file or database in tests
+        for name, value in [
+            ("load_config", {"DB_NAME": None, "DB_USER": None, "DB_PASS": None}),
+            ("pg", mock.Mock()),
+            ("DatabaseLogHandler", None),
+            ("set_up_logger", None),
+        ]:
+            patcher = mock.patch.object(main_module, name, mock.Mock(return_value=value))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # main sets the seeded randomness source for the process
+        self.addCleanup(set_random_source, get_random_source())
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _main(self, num_samples: int) -> int:
+        return main_module.main(
+            [
+                *("-o", self.out_filename),
+                *("--random-data", "ASCII", "BINARY"),
+                *("-n", str(num_samples)),
+                *("--size-range", "20", "100"),
+                *("--compress", "ZLIB"),
+                *("--rng", "PCG64", "--seed", "7"),
+                *("--features-output", self.features_filename),
+                *("--workers", "1"),
+            ]
+        )
+
+    def test_rows_are_output_features(self):
+        self.assertEqual(self._main(3), 0)
+        with SampleFile(self.out_filename) as sample_file:
+            samples = [bytes(record.data) for record in sample_file]
+        expected, names = calculate_features_batch(samples)
+        with FeatureMatrixFile(self.features_filename) as features:
+            self.assertEqual(features.names, names)
+            np.testing.assert_array_equal(features.read(), expected)
+
+    def test_fresh_run_replaces_features(self):
+        self.assertEqual(self._main(3), 0)
+        self.assertEqual(self._main(2), 0)
+        with SampleFile(self.out_filename) as sample_file:
+            num_samples = len(sample_file)
+        with FeatureMatrixFile(self.features_filename) as features:
+            self.assertEqual(features.num_rows, num_samples)
+            np.testing.assert_array_equal(features.sample_ids, np.arange(num_samples))
+
+
+if __name__ == "__main__":
+    unittest.main()
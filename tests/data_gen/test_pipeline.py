@@ -0,0 +1,81 @@
+"""`data_gen.pipeline` module tests"""
+
+import unittest
+
+import numpy as np
+
+from mlc.anal.features import calculate_features_batch, feature_names
+from mlc.compression import CompressionType, decompress
+from mlc.crypto.cipher_types import CipherType
+from mlc.data_gen.pipeline import PIPELINE_STREAM_ID, PipelineConfig, run_pipeline
+from mlc.data_gen.random_data import RandomDataType
+from mlc.utils.rand import SeededRandomSource, using_random_source
+
+
+CONFIG = PipelineConfig(
+    data_types=[RandomDataType.ASCII, RandomDataType.SPARSE_BINARY],
+    num_samples=5,
+    size_range=(20, 200),
+    compression=CompressionType.ZLIB,
+    keep_uncompressed=True,
+    ciphers=[CipherType.AES, CipherType.CHACHA20],
+    key_sizes=[128, 256],
+    num_encryptions=2,
+    feature_names=feature_names(include=["calc_entropy", "xor_*"]),
+)
+
+
+def _run(seed: int, **kwargs) -> list:
+    with using_random_source(SeededRandomSource(seed)):
+        return list(run_pipeline(CONFIG, **kwargs))
+
+
+class TestRunPipeline(unittest.TestCase):
+    """`run_pipeline` function"""
+
+    def test_records(self):
+        records = _run(5, workers=1)
+        # (uncompressed + compressed) * (plaintext + 2 ciphers * 2 encryptions) per sample
+        self.assertEqual(len(records), 10 * 2 * 5)
+        self.assertEqual([record.sample_id for record in records[:11]], [0] * 10 + [1])
+        self.assertEqual(records[0].data_type, "ASCII")
+        self.assertEqual(records[-1].data_type, "SPARSE_BINARY")
+        self.assertEqual(records[3].spawn_key, (PIPELINE_STREAM_ID, 0))
+
+        plaintext, compressed = records[0], records[5]
+        self.assertIsNone(plaintext.compression)
+        self.assertEqual(compressed.compression, "ZLIB")
+        self.assertEqual(decompress(compressed.data, CompressionType.ZLIB), plaintext.data)
+        self.assertTrue(20 <= len(plaintext.data) < 200)
+        self.assertEqual(
+            [(record.cipher, record.key_size, record.encryption) for record in records[5:10]],
+            [(None, None, None), ("AES", 128, 0), ("AES", 128, 1), ("CHACHA20", 256, 0)]
+            + [("CHACHA20", 256, 1)],
+        )
+        self.assertEqual(len({record.data for record in records[5:10]}), 5)
+        self.assertEqual([records[idx].label for idx in (0, 5, 6)], ["ASCII", "ZLIB", "AES"])
+        self.assertEqual(records[6].metadata["spawn_key"], [PIPELINE_STREAM_ID, 0])
+        self.assertNotIn("data", records[6].metadata)
+
+        expected, _ = calculate_features_batch(
+            [record.data for record in records], CONFIG.feature_names
+        )
+        np.testing.assert_array_equal(np.stack([record.features for record in records]), expected)
+
+    def test_reproducible_in_parallel(self):
+        serial = _run(8, workers=1)
+        parallel = _run(8, workers=2, chunk_size=3, max_pending=1)
+        self.assertEqual([record.data for record in serial], [record.data for record in parallel])
+        self.assertNotEqual(
+            [record.data for record in serial], [record.data for record in _run(9, workers=1)]
+        )
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            PipelineConfig(
+                [RandomDataType.ASCII], 1, (1, 2), ciphers=[CipherType.AES] * 2, key_sizes=[128] * 3
+            )
+        with self.assertRaises(ValueError):
+            PipelineConfig([RandomDataType.ASCII], 1, (1, 2), num_encryptions=0)
+        with self.assertRaises(ValueError):
+            PipelineConfig([RandomDataType.ASCII], 1, (1, 2), ciphers=[CipherType.BLOWFISH])
@@ -3,7 +3,15 @@
 import os
 import unittest
 
-from mlc.data_gen.random_data import ASCII_RANGE, rand_int_in_range
+from mlc.data_gen.random_data import (
+    ASCII_RANGE,
+    rand_ascii_bytes,
+    rand_bytes_in_range,
+    rand_int_in_range,
+    rand_ints_in_range,
+    rand_sparse_ascii_bytes,
+    rand_sparse_bytes,
+)
 
 
 class TestRandIntInRange(unittest.TestCase):
@@ -72,3 +80,44 @@ class TestRandIntInRange(unittest.TestCase):
                 self.assertTrue(False, msg="High range unexpectedly occurred")
         # Success case
         return
+
+
+class TestBulkGeneration(unittest.TestCase):
+    """Generators that draw all their random bytes at once"""
+
+    def test_ints_in_range(self):
+        for low, high in ((0, 1), (5, 10), (0, 256), (-3, 300), (0, 2**32), (-(2**40), 2**40)):
+            with self.subTest(low=low, high=high):
+                values = rand_ints_in_range(10000, low, high)
+                self.assertEqual(len(values), 10000)
+                self.assertTrue(((values >= low) & (values < high)).all())
+
+    def test_ints_in_range_cover_range(self):
+        # Every value of a range that doesn't divide the number of possible draws
+        values = rand_ints_in_range(100000, 0, 3)
+        self.assertEqual(sorted(set(values.tolist())), [0, 1, 2])
+
+    def test_invalid_ranges(self):
+        with self.assertRaises(ValueError):
+            rand_ints_in_range(1, 5, 5)
+        with self.assertRaises(ValueError):
+            rand_ints_in_range(1, 0, 2**64)
+        with self.assertRaises(ValueError):
+            rand_bytes_in_range(1, 0, 257)
+
+    def test_ascii_bytes(self):
+        data = rand_ascii_bytes(100000)
+        self.assertEqual(len(data), 100000)
+        self.assertEqual(min(data), ASCII_RANGE[0])
+        self.assertEqual(max(data), ASCII_RANGE[1] - 1)
+        data.decode("ASCII")
+
+    def test_sparse_bytes(self):
+        for func in (rand_sparse_bytes, rand_sparse_ascii_bytes):
+            with self.subTest(func=func.__name__):
+                data = func(100000, percent_sparse=30.0, sparse_byte=7)
+                self.assertEqual(len(data), 100000)
+                # 31 of the 101 possible draws are sparse
+                self.assertAlmostEqual(data.count(7) / len(data), 31 / 101, delta=0.02)
+                self.assertEqual(func(1000, percent_sparse=100.0, sparse_byte=9), b"\x09" * 1000)
+        self.assertEqual(rand_sparse_ascii_bytes(0), b"")
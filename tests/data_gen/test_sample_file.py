@@ -0,0 +1,91 @@
+"""`data_gen.sample_file` module tests"""
+
+import os
+import tempfile
+import unittest
+
+from mlc.compression import CompressionType
+from mlc.data_gen.sample_file import SampleFile, SampleFileWriter
+
+
+SAMPLES = [os.urandom(size) for size in (0, 1, 100, 5000)] + [b"a" * 10000]
+
+
+class TestSampleFile(unittest.TestCase):
+    """`SampleFileWriter` and `SampleFile`"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "samples.mlcs")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write(self, compression=None):
+        with SampleFileWriter(self.path, compression, metadata={"seed": 5}) as writer:
+            for idx, data in enumerate(SAMPLES):
+                self.assertEqual(
+                    writer.append(data, f"label{idx % 2}", {"data_type": "BINARY", "idx": idx}),
+                    idx,
+                )
+
+    def test_round_trip(self):
+        for compression in (None, CompressionType.ZSTD, CompressionType.ZLIB):
+            with self.subTest(compression=compression):
+                self._write(compression)
+                with SampleFile(self.path) as sample_file:
+                    self.assertEqual(len(sample_file), len(SAMPLES))
+                    self.assertEqual(sample_file.metadata, {"seed": 5})
+                    self.assertEqual([bytes(record.data) for record in sample_file], SAMPLES)
+                    record = sample_file[-1]
+                    self.assertEqual(record.label, "label0")
+                    self.assertEqual(record.metadata, {"data_type": "BINARY", "idx": 4})
+                    self.assertEqual(sample_file.label(1), "label1")
+                    with self.assertRaises(IndexError):
+                        sample_file.data(len(SAMPLES))
+
+    def test_compressed_is_smaller(self):
+        self._write()
+        uncompressed_size = os.path.getsize(self.path)
+        self._write(CompressionType.ZSTD)
+        self.assertLess(os.path.getsize(self.path), uncompressed_size - 9000)
+
+    def test_zero_copy(self):
+        self._write()
+        with SampleFile(self.path) as sample_file:
+            data = sample_file.data(2)
+            self.assertTrue(data.readonly)
+            self.assertIs(data.obj, sample_file.data(3).obj)
+        # Views still in use keep the map open
+        self.assertEqual(bytes(data), SAMPLES[2])
+
+    def test_invalid(self):
+        writer = SampleFileWriter(self.path)
+        writer.append(b"abc")
+        # No index until closed
+        with self.assertRaises(ValueError):
+            SampleFile(self.path)
+        writer.close()
+        with SampleFile(self.path) as sample_file:
+            self.assertEqual(bytes(sample_file.data(0)), b"abc")
+        with open(self.path, "wb") as handle:
+            handle.write(b"not samples")
+        with self.assertRaises(ValueError):
+            SampleFile(self.path)
+
+    def test_close_twice(self):
+        self._write()
+        sample_file = SampleFile(self.path)
+        data = sample_file.data(2)
+        sample_file.close()
+        sample_file.close()
+        self.assertEqual(len(sample_file), 0)
+        self.assertEqual(bytes(data), SAMPLES[2])
+
+    def test_failed_write_has_no_index(self):
+        with self.assertRaises(RuntimeError):
+            with SampleFileWriter(self.path) as writer:
+                writer.append(b"abc")
+                raise RuntimeError("Generation failed")
+        with self.assertRaises(ValueError):
+            SampleFile(self.path)
@@ -4,7 +4,15 @@ import os
 import struct
 from typing import Optional
 
-from mlc.compression import compress, CompressionType, decompress
+import pytest
+
+from mlc.compression import (
+    compress,
+    compressed_size,
+    compressed_sizes,
+    CompressionType,
+    decompress,
+)
 from mlc.data_gen.random_data import rand_bytes, rand_uint16
 
 import zstd
@@ -82,3 +90,34 @@ def test_tar_xz_random_binary_data_random_length():
 def test_zstd_random_binary_data_random_length():
     """zstd compress & decompress random binary data of random length"""
     _run_comp_decomp_test(CompressionType.ZSTD)
+
+
+@pytest.mark.parametrize("length", [1, 511, 512, 513, 10240, 100000])
+@pytest.mark.parametrize("compression_type", list(CompressionType))
+def test_compressed_size(compression_type, length):
+    for data in (rand_bytes(length), b"\x00" * length):
+        assert compressed_size(data, compression_type) == len(compress(data, compression_type))
+
+
+def test_compressed_size_kwargs():
+    data = rand_bytes(1000)
+    for level in (0, 1, 6):
+        assert compressed_size(data, CompressionType.ZLIB, {"level": level}) == len(
+            compress(data, CompressionType.ZLIB, {"level": level})
+        )
+
+
+def test_compressed_sizes():
+    data = b"abcd" * 1000
+    sizes = compressed_sizes(data)
+    assert set(sizes) == set(CompressionType)
+    for compression_type, size in sizes.items():
+        assert size == len(compress(data, compression_type))
+    assert compressed_sizes(data, [CompressionType.BZ2]) == {
+        CompressionType.BZ2: sizes[CompressionType.BZ2]
+    }
+
+
+def test_tar_is_deterministic():
+    data = rand_bytes(1000)
+    assert compress(data, CompressionType.TAR_GZ) == compress(data, CompressionType.TAR_GZ)
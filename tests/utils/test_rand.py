@@ -0,0 +1,62 @@
+import pytest
+
+from mlc.data_gen.data_type_base import DataTypeSettingKey
+from mlc.data_gen.random_data import rand_int_in_range, RandomDataType
+from mlc.utils.rand import (
+    get_random_source,
+    make_random_source,
+    OSRandomSource,
+    rand_bytes,
+    RandomSourceType,
+    SeededRandomSource,
+    using_random_source,
+)
+
+
+def _generate(source) -> list:
+    with using_random_source(source):
+        return [
+            data_type.generate({DataTypeSettingKey.LENGTH.name: rand_int_in_range(10, 100)})
+            for data_type in RandomDataType
+        ]
+
+
+@pytest.mark.parametrize("source_type", [RandomSourceType.PCG64, RandomSourceType.PHILOX])
+def test_seeded_is_reproducible(source_type):
+    first = _generate(make_random_source(source_type, seed=1234))
+    assert first == _generate(make_random_source(source_type, seed=1234))
+    assert first != _generate(make_random_source(source_type, seed=1235))
+    assert isinstance(get_random_source(), OSRandomSource)
+
+
+def test_default_is_urandom():
+    assert isinstance(get_random_source(), OSRandomSource)
+    assert len(rand_bytes(16)) == 16
+    with pytest.raises(ValueError):
+        make_random_source(RandomSourceType.URANDOM, seed=1)
+
+
+def test_spawned_streams():
+    root = SeededRandomSource(seed=42)
+    streams = root.spawn(3)
+    assert [stream.seed for stream in streams] == [42] * 3
+    assert [stream.spawn_key for stream in streams] == [(0,), (1,), (2,)]
+    data = [stream.bytes(64) for stream in streams]
+    assert len(set(data)) == 3
+    assert root.spawn(1)[0].spawn_key == (3,)
+    # A stream is regenerated from its seed and spawn key
+    assert SeededRandomSource(42, spawn_key=(1,)).bytes(64) == data[1]
+
+
+def test_new_seed_is_recorded():
+    source = SeededRandomSource()
+    assert isinstance(source.seed, int)
+    assert SeededRandomSource(source.seed).bytes(32) == source.bytes(32)
+
+
+def test_keyed_streams():
+    root = SeededRandomSource(seed=7, source_type=RandomSourceType.PHILOX)
+    assert root.stream((5, 0)).bytes(32) == root.stream((5, 0)).bytes(32)
+    assert root.stream((5, 0)).bytes(32) != root.stream((5, 1)).bytes(32)
+    assert root.stream((5, 0)).spawn_key == (5, 0)
+    assert isinstance(OSRandomSource().stream((1,)), OSRandomSource)